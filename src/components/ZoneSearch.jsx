@@ -1,5 +1,6 @@
-import { useState, useEffect } from 'react'
-import { searchZones } from '../lib/supabase'
+import { useState, useEffect, useRef } from 'react'
+import { searchZones, suggestZones } from '../lib/supabase'
+import { searchShards } from '../lib/shards'
 import { 
   parseSearchInput, 
   needsDisambiguation, 
@@ -13,6 +14,8 @@ export default function ZoneSearch() {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
   const [suggestions, setSuggestions] = useState([])
+  const [typeahead, setTypeahead] = useState([])
+  const searchedQuery = useRef(null)
   const [disambiguation, setDisambiguation] = useState(null)
   const [showRawJson, setShowRawJson] = useState(false)
 
@@ -22,12 +25,34 @@ export default function ZoneSearch() {
     setSuggestions(newSuggestions)
   }, [searchInput])
 
+  // Typeahead from the suggestion index, debounced; stale responses are dropped
+  useEffect(() => {
+    const prefix = searchInput.trim()
+    // no dropdown for the query just searched (e.g. a picked suggestion)
+    if (!prefix || prefix === searchedQuery.current) {
+      setTypeahead([])
+      return
+    }
+    let cancelled = false
+    const timer = setTimeout(() => {
+      suggestZones(prefix)
+        .then((results) => { if (!cancelled) setTypeahead(results) })
+        .catch(() => { if (!cancelled) setTypeahead([]) })
+    }, 120)
+    return () => {
+      cancelled = true
+      clearTimeout(timer)
+    }
+  }, [searchInput])
+
   const handleSearch = async (query = searchInput) => {
     if (!query.trim()) return
 
     setLoading(true)
     setError(null)
     setDisambiguation(null)
+    setTypeahead([])
+    searchedQuery.current = query.trim()
 
     try {
       const parsed = parseSearchInput(query)
@@ -36,7 +61,12 @@ export default function ZoneSearch() {
       console.log('Parsed query:', parsed)
       console.log('Search query:', searchQuery)
 
-      const results = await searchZones(searchQuery)
+      // Static shards answer municipality/county searches without a database call
+      const shardResults = await searchShards(parsed).catch((err) => {
+        console.warn('Shard search failed, searching live:', err)
+        return null
+      })
+      const results = shardResults ?? await searchZones(searchQuery)
       setSearchResults(results || [])
 
       // Check if we need disambiguation
@@ -97,8 +127,24 @@ export default function ZoneSearch() {
           </button>
         </div>
 
+        {/* Typeahead */}
+        {typeahead.length > 0 && (
+          <div className="suggestions typeahead">
+            {typeahead.map((item) => (
+              <button
+                key={`${item.kind}:${item.value}`}
+                onClick={() => handleSuggestionClick(item.value)}
+                className="suggestion-item"
+                title={item.kind}
+              >
+                {item.label}
+              </button>
+            ))}
+          </div>
+        )}
+
         {/* Search Suggestions */}
-        {suggestions.length > 0 && searchInput.length < 10 && (
+        {typeahead.length === 0 && suggestions.length > 0 && searchInput.length < 10 && (
           <div className="suggestions">
             <p className="suggestions-label">Try searching for:</p>
             {suggestions.map((suggestion, index) => (
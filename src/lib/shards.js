@@ -0,0 +1,66 @@
+// Client-side search over the static shards the zoning worker exports
+// (zoning-worker/worker/shards.py). Each municipality is one versioned,
+// immutable JSON file, so after one fetch its searches need no database call.
+
+const shardBaseUrl = (import.meta.env.VITE_SHARD_BASE_URL || '').replace(/\/$/, '')
+
+// The manifest changes whenever a municipality is re-ingested; shard files never do
+const MANIFEST_TTL_MS = 5 * 60 * 1000
+// Queries that would need more shards than this go to the live search instead
+const MAX_SHARDS_PER_QUERY = 5
+
+let manifest = null
+const shardCache = new Map()
+
+async function fetchJson(url) {
+  const response = await fetch(url)
+  if (!response.ok) {
+    throw new Error(`Shard fetch failed: ${response.status} ${url}`)
+  }
+  return response.json()
+}
+
+function loadManifest() {
+  if (!manifest || Date.now() - manifest.loadedAt > MANIFEST_TTL_MS) {
+    const promise = fetchJson(`${shardBaseUrl}/manifest.json`)
+    manifest = { promise, loadedAt: Date.now() }
+    promise.catch(() => { manifest = null })
+  }
+  return manifest.promise
+}
+
+function loadShard(file) {
+  if (!shardCache.has(file)) {
+    const promise = fetchJson(`${shardBaseUrl}/${file}`).then((doc) =>
+      doc.rows.map((row) => Object.fromEntries(doc.columns.map((col, i) => [col, row[i]])))
+    )
+    shardCache.set(file, promise)
+    promise.catch(() => shardCache.delete(file))
+  }
+  return shardCache.get(file)
+}
+
+const lower = (value) => (value || '').toLowerCase()
+
+/**
+ * Search the exported shards for a parsed query (see parseSearchInput).
+ * Resolves to the matching zones in the search_zones row shape, or null when
+ * shards are not configured or the query does not name a municipality or
+ * county they cover, in which case the caller should search live.
+ */
+export async function searchShards(parsed) {
+  if (!shardBaseUrl || (!parsed.municipality && !parsed.county)) return null
+
+  const { municipalities } = await loadManifest()
+  const county = lower(parsed.county).replace(/\s*county$/, '')
+  const entries = Object.values(municipalities).filter((m) =>
+    (!parsed.state || m.state === parsed.state) &&
+    (!parsed.municipality || lower(m.municipality).includes(lower(parsed.municipality))) &&
+    (!county || lower(m.county).replace(/\s*county$/, '') === county)
+  )
+  if (entries.length === 0 || entries.length > MAX_SHARDS_PER_QUERY) return null
+
+  const zone = lower(parsed.zone)
+  const shards = await Promise.all(entries.map((m) => loadShard(m.file)))
+  return shards.flat().filter((z) => !zone || lower(z.zone_code).includes(zone))
+}
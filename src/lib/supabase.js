@@ -12,10 +12,21 @@ const supabaseKey = import.meta.env.VITE_SUPABASE_ANON_KEY || 'eyJhbGciOiJIUzI1N
 
 export const supabase = createClient(supabaseUrl, supabaseKey)
 
+// Optional cached query service (zoning-worker/worker/query_service.py)
+const queryApiUrl = import.meta.env.VITE_QUERY_API_URL
+
 // Search zones function that calls the RPC
 // This is a read-only function that cannot modify data
 export async function searchZones(query) {
   try {
+    if (queryApiUrl) {
+      const response = await fetch(`${queryApiUrl.replace(/\/$/, '')}/search?q=${encodeURIComponent(query)}`)
+      if (!response.ok) {
+        throw new Error(`Query service error: ${response.status}`)
+      }
+      return await response.json()
+    }
+
     const { data, error } = await supabase.rpc('search_zones', {
       search_query: query
     })
@@ -30,4 +41,25 @@ export async function searchZones(query) {
     console.error('Search zones error:', error)
     throw error
   }
-}
\ No newline at end of file
+}
+// Typeahead suggestions (zone codes, municipalities, counties) for a partial query
+export async function suggestZones(prefix, limit = 8) {
+  if (queryApiUrl) {
+    const response = await fetch(`${queryApiUrl.replace(/\/$/, '')}/suggest?q=${encodeURIComponent(prefix)}&limit=${limit}`)
+    if (!response.ok) {
+      throw new Error(`Query service error: ${response.status}`)
+    }
+    return await response.json()
+  }
+
+  const { data, error } = await supabase.rpc('suggest_zones', {
+    p_prefix: prefix,
+    p_limit: limit
+  })
+
+  if (error) {
+    throw error
+  }
+
+  return data || []
+}
@@ -1,10 +1,19 @@
 -- Zoning Worker Database Schema
 -- This file creates the core tables for the zoning data system
 
+CREATE EXTENSION IF NOT EXISTS postgis;
+
 -- Drop existing tables if they exist (for clean setup)
+DROP TABLE IF EXISTS zone_suggestions CASCADE;
+DROP TABLE IF EXISTS zone_districts CASCADE;
+DROP TABLE IF EXISTS job_profiles CASCADE;
+DROP TABLE IF EXISTS header_aliases CASCADE;
+DROP TABLE IF EXISTS raw_extractions CASCADE;
+DROP TABLE IF EXISTS raw_extraction_blobs CASCADE;
 DROP TABLE IF EXISTS standards CASCADE;
 DROP TABLE IF EXISTS zones CASCADE;
 DROP TABLE IF EXISTS ingestion_jobs CASCADE;
+DROP TABLE IF EXISTS municipalities CASCADE;
 
 -- Create ingestion_jobs table
 CREATE TABLE ingestion_jobs (
@@ -14,19 +23,95 @@ CREATE TABLE ingestion_jobs (
     county TEXT NOT NULL,
     municipality TEXT NOT NULL,
     pdf_storage_path TEXT,
-    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PROCESSING', 'DONE', 'FAILED')),
+    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PROCESSING', 'WAITING', 'DONE', 'PARTIAL_SUCCESS', 'NEEDS_REVIEW', 'FAILED')),
     message TEXT,
+    priority INTEGER NOT NULL DEFAULT 0, -- higher runs first; e.g. 100 for interactive re-runs, -10 for bulk backfills
+    source_host TEXT GENERATED ALWAYS AS (LOWER(SUBSTRING(source_url FROM '^[A-Za-z]+://([^/:?#]+)'))) STORED,
+    content_hash TEXT, -- sha256 of the downloaded document
+    coalesced_into INTEGER REFERENCES ingestion_jobs(id), -- duplicate job attached to this job's result
+    stage TEXT, -- last completed stage: DOWNLOADED, EXTRACTED or MAPPED; SPLIT once page-range children are queued
+    checkpoint JSONB, -- stage outputs: file/raw extraction hashes, ingested zone ids
+    attempts INTEGER NOT NULL DEFAULT 0,
+    profile BOOLEAN NOT NULL DEFAULT FALSE, -- run under the profiler (see worker/profiling.py)
+    worker_id TEXT, -- worker holding (or last holding) the job
+    lease_expires_at TIMESTAMPTZ, -- renewed by the worker's heartbeat; expired leases are requeued by claim_jobs()
+    parent_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE, -- set on the page-range children of a split job
+    page_start INTEGER, -- children only: first and last page (1-based, inclusive) to extract
+    page_end INTEGER,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Compressed raw extraction payloads, stored once per distinct content
+CREATE TABLE raw_extraction_blobs (
+    content_hash TEXT PRIMARY KEY, -- sha256 of the canonical JSON payload
+    codec TEXT NOT NULL CHECK (codec IN ('zstd', 'zlib')),
+    payload BYTEA NOT NULL,
+    raw_bytes INTEGER NOT NULL, -- uncompressed size
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- One row per job run, referencing the (possibly shared) payload blob
+CREATE TABLE raw_extractions (
+    id SERIAL PRIMARY KEY,
+    job_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL REFERENCES raw_extraction_blobs(content_hash),
+    confidence NUMERIC,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Profiles of job runs (PROFILE_JOBS or ingestion_jobs.profile), kept next to raw_extractions
+CREATE TABLE job_profiles (
+    id SERIAL PRIMARY KEY,
+    job_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+    attempt INTEGER,
+    wall_seconds NUMERIC,
+    samples INTEGER, -- stack samples in the collapsed profile
+    error TEXT, -- set when the profiled run raised
+    codec TEXT NOT NULL CHECK (codec IN ('zstd', 'zlib')),
+    pstats BYTEA NOT NULL, -- compressed cProfile/pstats dump
+    collapsed BYTEA NOT NULL, -- compressed collapsed stacks ("a;b;c count" lines)
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Header resolutions learned from fuzzy matching (see worker/aliases.py)
+CREATE TABLE header_aliases (
+    id SERIAL PRIMARY KEY,
+    scope TEXT NOT NULL CHECK (scope IN ('municipality', 'state', 'global')),
+    scope_key TEXT NOT NULL DEFAULT '', -- "STATE|Municipality", "STATE" or '' for global
+    header_norm TEXT NOT NULL, -- normalized header text (mapping.norm)
+    canonical_key TEXT, -- canonical standard key, e.g. "front_yard_principal"
+    score NUMERIC, -- fuzzy score at the time it was learned
+    status TEXT NOT NULL DEFAULT 'LEARNED' CHECK (status IN ('LEARNED', 'APPROVED', 'REJECTED')),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT header_aliases_unique UNIQUE (scope, scope_key, header_norm)
+);
+
+-- One row per municipality (resolve_municipality() creates them on first ingest)
+CREATE TABLE municipalities (
+    id SERIAL PRIMARY KEY,
+    state_code VARCHAR(2) NOT NULL,
+    county TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    -- names repeat across counties (e.g. several NJ "Washington Township"s)
+    CONSTRAINT municipalities_unique UNIQUE (state_code, county, name)
+);
+
+-- zones and standards are hash-partitioned by municipality_id, so a
+-- municipality's reads, deletes and re-ingests touch one partition. Partitions
+-- live in their own schema, which PostgREST does not expose, so RLS on the
+-- parent tables cannot be bypassed through them.
+CREATE SCHEMA IF NOT EXISTS zone_partitions;
+
 -- Create zones table
 CREATE TABLE zones (
-    id SERIAL PRIMARY KEY,
-    municipality_id INTEGER, -- For compatibility, can be derived from municipality name
+    id SERIAL,
+    municipality_id INTEGER NOT NULL REFERENCES municipalities(id), -- partition key
     zone_code TEXT NOT NULL,
     zone_name TEXT,
-    zone_key TEXT UNIQUE, -- Format: "STATE|COUNTY|MUNICIPALITY|ZONE_CODE"
+    zone_key TEXT, -- Format: "STATE|COUNTY|MUNICIPALITY|ZONE_CODE"
     ordinance_url TEXT,
     effective_date DATE DEFAULT CURRENT_DATE,
     last_verified_at DATE DEFAULT CURRENT_DATE,
@@ -38,14 +123,17 @@ CREATE TABLE zones (
     county TEXT,
     municipality TEXT NOT NULL,
     
-    -- Indexes for fast searching
-    CONSTRAINT zones_unique_location UNIQUE (state_code, county, municipality, zone_code)
-);
+    -- Unique keys on a partitioned table must include the partition key
+    PRIMARY KEY (municipality_id, id),
+    CONSTRAINT zones_unique_zone UNIQUE (municipality_id, zone_code),
+    CONSTRAINT zones_unique_key UNIQUE (municipality_id, zone_key)
+) PARTITION BY HASH (municipality_id);
 
 -- Create standards table with all zoning standards
 CREATE TABLE standards (
-    id SERIAL PRIMARY KEY,
-    zone_id INTEGER NOT NULL REFERENCES zones(id) ON DELETE CASCADE,
+    id SERIAL,
+    municipality_id INTEGER NOT NULL, -- partition key, the zone's municipality
+    zone_id INTEGER NOT NULL,
     
     -- Store original JSON for flexibility
     all_standards JSONB,
@@ -98,7 +186,46 @@ CREATE TABLE standards (
     -- Metadata
     key TEXT, -- For legacy compatibility
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    PRIMARY KEY (municipality_id, id),
+    FOREIGN KEY (municipality_id, zone_id) REFERENCES zones(municipality_id, id) ON DELETE CASCADE
+) PARTITION BY HASH (municipality_id);
+
+-- 16 partitions each; a zone and its standards land in the same-numbered pair
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format('CREATE TABLE zone_partitions.zones_p%s PARTITION OF zones FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i);
+        EXECUTE format('CREATE TABLE zone_partitions.standards_p%s PARTITION OF standards FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i);
+    END LOOP;
+END $$;
+
+-- Zoning district polygons (imported with worker/spatial.py), linked to zones by zone_key
+CREATE TABLE zone_districts (
+    id SERIAL PRIMARY KEY,
+    zone_key TEXT NOT NULL, -- zones.zone_key; districts may be imported before the zone is ingested
+    state_code VARCHAR(2) NOT NULL,
+    municipality TEXT NOT NULL,
+    zone_code TEXT NOT NULL,
+    source TEXT, -- file the polygon came from
+    properties JSONB, -- original feature attributes
+    geom geometry(MultiPolygon, 4326) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Typeahead terms for zone codes, municipality and county names (rebuilt per municipality on ingest by worker/suggest.py)
+CREATE TABLE zone_suggestions (
+    id SERIAL PRIMARY KEY,
+    term TEXT NOT NULL, -- lowercase letters and digits only, so "R-20", "R20" and "r 20" are all "r20"
+    kind TEXT NOT NULL CHECK (kind IN ('zone', 'municipality', 'county')),
+    label TEXT NOT NULL, -- shown in the dropdown
+    value TEXT NOT NULL, -- search text filled in when picked, e.g. "R-20 Brick NJ"
+    state_code VARCHAR(2) NOT NULL,
+    county TEXT NOT NULL DEFAULT '',
+    municipality TEXT NOT NULL DEFAULT '', -- '' for county terms, which are shared by the county's municipalities
+    weight INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT zone_suggestions_unique UNIQUE (kind, term, value)
 );
 
 -- Create indexes for performance
@@ -108,12 +235,28 @@ CREATE INDEX idx_zones_municipality ON zones(municipality);
 CREATE INDEX idx_zones_county ON zones(county);
 CREATE INDEX idx_zones_zone_key ON zones(zone_key);
 
-CREATE INDEX idx_standards_zone_id ON standards(zone_id);
+CREATE INDEX idx_standards_zone_id ON standards(municipality_id, zone_id);
 CREATE INDEX idx_standards_zone_code ON standards(zone_code);
 CREATE INDEX idx_standards_all_standards ON standards USING GIN(all_standards);
 
 CREATE INDEX idx_ingestion_jobs_status ON ingestion_jobs(status);
 CREATE INDEX idx_ingestion_jobs_municipality ON ingestion_jobs(municipality, state_code);
+CREATE INDEX idx_ingestion_jobs_pending ON ingestion_jobs(priority DESC, created_at) WHERE status = 'PENDING';
+CREATE INDEX idx_ingestion_jobs_leases ON ingestion_jobs(lease_expires_at) WHERE status = 'PROCESSING';
+CREATE INDEX idx_ingestion_jobs_host_status ON ingestion_jobs(source_host, status);
+CREATE INDEX idx_ingestion_jobs_source_url ON ingestion_jobs(source_url);
+CREATE INDEX idx_ingestion_jobs_content_hash ON ingestion_jobs(content_hash);
+CREATE INDEX idx_ingestion_jobs_coalesced_into ON ingestion_jobs(coalesced_into);
+CREATE INDEX idx_ingestion_jobs_parent ON ingestion_jobs(parent_id, status) WHERE parent_id IS NOT NULL;
+CREATE INDEX idx_raw_extractions_job_id ON raw_extractions(job_id);
+CREATE INDEX idx_raw_extractions_content_hash ON raw_extractions(content_hash);
+CREATE INDEX idx_job_profiles_job_id ON job_profiles(job_id);
+CREATE INDEX idx_header_aliases_scope_key ON header_aliases(scope_key);
+CREATE INDEX idx_zone_districts_geom ON zone_districts USING GIST(geom);
+CREATE INDEX idx_zone_districts_zone_key ON zone_districts(zone_key);
+CREATE INDEX idx_zone_districts_municipality ON zone_districts(state_code, municipality);
+CREATE INDEX idx_zone_suggestions_term ON zone_suggestions(term text_pattern_ops);
+CREATE INDEX idx_zone_suggestions_municipality ON zone_suggestions(state_code, municipality);
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -132,4 +275,7 @@ CREATE TRIGGER update_standards_updated_at BEFORE UPDATE ON standards
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_ingestion_jobs_updated_at BEFORE UPDATE ON ingestion_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_header_aliases_updated_at BEFORE UPDATE ON header_aliases
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
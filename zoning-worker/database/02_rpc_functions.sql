@@ -48,7 +48,7 @@ BEGIN
         s.maximum_density,
         s.maximum_far
     FROM zones z
-    LEFT JOIN standards s ON z.id = s.zone_id
+    LEFT JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id
     WHERE 
         z.is_current = true
         AND z.published = true
@@ -95,13 +95,43 @@ BEGIN
         z.effective_date,
         s.all_standards as standards
     FROM zones z
-    LEFT JOIN standards s ON z.id = s.zone_id
+    LEFT JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id
     WHERE z.id = zone_id
     AND z.is_current = true
     AND z.published = true;
 END;
 $$;
 
+-- Look up (or register) a municipality's integer id; zones and standards are
+-- partitioned on it
+CREATE OR REPLACE FUNCTION resolve_municipality(
+    p_state_code text,
+    p_county text,
+    p_name text
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_id integer;
+BEGIN
+    SELECT id INTO v_id FROM municipalities
+    WHERE state_code = UPPER(p_state_code)
+    AND county = COALESCE(p_county, '')
+    AND name = p_name;
+    
+    IF v_id IS NULL THEN
+        INSERT INTO municipalities (state_code, county, name)
+        VALUES (UPPER(p_state_code), COALESCE(p_county, ''), p_name)
+        ON CONFLICT (state_code, county, name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id INTO v_id;
+    END IF;
+    
+    RETURN v_id;
+END;
+$$;
+
 -- Function for admin zone ingestion (used by worker)
 CREATE OR REPLACE FUNCTION admin_ingest_zone(
     p_state_code text,
@@ -117,6 +147,7 @@ LANGUAGE plpgsql
 SECURITY DEFINER
 AS $$
 DECLARE
+    v_municipality_id integer;
     v_zone_id integer;
     v_zone_key text;
     v_standard jsonb;
@@ -125,6 +156,8 @@ DECLARE
     v_value_text text;
     v_units text;
 BEGIN
+    v_municipality_id := resolve_municipality(p_state_code, p_county, p_municipality);
+    
     -- Create zone key for uniqueness
     v_zone_key := UPPER(p_state_code) || '|' || UPPER(COALESCE(p_county, '')) || '|' || UPPER(p_municipality) || '|' || UPPER(p_zone_code);
     
@@ -134,20 +167,21 @@ BEGIN
         ordinance_url, zone_key, municipality_id
     ) VALUES (
         UPPER(p_state_code), p_county, p_municipality, UPPER(p_zone_code), p_zone_name,
-        p_ordinance_url, v_zone_key, 1 -- Default municipality_id
+        p_ordinance_url, v_zone_key, v_municipality_id
     )
-    ON CONFLICT (zone_key) 
+    ON CONFLICT (municipality_id, zone_key) 
     DO UPDATE SET
         zone_name = EXCLUDED.zone_name,
         ordinance_url = EXCLUDED.ordinance_url,
-        updated_at = NOW()
+        last_verified_at = CURRENT_DATE
     RETURNING id INTO v_zone_id;
     
     -- Delete existing standards for this zone
-    DELETE FROM standards WHERE zone_id = v_zone_id;
+    DELETE FROM standards WHERE municipality_id = v_municipality_id AND zone_id = v_zone_id;
     
     -- Insert new standards
     INSERT INTO standards (
+        municipality_id,
         zone_id,
         zone_code,
         all_standards,
@@ -178,6 +212,7 @@ BEGIN
         maximum_far,
         maximum_density
     ) VALUES (
+        v_municipality_id,
         v_zone_id,
         UPPER(p_zone_code),
         p_standards,
@@ -284,4 +319,336 @@ BEGIN
     ORDER BY j.created_at ASC
     LIMIT 10;
 END;
+$$;
+
+-- Zone (and its standards) containing each point, for batch parcel lookups.
+-- p_points: [{"id": "parcel-1", "lon": -74.1, "lat": 40.05}, ...]; points outside
+-- every district come back with NULL zone columns. Where districts overlap
+-- (overlay zones) the smallest one wins.
+CREATE OR REPLACE FUNCTION zones_at_points(p_points jsonb)
+RETURNS TABLE(
+    point_id text,
+    lon double precision,
+    lat double precision,
+    zone_key text,
+    zone_code text,
+    zone_name text,
+    municipality text,
+    county text,
+    state text,
+    ordinance_url text,
+    area_sqft_interior_lots numeric,
+    frontage_interior_lots numeric,
+    area_sqft_corner_lots numeric,
+    frontage_feet_corner_lots numeric,
+    depth_interior_lots_ft numeric,
+    depth_corner_lots_ft numeric,
+    front_yard_principal_building numeric,
+    side_yard_principal_building numeric,
+    rear_yard_principal_building numeric,
+    max_building_coverage_percent numeric,
+    max_lot_coverage_percent numeric,
+    stories_max_height_principal_building numeric,
+    feet_max_height_principal_building numeric,
+    maximum_density numeric,
+    maximum_far numeric
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT
+        p.id,
+        p.lon,
+        p.lat,
+        d.zone_key,
+        d.zone_code,
+        z.zone_name,
+        d.municipality,
+        z.county,
+        d.state_code,
+        z.ordinance_url,
+        s.area_sqft_interior_lots,
+        s.frontage_interior_lots,
+        s.area_sqft_corner_lots,
+        s.frontage_feet_corner_lots,
+        s.depth_interior_lots_ft,
+        s.depth_corner_lots_ft,
+        s.front_yard_principal_building,
+        s.side_yard_principal_building,
+        s.rear_yard_principal_building,
+        s.max_building_coverage_percent,
+        s.max_lot_coverage_percent,
+        s.stories_max_height_principal_building,
+        s.feet_max_height_principal_building,
+        s.maximum_density,
+        s.maximum_far
+    FROM jsonb_to_recordset(p_points) AS p(id text, lon double precision, lat double precision)
+    LEFT JOIN LATERAL (
+        SELECT zd.zone_key, zd.zone_code, zd.municipality, zd.state_code
+        FROM zone_districts zd
+        WHERE ST_Intersects(zd.geom, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326))
+        ORDER BY ST_Area(zd.geom)
+        LIMIT 1
+    ) d ON true
+    LEFT JOIN zones z ON z.zone_key = d.zone_key AND z.is_current = true AND z.published = true
+    LEFT JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id;
+$$;
+
+-- Typeahead: suggestions whose term starts with the normalized prefix, exact
+-- terms first, then by weight. The range test on term (rather than LIKE)
+-- lets the text_pattern_ops index serve a parameterized prefix; terms are only
+-- [a-z0-9], so appending '{' (the byte after 'z') gives the upper bound.
+CREATE OR REPLACE FUNCTION suggest_zones(p_prefix text, p_limit integer DEFAULT 10)
+RETURNS TABLE(
+    kind text,
+    label text,
+    value text,
+    state text,
+    county text,
+    municipality text
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    WITH q AS (
+        SELECT lower(regexp_replace(coalesce(p_prefix, ''), '[^A-Za-z0-9]', '', 'g')) AS term
+    )
+    SELECT m.kind, m.label, m.value, m.state_code, NULLIF(m.county, ''), NULLIF(m.municipality, '')
+    FROM (
+        -- one row per suggestion even when several of its terms match
+        SELECT DISTINCT ON (s.value) s.*, s.term = q.term AS exact
+        FROM zone_suggestions s, q
+        WHERE q.term <> ''
+          AND s.term ~>=~ q.term
+          AND s.term ~<~ (q.term || '{')
+        ORDER BY s.value, s.term = q.term DESC
+    ) m
+    ORDER BY m.exact DESC, m.weight DESC, length(m.label), m.label
+    LIMIT LEAST(GREATEST(p_limit, 1), 50);
+$$;
+
+-- Function to claim the next jobs to run: priority plus aging, with a per-host cap.
+-- A job gains one priority point for every p_aging_seconds it has waited, so bulk
+-- backfills cannot starve forever while urgent re-runs still jump the queue.
+-- Hosts that already have p_max_per_host jobs PROCESSING are skipped.
+-- Claimed rows are set PROCESSING with a lease in the same statement, and
+-- FOR UPDATE SKIP LOCKED keeps concurrent workers from claiming the same job.
+-- The cap is counted per call, so workers claiming at the same instant can
+-- briefly exceed it.
+CREATE OR REPLACE FUNCTION claim_jobs(
+    p_worker_id text,
+    p_limit integer DEFAULT 1,
+    p_lease_seconds integer DEFAULT 300,
+    p_aging_seconds integer DEFAULT 600,
+    p_max_per_host integer DEFAULT 2,
+    p_max_attempts integer DEFAULT 3
+)
+RETURNS SETOF ingestion_jobs
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+AS $$
+    -- Reclaim jobs whose worker stopped renewing its lease (rows without a lease
+    -- count as expired once they have not been touched for p_lease_seconds).
+    -- Coalesced followers hold no lease: they finish with their leader.
+    WITH expired AS (
+        SELECT id, attempts
+        FROM ingestion_jobs
+        WHERE status = 'PROCESSING'
+          AND coalesced_into IS NULL
+          AND (lease_expires_at < NOW()
+               OR (lease_expires_at IS NULL AND updated_at < NOW() - make_interval(secs => p_lease_seconds)))
+        FOR UPDATE SKIP LOCKED
+    ),
+    reset AS (
+        UPDATE ingestion_jobs j
+        SET status = CASE WHEN e.attempts >= p_max_attempts THEN 'FAILED' ELSE 'PENDING' END,
+            message = 'Lease expired on worker ' || COALESCE(j.worker_id, '?') || ' (attempt ' || e.attempts || ')',
+            worker_id = NULL,
+            lease_expires_at = NULL,
+            updated_at = NOW()
+        FROM expired e
+        WHERE j.id = e.id
+        RETURNING j.id, j.status, j.message
+    )
+    UPDATE ingestion_jobs f
+    SET status = 'FAILED',
+        message = 'Coalesced with job ' || r.id || ': ' || r.message,
+        updated_at = NOW()
+    FROM reset r
+    WHERE r.status = 'FAILED' AND f.coalesced_into = r.id AND f.status = 'PROCESSING';
+
+    -- Split jobs whose children have all finished go back to the queue for the
+    -- merge. finish_child_job does this as the last child finishes; this catches
+    -- children that failed on an expired lease above.
+    UPDATE ingestion_jobs p
+    SET status = 'PENDING', attempts = 0, message = 'Merging page-range results', updated_at = NOW()
+    WHERE p.status = 'WAITING'
+      AND NOT EXISTS (SELECT 1 FROM ingestion_jobs c
+                      WHERE c.parent_id = p.id AND c.status IN ('PENDING', 'PROCESSING'));
+
+    -- Claim: within one priority, aging preserves age order, so the jobs with the
+    -- highest effective priority are always among the oldest few of some priority.
+    -- Candidates are the oldest GREATEST(p_limit * 10, 100) PENDING jobs of each
+    -- distinct priority, read from idx_ingestion_jobs_pending with a skip scan over
+    -- the priorities (a handful in practice). Rows another worker is claiming are
+    -- skipped, then the ranking and per-host cap below decide the batch.
+    WITH RECURSIVE levels AS (
+        (SELECT priority FROM ingestion_jobs WHERE status = 'PENDING'
+         ORDER BY priority DESC LIMIT 1)
+        UNION ALL
+        SELECT (SELECT j.priority FROM ingestion_jobs j
+                WHERE j.status = 'PENDING' AND j.priority < l.priority
+                ORDER BY j.priority DESC LIMIT 1)
+        FROM levels l
+        WHERE l.priority IS NOT NULL
+    ),
+    candidates AS (
+        SELECT c.id
+        FROM levels l
+        CROSS JOIN LATERAL (
+            SELECT id FROM ingestion_jobs j
+            WHERE j.status = 'PENDING' AND j.priority = l.priority
+            ORDER BY j.created_at LIMIT GREATEST(p_limit * 10, 100)
+        ) c
+        WHERE l.priority IS NOT NULL
+    ),
+    -- Children reading a stored copy of the document don't touch its host, so the cap skips them
+    locked AS (
+        SELECT j.id, j.source_host, j.created_at, j.pdf_storage_path IS NOT NULL AS stored,
+               j.priority + EXTRACT(EPOCH FROM (NOW() - j.created_at)) / GREATEST(p_aging_seconds, 1) AS effective_priority
+        FROM ingestion_jobs j
+        WHERE j.id IN (SELECT id FROM candidates) AND j.status = 'PENDING'
+        FOR UPDATE SKIP LOCKED
+    ),
+    -- Coalesced followers wait on their leader without downloading, so they don't count either
+    busy AS (
+        SELECT source_host, COUNT(*) AS running
+        FROM ingestion_jobs
+        WHERE status = 'PROCESSING' AND pdf_storage_path IS NULL AND coalesced_into IS NULL
+        GROUP BY source_host
+    ),
+    ranked AS (
+        SELECT
+            l.id,
+            l.effective_priority,
+            l.created_at,
+            l.stored,
+            COALESCE(b.running, 0) + ROW_NUMBER() OVER (
+                PARTITION BY l.source_host, l.stored ORDER BY l.effective_priority DESC, l.created_at
+            ) AS host_load
+        FROM locked l
+        LEFT JOIN busy b ON b.source_host IS NOT DISTINCT FROM l.source_host
+    ),
+    picked AS (
+        SELECT id
+        FROM ranked
+        WHERE stored OR host_load <= p_max_per_host
+        ORDER BY effective_priority DESC, created_at
+        LIMIT p_limit
+    )
+    UPDATE ingestion_jobs j
+    SET status = 'PROCESSING',
+        worker_id = p_worker_id,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    FROM picked
+    WHERE j.id = picked.id
+    RETURNING j.*;
+$$;
+
+-- Heartbeat: push out the leases a worker still holds; returns the ids it still owns
+CREATE OR REPLACE FUNCTION extend_job_leases(
+    p_worker_id text,
+    p_job_ids integer[],
+    p_lease_seconds integer DEFAULT 300
+)
+RETURNS SETOF integer
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+AS $$
+    UPDATE ingestion_jobs
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE id = ANY(p_job_ids)
+      AND worker_id = p_worker_id
+      AND status = 'PROCESSING'
+      AND lease_expires_at IS NOT NULL
+    RETURNING id;
+$$;
+
+-- Fan a job out into page-range children that any worker can claim. The parent
+-- waits (status WAITING, no lease) until its last child finishes; it then goes
+-- back to PENDING for the merge step. Idempotent: a retried split keeps the
+-- children it already created. p_ranges is [[first_page, last_page], ...];
+-- p_storage_path is where the children download the document from.
+CREATE OR REPLACE FUNCTION split_job(
+    p_job_id integer,
+    p_ranges jsonb,
+    p_storage_path text DEFAULT NULL
+)
+RETURNS integer
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_children integer;
+BEGIN
+    PERFORM 1 FROM ingestion_jobs WHERE id = p_job_id FOR UPDATE;
+    SELECT COUNT(*) INTO v_children FROM ingestion_jobs WHERE parent_id = p_job_id;
+    IF v_children = 0 THEN
+        INSERT INTO ingestion_jobs (source_url, state_code, county, municipality, pdf_storage_path, priority,
+                                    content_hash, profile, parent_id, page_start, page_end, message)
+        SELECT j.source_url, j.state_code, j.county, j.municipality, p_storage_path, j.priority,
+               j.content_hash, j.profile, j.id, (r->>0)::integer, (r->>1)::integer,
+               'Pages ' || (r->>0) || '-' || (r->>1) || ' of job ' || j.id
+        FROM ingestion_jobs j, jsonb_array_elements(p_ranges) r
+        WHERE j.id = p_job_id;
+        GET DIAGNOSTICS v_children = ROW_COUNT;
+    END IF;
+    UPDATE ingestion_jobs
+    SET status = 'WAITING',
+        stage = 'SPLIT',
+        checkpoint = NULL,
+        worker_id = NULL,
+        lease_expires_at = NULL,
+        message = 'Split into ' || v_children || ' page-range jobs',
+        updated_at = NOW()
+    WHERE id = p_job_id;
+    RETURN v_children;
+END;
+$$;
+
+-- Final status for a page-range child. Siblings finish one at a time under the
+-- parent's row lock, so exactly one of them sees that none are left running and
+-- requeues the parent for its merge (with fresh attempts). Returns true for that one.
+CREATE OR REPLACE FUNCTION finish_child_job(
+    p_job_id integer,
+    p_status text,
+    p_message text DEFAULT NULL
+)
+RETURNS boolean
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_parent integer;
+BEGIN
+    SELECT parent_id INTO v_parent FROM ingestion_jobs WHERE id = p_job_id;
+    PERFORM 1 FROM ingestion_jobs WHERE id = v_parent FOR UPDATE;
+    UPDATE ingestion_jobs
+    SET status = p_status, message = p_message, lease_expires_at = NULL, updated_at = NOW()
+    WHERE id = p_job_id;
+    UPDATE ingestion_jobs p
+    SET status = 'PENDING', attempts = 0, message = 'Merging page-range results', updated_at = NOW()
+    WHERE p.id = v_parent
+      AND p.status = 'WAITING'
+      AND NOT EXISTS (SELECT 1 FROM ingestion_jobs c
+                      WHERE c.parent_id = v_parent AND c.status IN ('PENDING', 'PROCESSING'));
+    RETURN FOUND;
+END;
 $$;
\ No newline at end of file
@@ -2,9 +2,16 @@
 -- This file sets up security policies to control data access
 
 -- Enable RLS on all tables
+ALTER TABLE municipalities ENABLE ROW LEVEL SECURITY;
 ALTER TABLE zones ENABLE ROW LEVEL SECURITY;
 ALTER TABLE standards ENABLE ROW LEVEL SECURITY;
 ALTER TABLE ingestion_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE raw_extractions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE raw_extraction_blobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE header_aliases ENABLE ROW LEVEL SECURITY;
+ALTER TABLE job_profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE zone_districts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE zone_suggestions ENABLE ROW LEVEL SECURITY;
 
 -- Create user roles
 DO $$
@@ -72,7 +79,8 @@ CREATE POLICY "Public standards read access" ON standards
     USING (
         EXISTS (
             SELECT 1 FROM zones z 
-            WHERE z.id = standards.zone_id 
+            WHERE z.municipality_id = standards.municipality_id
+            AND z.id = standards.zone_id 
             AND z.published = true 
             AND z.is_current = true
         )
@@ -134,6 +142,147 @@ CREATE POLICY "Worker jobs update access" ON ingestion_jobs
 -- Public users cannot access ingestion jobs
 -- (No public policy means no access)
 
+-- =============================================================================
+-- RAW EXTRACTION TABLE POLICIES
+-- =============================================================================
+
+-- Admin full access to raw extractions
+CREATE POLICY "Admin raw extractions full access" ON raw_extractions
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+CREATE POLICY "Admin raw extraction blobs full access" ON raw_extraction_blobs
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+-- Worker can read and append raw extractions (blobs are immutable)
+CREATE POLICY "Worker raw extractions read access" ON raw_extractions
+    FOR SELECT
+    TO zone_worker
+    USING (true);
+
+CREATE POLICY "Worker raw extractions write access" ON raw_extractions
+    FOR INSERT
+    TO zone_worker
+    WITH CHECK (true);
+
+CREATE POLICY "Worker raw extraction blobs read access" ON raw_extraction_blobs
+    FOR SELECT
+    TO zone_worker
+    USING (true);
+
+CREATE POLICY "Worker raw extraction blobs write access" ON raw_extraction_blobs
+    FOR INSERT
+    TO zone_worker
+    WITH CHECK (true);
+
+-- =============================================================================
+-- HEADER_ALIASES TABLE POLICIES
+-- =============================================================================
+
+-- Admin reviews and overrides learned header aliases
+CREATE POLICY "Admin header aliases full access" ON header_aliases
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+-- Worker reads aliases and records new learned ones
+CREATE POLICY "Worker header aliases read access" ON header_aliases
+    FOR SELECT
+    TO zone_worker
+    USING (true);
+
+CREATE POLICY "Worker header aliases write access" ON header_aliases
+    FOR INSERT
+    TO zone_worker
+    WITH CHECK (true);
+
+-- =============================================================================
+-- JOB_PROFILES TABLE POLICIES
+-- =============================================================================
+
+-- Admin reads and prunes job profiles
+CREATE POLICY "Admin job profiles full access" ON job_profiles
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+-- Worker records profiles of the jobs it runs
+CREATE POLICY "Worker job profiles read access" ON job_profiles
+    FOR SELECT
+    TO zone_worker
+    USING (true);
+
+CREATE POLICY "Worker job profiles write access" ON job_profiles
+    FOR INSERT
+    TO zone_worker
+    WITH CHECK (true);
+
+-- =============================================================================
+-- MUNICIPALITIES TABLE POLICIES
+-- =============================================================================
+
+-- Municipality names are public; ids let clients filter zones by partition key
+CREATE POLICY "Public municipalities read access" ON municipalities
+    FOR SELECT
+    USING (true);
+
+CREATE POLICY "Admin municipalities full access" ON municipalities
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+-- Worker registers new municipalities through resolve_municipality()
+CREATE POLICY "Worker municipalities access" ON municipalities
+    FOR SELECT
+    TO zone_worker
+    USING (true);
+
+-- =============================================================================
+-- ZONE_DISTRICTS TABLE POLICIES
+-- =============================================================================
+
+-- District boundaries are public map data
+CREATE POLICY "Public zone districts read access" ON zone_districts
+    FOR SELECT
+    USING (true);
+
+-- Admin imports and replaces district boundaries
+CREATE POLICY "Admin zone districts full access" ON zone_districts
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
+-- =============================================================================
+-- ZONE_SUGGESTIONS TABLE POLICIES
+-- =============================================================================
+
+-- Typeahead terms only repeat published zone, municipality and county names
+CREATE POLICY "Public zone suggestions read access" ON zone_suggestions
+    FOR SELECT
+    USING (true);
+
+-- Worker rebuilds a municipality's suggestions after ingest
+CREATE POLICY "Worker zone suggestions access" ON zone_suggestions
+    FOR ALL
+    TO zone_worker
+    USING (true)
+    WITH CHECK (true);
+
+CREATE POLICY "Admin zone suggestions full access" ON zone_suggestions
+    FOR ALL
+    TO zone_admin
+    USING (true)
+    WITH CHECK (true);
+
 -- =============================================================================
 -- FUNCTION PERMISSIONS
 -- =============================================================================
@@ -143,27 +292,48 @@ CREATE POLICY "Worker jobs update access" ON ingestion_jobs
 -- Public can execute search functions
 GRANT EXECUTE ON FUNCTION search_zones(text) TO PUBLIC;
 GRANT EXECUTE ON FUNCTION get_zone_details(integer) TO PUBLIC;
+GRANT EXECUTE ON FUNCTION zones_at_points(jsonb) TO PUBLIC;
+GRANT EXECUTE ON FUNCTION suggest_zones(text, integer) TO PUBLIC;
 
 -- Admin can execute all functions
 GRANT EXECUTE ON ALL FUNCTIONS IN SCHEMA public TO zone_admin;
 
 -- Worker can execute ingestion and job management functions
+GRANT EXECUTE ON FUNCTION resolve_municipality(text, text, text) TO zone_worker;
 GRANT EXECUTE ON FUNCTION admin_ingest_zone(text, text, text, text, text, text, jsonb) TO zone_worker;
 GRANT EXECUTE ON FUNCTION get_standard_value(jsonb, text) TO zone_worker;
 GRANT EXECUTE ON FUNCTION update_ingestion_job(integer, text, text) TO zone_worker;
 GRANT EXECUTE ON FUNCTION get_pending_jobs() TO zone_worker;
+GRANT EXECUTE ON FUNCTION claim_jobs(text, integer, integer, integer, integer, integer) TO zone_worker;
+GRANT EXECUTE ON FUNCTION extend_job_leases(text, integer[], integer) TO zone_worker;
+GRANT EXECUTE ON FUNCTION split_job(integer, jsonb, text) TO zone_worker;
+GRANT EXECUTE ON FUNCTION finish_child_job(integer, text, text) TO zone_worker;
 
 -- Grant table permissions to roles
+GRANT SELECT ON municipalities TO zone_reader;
 GRANT SELECT ON zones TO zone_reader;
 GRANT SELECT ON standards TO zone_reader;
+GRANT SELECT ON zone_districts TO zone_reader;
+GRANT SELECT ON zone_suggestions TO zone_reader;
 
+GRANT ALL ON municipalities TO zone_admin;
 GRANT ALL ON zones TO zone_admin;
 GRANT ALL ON standards TO zone_admin;
 GRANT ALL ON ingestion_jobs TO zone_admin;
+GRANT ALL ON raw_extractions, raw_extraction_blobs TO zone_admin;
+GRANT ALL ON header_aliases TO zone_admin;
+GRANT ALL ON job_profiles TO zone_admin;
+GRANT ALL ON zone_districts TO zone_admin;
+GRANT ALL ON zone_suggestions TO zone_admin;
 
+GRANT SELECT ON municipalities TO zone_worker;
 GRANT SELECT, INSERT, UPDATE ON zones TO zone_worker;
 GRANT SELECT, INSERT, UPDATE, DELETE ON standards TO zone_worker;
 GRANT SELECT, UPDATE ON ingestion_jobs TO zone_worker;
+GRANT SELECT, INSERT ON raw_extractions, raw_extraction_blobs TO zone_worker;
+GRANT SELECT, INSERT ON header_aliases TO zone_worker;
+GRANT SELECT, INSERT ON job_profiles TO zone_worker;
+GRANT SELECT, INSERT, UPDATE, DELETE ON zone_suggestions TO zone_worker;
 
 -- =============================================================================
 -- HELPER POLICIES FOR ANONYMOUS ACCESS
@@ -183,7 +353,8 @@ CREATE POLICY "Anonymous read published standards" ON standards
     USING (
         EXISTS (
             SELECT 1 FROM zones z 
-            WHERE z.id = standards.zone_id 
+            WHERE z.municipality_id = standards.municipality_id
+            AND z.id = standards.zone_id 
             AND z.published = true 
             AND z.is_current = true
         )
@@ -211,7 +382,8 @@ CREATE POLICY "Authenticated read published standards" ON standards
     USING (
         EXISTS (
             SELECT 1 FROM zones z 
-            WHERE z.id = standards.zone_id 
+            WHERE z.municipality_id = standards.municipality_id
+            AND z.id = standards.zone_id 
             AND z.published = true 
             AND z.is_current = true
         )
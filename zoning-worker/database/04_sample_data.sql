@@ -7,6 +7,12 @@ INSERT INTO ingestion_jobs (source_url, state_code, county, municipality, status
 ('https://example.com/middletown-zoning.pdf', 'NJ', 'Monmouth County', 'Middletown', 'DONE', 'Ingested 25/25 zones (failed: 0); best_conf=0.75'),
 ('https://example.com/toms-river-zoning.pdf', 'NJ', 'Ocean County', 'Toms River', 'PENDING', NULL);
 
+-- Insert sample municipalities (zones and standards are partitioned by municipality_id)
+INSERT INTO municipalities (id, state_code, county, name) VALUES
+(1, 'NJ', 'Ocean County', 'Brick Township'),
+(2, 'NJ', 'Monmouth County', 'Middletown');
+SELECT setval('municipalities_id_seq', 2);
+
 -- Insert sample zones
 INSERT INTO zones (state_code, county, municipality, zone_code, zone_name, ordinance_url, zone_key, municipality_id) VALUES
 ('NJ', 'Ocean County', 'Brick Township', 'R-R', 'Rural Residential', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-R', 1),
@@ -24,7 +30,7 @@ INSERT INTO zones (state_code, county, municipality, zone_code, zone_name, ordin
 
 -- Insert sample standards for Brick Township zones
 INSERT INTO standards (
-    zone_id, zone_code, all_standards,
+    municipality_id, zone_id, zone_code, all_standards,
     area_sqft_interior_lots, frontage_interior_lots, area_sqft_corner_lots, frontage_feet_corner_lots,
     depth_interior_lots_ft, depth_corner_lots_ft,
     front_yard_principal_building, side_yard_principal_building, rear_yard_principal_building,
@@ -33,7 +39,8 @@ INSERT INTO standards (
 ) VALUES
 -- R-R Zone
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-R' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-R' AND municipality_id = 1),
     'R-R',
     '[
         {"key": "area_interior_lots", "value_numeric": 87120, "units": "sq ft"},
@@ -51,7 +58,8 @@ INSERT INTO standards (
 ),
 -- R-20 Zone
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-20' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-20' AND municipality_id = 1),
     'R-20',
     '[
         {"key": "area_interior_lots", "value_numeric": 20000, "units": "sq ft"},
@@ -69,7 +77,8 @@ INSERT INTO standards (
 ),
 -- R-15 Zone
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality_id = 1),
     'R-15',
     '[
         {"key": "area_interior_lots", "value_numeric": 15000, "units": "sq ft"},
@@ -85,7 +94,8 @@ INSERT INTO standards (
 ),
 -- B-1 Zone
 (
-    (SELECT id FROM zones WHERE zone_code = 'B-1' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'B-1' AND municipality_id = 1),
     'B-1',
     '[
         {"key": "area_interior_lots", "value_numeric": 10000, "units": "sq ft"},
@@ -102,7 +112,7 @@ INSERT INTO standards (
 
 -- Insert sample standards for Middletown zones
 INSERT INTO standards (
-    zone_id, zone_code, all_standards,
+    municipality_id, zone_id, zone_code, all_standards,
     area_sqft_interior_lots, frontage_interior_lots,
     depth_interior_lots_ft, depth_corner_lots_ft,
     front_yard_principal_building, side_yard_principal_building, rear_yard_principal_building,
@@ -110,7 +120,8 @@ INSERT INTO standards (
 ) VALUES
 -- Middletown R-15
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality = 'Middletown'),
+    2,
+    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality_id = 2),
     'R-15',
     '[
         {"key": "area_interior_lots", "value_numeric": 15000, "units": "sq ft"},
@@ -126,7 +137,8 @@ INSERT INTO standards (
 ),
 -- Middletown B-1
 (
-    (SELECT id FROM zones WHERE zone_code = 'B-1' AND municipality = 'Middletown'),
+    2,
+    (SELECT id FROM zones WHERE zone_code = 'B-1' AND municipality_id = 2),
     'B-1',
     '[
         {"key": "area_interior_lots", "value_numeric": 8000, "units": "sq ft"},
@@ -144,14 +156,15 @@ INSERT INTO zones (state_code, county, municipality, zone_code, zone_name, ordin
 ('NJ', 'Ocean County', 'Brick Township', 'R-TEST', 'Test Residential Zone', 'https://example.com/test-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-TEST', 1);
 
 INSERT INTO standards (
-    zone_id, zone_code, all_standards,
+    municipality_id, zone_id, zone_code, all_standards,
     area_sqft_interior_lots, frontage_interior_lots,
     depth_interior_lots_ft, depth_corner_lots_ft,
     front_yard_principal_building, side_yard_principal_building, rear_yard_principal_building,
     max_building_coverage_percent
 ) VALUES
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-TEST' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-TEST' AND municipality_id = 1),
     'R-TEST',
     '[
         {"key": "area_interior_lots", "value_numeric": 40000, "units": "sq ft"},
@@ -5,10 +5,19 @@
 -- STEP 1: CREATE SCHEMA AND TABLES
 -- =============================================================================
 
+CREATE EXTENSION IF NOT EXISTS postgis;
+
 -- Drop existing tables if they exist (for clean setup)
+DROP TABLE IF EXISTS zone_suggestions CASCADE;
+DROP TABLE IF EXISTS zone_districts CASCADE;
+DROP TABLE IF EXISTS job_profiles CASCADE;
+DROP TABLE IF EXISTS header_aliases CASCADE;
+DROP TABLE IF EXISTS raw_extractions CASCADE;
+DROP TABLE IF EXISTS raw_extraction_blobs CASCADE;
 DROP TABLE IF EXISTS standards CASCADE;
 DROP TABLE IF EXISTS zones CASCADE;
 DROP TABLE IF EXISTS ingestion_jobs CASCADE;
+DROP TABLE IF EXISTS municipalities CASCADE;
 
 -- Create ingestion_jobs table
 CREATE TABLE ingestion_jobs (
@@ -18,19 +27,91 @@ CREATE TABLE ingestion_jobs (
     county TEXT NOT NULL,
     municipality TEXT NOT NULL,
     pdf_storage_path TEXT,
-    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PROCESSING', 'DONE', 'FAILED')),
+    status TEXT NOT NULL DEFAULT 'PENDING' CHECK (status IN ('PENDING', 'PROCESSING', 'WAITING', 'DONE', 'PARTIAL_SUCCESS', 'NEEDS_REVIEW', 'FAILED')),
     message TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    source_host TEXT GENERATED ALWAYS AS (LOWER(SUBSTRING(source_url FROM '^[A-Za-z]+://([^/:?#]+)'))) STORED,
+    content_hash TEXT,
+    coalesced_into INTEGER REFERENCES ingestion_jobs(id),
+    stage TEXT,
+    checkpoint JSONB,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    profile BOOLEAN NOT NULL DEFAULT FALSE,
+    worker_id TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    parent_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+    page_start INTEGER,
+    page_end INTEGER,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Create raw extraction tables (compressed, content-addressed payloads)
+CREATE TABLE raw_extraction_blobs (
+    content_hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL CHECK (codec IN ('zstd', 'zlib')),
+    payload BYTEA NOT NULL,
+    raw_bytes INTEGER NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE raw_extractions (
+    id SERIAL PRIMARY KEY,
+    job_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+    content_hash TEXT NOT NULL REFERENCES raw_extraction_blobs(content_hash),
+    confidence NUMERIC,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create job_profiles table (opt-in profiles of job runs)
+CREATE TABLE job_profiles (
+    id SERIAL PRIMARY KEY,
+    job_id INTEGER REFERENCES ingestion_jobs(id) ON DELETE CASCADE,
+    attempt INTEGER,
+    wall_seconds NUMERIC,
+    samples INTEGER,
+    error TEXT,
+    codec TEXT NOT NULL CHECK (codec IN ('zstd', 'zlib')),
+    pstats BYTEA NOT NULL,
+    collapsed BYTEA NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create header_aliases table (learned header resolutions)
+CREATE TABLE header_aliases (
+    id SERIAL PRIMARY KEY,
+    scope TEXT NOT NULL CHECK (scope IN ('municipality', 'state', 'global')),
+    scope_key TEXT NOT NULL DEFAULT '',
+    header_norm TEXT NOT NULL,
+    canonical_key TEXT,
+    score NUMERIC,
+    status TEXT NOT NULL DEFAULT 'LEARNED' CHECK (status IN ('LEARNED', 'APPROVED', 'REJECTED')),
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT header_aliases_unique UNIQUE (scope, scope_key, header_norm)
+);
+
+-- Create municipalities table
+CREATE TABLE municipalities (
+    id SERIAL PRIMARY KEY,
+    state_code VARCHAR(2) NOT NULL,
+    county TEXT NOT NULL DEFAULT '',
+    name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT municipalities_unique UNIQUE (state_code, county, name)
+);
+
+-- zones and standards are hash-partitioned by municipality_id; partitions live
+-- in a schema PostgREST does not expose
+CREATE SCHEMA IF NOT EXISTS zone_partitions;
+
 -- Create zones table
 CREATE TABLE zones (
-    id SERIAL PRIMARY KEY,
-    municipality_id INTEGER DEFAULT 1,
+    id SERIAL,
+    municipality_id INTEGER NOT NULL REFERENCES municipalities(id),
     zone_code TEXT NOT NULL,
     zone_name TEXT,
-    zone_key TEXT UNIQUE,
+    zone_key TEXT,
     ordinance_url TEXT,
     effective_date DATE DEFAULT CURRENT_DATE,
     last_verified_at DATE DEFAULT CURRENT_DATE,
@@ -39,13 +120,16 @@ CREATE TABLE zones (
     state_code VARCHAR(2) NOT NULL,
     county TEXT,
     municipality TEXT NOT NULL,
-    CONSTRAINT zones_unique_location UNIQUE (state_code, county, municipality, zone_code)
-);
+    PRIMARY KEY (municipality_id, id),
+    CONSTRAINT zones_unique_zone UNIQUE (municipality_id, zone_code),
+    CONSTRAINT zones_unique_key UNIQUE (municipality_id, zone_key)
+) PARTITION BY HASH (municipality_id);
 
 -- Create standards table
 CREATE TABLE standards (
-    id SERIAL PRIMARY KEY,
-    zone_id INTEGER NOT NULL REFERENCES zones(id) ON DELETE CASCADE,
+    id SERIAL,
+    municipality_id INTEGER NOT NULL,
+    zone_id INTEGER NOT NULL,
     all_standards JSONB,
     area_sqft_interior_lots NUMERIC,
     frontage_interior_lots NUMERIC,
@@ -76,7 +160,44 @@ CREATE TABLE standards (
     zone_code TEXT,
     key TEXT,
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (municipality_id, id),
+    FOREIGN KEY (municipality_id, zone_id) REFERENCES zones(municipality_id, id) ON DELETE CASCADE
+) PARTITION BY HASH (municipality_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format('CREATE TABLE zone_partitions.zones_p%s PARTITION OF zones FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i);
+        EXECUTE format('CREATE TABLE zone_partitions.standards_p%s PARTITION OF standards FOR VALUES WITH (MODULUS 16, REMAINDER %s)', i, i);
+    END LOOP;
+END $$;
+
+-- Create zone_districts table (zoning district polygons, linked by zone_key)
+CREATE TABLE zone_districts (
+    id SERIAL PRIMARY KEY,
+    zone_key TEXT NOT NULL,
+    state_code VARCHAR(2) NOT NULL,
+    municipality TEXT NOT NULL,
+    zone_code TEXT NOT NULL,
+    source TEXT,
+    properties JSONB,
+    geom geometry(MultiPolygon, 4326) NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Create zone_suggestions table (typeahead terms, rebuilt per municipality on ingest)
+CREATE TABLE zone_suggestions (
+    id SERIAL PRIMARY KEY,
+    term TEXT NOT NULL,
+    kind TEXT NOT NULL CHECK (kind IN ('zone', 'municipality', 'county')),
+    label TEXT NOT NULL,
+    value TEXT NOT NULL,
+    state_code VARCHAR(2) NOT NULL,
+    county TEXT NOT NULL DEFAULT '',
+    municipality TEXT NOT NULL DEFAULT '',
+    weight INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT zone_suggestions_unique UNIQUE (kind, term, value)
 );
 
 -- Create indexes
@@ -85,11 +206,27 @@ CREATE INDEX idx_zones_zone_code ON zones(zone_code);
 CREATE INDEX idx_zones_municipality ON zones(municipality);
 CREATE INDEX idx_zones_county ON zones(county);
 CREATE INDEX idx_zones_zone_key ON zones(zone_key);
-CREATE INDEX idx_standards_zone_id ON standards(zone_id);
+CREATE INDEX idx_standards_zone_id ON standards(municipality_id, zone_id);
 CREATE INDEX idx_standards_zone_code ON standards(zone_code);
 CREATE INDEX idx_standards_all_standards ON standards USING GIN(all_standards);
 CREATE INDEX idx_ingestion_jobs_status ON ingestion_jobs(status);
 CREATE INDEX idx_ingestion_jobs_municipality ON ingestion_jobs(municipality, state_code);
+CREATE INDEX idx_ingestion_jobs_pending ON ingestion_jobs(priority DESC, created_at) WHERE status = 'PENDING';
+CREATE INDEX idx_ingestion_jobs_leases ON ingestion_jobs(lease_expires_at) WHERE status = 'PROCESSING';
+CREATE INDEX idx_ingestion_jobs_host_status ON ingestion_jobs(source_host, status);
+CREATE INDEX idx_ingestion_jobs_source_url ON ingestion_jobs(source_url);
+CREATE INDEX idx_ingestion_jobs_content_hash ON ingestion_jobs(content_hash);
+CREATE INDEX idx_ingestion_jobs_coalesced_into ON ingestion_jobs(coalesced_into);
+CREATE INDEX idx_ingestion_jobs_parent ON ingestion_jobs(parent_id, status) WHERE parent_id IS NOT NULL;
+CREATE INDEX idx_raw_extractions_job_id ON raw_extractions(job_id);
+CREATE INDEX idx_raw_extractions_content_hash ON raw_extractions(content_hash);
+CREATE INDEX idx_job_profiles_job_id ON job_profiles(job_id);
+CREATE INDEX idx_header_aliases_scope_key ON header_aliases(scope_key);
+CREATE INDEX idx_zone_districts_geom ON zone_districts USING GIST(geom);
+CREATE INDEX idx_zone_districts_zone_key ON zone_districts(zone_key);
+CREATE INDEX idx_zone_districts_municipality ON zone_districts(state_code, municipality);
+CREATE INDEX idx_zone_suggestions_term ON zone_suggestions(term text_pattern_ops);
+CREATE INDEX idx_zone_suggestions_municipality ON zone_suggestions(state_code, municipality);
 
 -- =============================================================================
 -- STEP 2: CREATE FUNCTIONS
@@ -163,7 +300,7 @@ BEGIN
         s.maximum_density,
         s.maximum_far
     FROM zones z
-    LEFT JOIN standards s ON z.id = s.zone_id
+    LEFT JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id
     WHERE 
         z.is_current = true
         AND z.published = true
@@ -182,6 +319,34 @@ END;
 $$;
 
 -- Admin ingestion function for worker
+CREATE OR REPLACE FUNCTION resolve_municipality(
+    p_state_code text,
+    p_county text,
+    p_name text
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_id integer;
+BEGIN
+    SELECT id INTO v_id FROM municipalities
+    WHERE state_code = UPPER(p_state_code)
+    AND county = COALESCE(p_county, '')
+    AND name = p_name;
+    
+    IF v_id IS NULL THEN
+        INSERT INTO municipalities (state_code, county, name)
+        VALUES (UPPER(p_state_code), COALESCE(p_county, ''), p_name)
+        ON CONFLICT (state_code, county, name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING id INTO v_id;
+    END IF;
+    
+    RETURN v_id;
+END;
+$$;
+
 CREATE OR REPLACE FUNCTION admin_ingest_zone(
     p_state_code text,
     p_county text,
@@ -196,9 +361,11 @@ LANGUAGE plpgsql
 SECURITY DEFINER
 AS $$
 DECLARE
+    v_municipality_id integer;
     v_zone_id integer;
     v_zone_key text;
 BEGIN
+    v_municipality_id := resolve_municipality(p_state_code, p_county, p_municipality);
     v_zone_key := UPPER(p_state_code) || '|' || UPPER(COALESCE(p_county, '')) || '|' || UPPER(p_municipality) || '|' || UPPER(p_zone_code);
     
     INSERT INTO zones (
@@ -206,19 +373,19 @@ BEGIN
         ordinance_url, zone_key, municipality_id
     ) VALUES (
         UPPER(p_state_code), p_county, p_municipality, UPPER(p_zone_code), p_zone_name,
-        p_ordinance_url, v_zone_key, 1
+        p_ordinance_url, v_zone_key, v_municipality_id
     )
-    ON CONFLICT (zone_key) 
+    ON CONFLICT (municipality_id, zone_key) 
     DO UPDATE SET
         zone_name = EXCLUDED.zone_name,
         ordinance_url = EXCLUDED.ordinance_url,
-        updated_at = NOW()
+        last_verified_at = CURRENT_DATE
     RETURNING id INTO v_zone_id;
     
-    DELETE FROM standards WHERE zone_id = v_zone_id;
+    DELETE FROM standards WHERE municipality_id = v_municipality_id AND zone_id = v_zone_id;
     
     INSERT INTO standards (
-        zone_id, zone_code, all_standards,
+        municipality_id, zone_id, zone_code, all_standards,
         area_sqft_interior_lots, frontage_interior_lots, area_sqft_corner_lots, frontage_feet_corner_lots,
         depth_interior_lots_ft, depth_corner_lots_ft, front_yard_principal_building, side_yard_principal_building,
         street_side_yard_principal_building, rear_yard_principal_building, street_rear_yard_principal_building,
@@ -228,7 +395,7 @@ BEGIN
         total_minimum_gross_floor_area, first_floor_multistory_min_gross_floor_area, max_gross_floor_area,
         maximum_far, maximum_density
     ) VALUES (
-        v_zone_id, UPPER(p_zone_code), p_standards,
+        v_municipality_id, v_zone_id, UPPER(p_zone_code), p_standards,
         (SELECT get_standard_value(p_standards, 'area_interior_lots')),
         (SELECT get_standard_value(p_standards, 'frontage_interior_lots')),
         (SELECT get_standard_value(p_standards, 'area_corner_lots')),
@@ -260,30 +427,364 @@ BEGIN
 END;
 $$;
 
+-- Zone (and its standards) containing each point, for batch parcel lookups.
+-- p_points: [{"id": "parcel-1", "lon": -74.1, "lat": 40.05}, ...]; points outside
+-- every district come back with NULL zone columns. Where districts overlap
+-- (overlay zones) the smallest one wins.
+CREATE OR REPLACE FUNCTION zones_at_points(p_points jsonb)
+RETURNS TABLE(
+    point_id text,
+    lon double precision,
+    lat double precision,
+    zone_key text,
+    zone_code text,
+    zone_name text,
+    municipality text,
+    county text,
+    state text,
+    ordinance_url text,
+    area_sqft_interior_lots numeric,
+    frontage_interior_lots numeric,
+    area_sqft_corner_lots numeric,
+    frontage_feet_corner_lots numeric,
+    depth_interior_lots_ft numeric,
+    depth_corner_lots_ft numeric,
+    front_yard_principal_building numeric,
+    side_yard_principal_building numeric,
+    rear_yard_principal_building numeric,
+    max_building_coverage_percent numeric,
+    max_lot_coverage_percent numeric,
+    stories_max_height_principal_building numeric,
+    feet_max_height_principal_building numeric,
+    maximum_density numeric,
+    maximum_far numeric
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    SELECT
+        p.id,
+        p.lon,
+        p.lat,
+        d.zone_key,
+        d.zone_code,
+        z.zone_name,
+        d.municipality,
+        z.county,
+        d.state_code,
+        z.ordinance_url,
+        s.area_sqft_interior_lots,
+        s.frontage_interior_lots,
+        s.area_sqft_corner_lots,
+        s.frontage_feet_corner_lots,
+        s.depth_interior_lots_ft,
+        s.depth_corner_lots_ft,
+        s.front_yard_principal_building,
+        s.side_yard_principal_building,
+        s.rear_yard_principal_building,
+        s.max_building_coverage_percent,
+        s.max_lot_coverage_percent,
+        s.stories_max_height_principal_building,
+        s.feet_max_height_principal_building,
+        s.maximum_density,
+        s.maximum_far
+    FROM jsonb_to_recordset(p_points) AS p(id text, lon double precision, lat double precision)
+    LEFT JOIN LATERAL (
+        SELECT zd.zone_key, zd.zone_code, zd.municipality, zd.state_code
+        FROM zone_districts zd
+        WHERE ST_Intersects(zd.geom, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326))
+        ORDER BY ST_Area(zd.geom)
+        LIMIT 1
+    ) d ON true
+    LEFT JOIN zones z ON z.zone_key = d.zone_key AND z.is_current = true AND z.published = true
+    LEFT JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id;
+$$;
+
+-- Typeahead: suggestions whose term starts with the normalized prefix, exact
+-- terms first, then by weight. The range test on term (rather than LIKE)
+-- lets the text_pattern_ops index serve a parameterized prefix; terms are only
+-- [a-z0-9], so appending '{' (the byte after 'z') gives the upper bound.
+CREATE OR REPLACE FUNCTION suggest_zones(p_prefix text, p_limit integer DEFAULT 10)
+RETURNS TABLE(
+    kind text,
+    label text,
+    value text,
+    state text,
+    county text,
+    municipality text
+)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+AS $$
+    WITH q AS (
+        SELECT lower(regexp_replace(coalesce(p_prefix, ''), '[^A-Za-z0-9]', '', 'g')) AS term
+    )
+    SELECT m.kind, m.label, m.value, m.state_code, NULLIF(m.county, ''), NULLIF(m.municipality, '')
+    FROM (
+        -- one row per suggestion even when several of its terms match
+        SELECT DISTINCT ON (s.value) s.*, s.term = q.term AS exact
+        FROM zone_suggestions s, q
+        WHERE q.term <> ''
+          AND s.term ~>=~ q.term
+          AND s.term ~<~ (q.term || '{')
+        ORDER BY s.value, s.term = q.term DESC
+    ) m
+    ORDER BY m.exact DESC, m.weight DESC, length(m.label), m.label
+    LIMIT LEAST(GREATEST(p_limit, 1), 50);
+$$;
+
+-- Claim the next jobs to run (priority plus aging, capped per source host) under a lease
+CREATE OR REPLACE FUNCTION claim_jobs(
+    p_worker_id text,
+    p_limit integer DEFAULT 1,
+    p_lease_seconds integer DEFAULT 300,
+    p_aging_seconds integer DEFAULT 600,
+    p_max_per_host integer DEFAULT 2,
+    p_max_attempts integer DEFAULT 3
+)
+RETURNS SETOF ingestion_jobs
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+AS $$
+    -- Reclaim jobs whose worker stopped renewing its lease (rows without a lease
+    -- count as expired once they have not been touched for p_lease_seconds).
+    -- Coalesced followers hold no lease: they finish with their leader.
+    WITH expired AS (
+        SELECT id, attempts
+        FROM ingestion_jobs
+        WHERE status = 'PROCESSING'
+          AND coalesced_into IS NULL
+          AND (lease_expires_at < NOW()
+               OR (lease_expires_at IS NULL AND updated_at < NOW() - make_interval(secs => p_lease_seconds)))
+        FOR UPDATE SKIP LOCKED
+    ),
+    reset AS (
+        UPDATE ingestion_jobs j
+        SET status = CASE WHEN e.attempts >= p_max_attempts THEN 'FAILED' ELSE 'PENDING' END,
+            message = 'Lease expired on worker ' || COALESCE(j.worker_id, '?') || ' (attempt ' || e.attempts || ')',
+            worker_id = NULL,
+            lease_expires_at = NULL,
+            updated_at = NOW()
+        FROM expired e
+        WHERE j.id = e.id
+        RETURNING j.id, j.status, j.message
+    )
+    UPDATE ingestion_jobs f
+    SET status = 'FAILED',
+        message = 'Coalesced with job ' || r.id || ': ' || r.message,
+        updated_at = NOW()
+    FROM reset r
+    WHERE r.status = 'FAILED' AND f.coalesced_into = r.id AND f.status = 'PROCESSING';
+
+    -- Split jobs whose children have all finished go back to the queue for the
+    -- merge. finish_child_job does this as the last child finishes; this catches
+    -- children that failed on an expired lease above.
+    UPDATE ingestion_jobs p
+    SET status = 'PENDING', attempts = 0, message = 'Merging page-range results', updated_at = NOW()
+    WHERE p.status = 'WAITING'
+      AND NOT EXISTS (SELECT 1 FROM ingestion_jobs c
+                      WHERE c.parent_id = p.id AND c.status IN ('PENDING', 'PROCESSING'));
+
+    -- Claim: within one priority, aging preserves age order, so the jobs with the
+    -- highest effective priority are always among the oldest few of some priority.
+    -- Candidates are the oldest GREATEST(p_limit * 10, 100) PENDING jobs of each
+    -- distinct priority, read from idx_ingestion_jobs_pending with a skip scan over
+    -- the priorities (a handful in practice). Rows another worker is claiming are
+    -- skipped, then the ranking and per-host cap below decide the batch.
+    WITH RECURSIVE levels AS (
+        (SELECT priority FROM ingestion_jobs WHERE status = 'PENDING'
+         ORDER BY priority DESC LIMIT 1)
+        UNION ALL
+        SELECT (SELECT j.priority FROM ingestion_jobs j
+                WHERE j.status = 'PENDING' AND j.priority < l.priority
+                ORDER BY j.priority DESC LIMIT 1)
+        FROM levels l
+        WHERE l.priority IS NOT NULL
+    ),
+    candidates AS (
+        SELECT c.id
+        FROM levels l
+        CROSS JOIN LATERAL (
+            SELECT id FROM ingestion_jobs j
+            WHERE j.status = 'PENDING' AND j.priority = l.priority
+            ORDER BY j.created_at LIMIT GREATEST(p_limit * 10, 100)
+        ) c
+        WHERE l.priority IS NOT NULL
+    ),
+    -- Children reading a stored copy of the document don't touch its host, so the cap skips them
+    locked AS (
+        SELECT j.id, j.source_host, j.created_at, j.pdf_storage_path IS NOT NULL AS stored,
+               j.priority + EXTRACT(EPOCH FROM (NOW() - j.created_at)) / GREATEST(p_aging_seconds, 1) AS effective_priority
+        FROM ingestion_jobs j
+        WHERE j.id IN (SELECT id FROM candidates) AND j.status = 'PENDING'
+        FOR UPDATE SKIP LOCKED
+    ),
+    -- Coalesced followers wait on their leader without downloading, so they don't count either
+    busy AS (
+        SELECT source_host, COUNT(*) AS running
+        FROM ingestion_jobs
+        WHERE status = 'PROCESSING' AND pdf_storage_path IS NULL AND coalesced_into IS NULL
+        GROUP BY source_host
+    ),
+    ranked AS (
+        SELECT
+            l.id,
+            l.effective_priority,
+            l.created_at,
+            l.stored,
+            COALESCE(b.running, 0) + ROW_NUMBER() OVER (
+                PARTITION BY l.source_host, l.stored ORDER BY l.effective_priority DESC, l.created_at
+            ) AS host_load
+        FROM locked l
+        LEFT JOIN busy b ON b.source_host IS NOT DISTINCT FROM l.source_host
+    ),
+    picked AS (
+        SELECT id
+        FROM ranked
+        WHERE stored OR host_load <= p_max_per_host
+        ORDER BY effective_priority DESC, created_at
+        LIMIT p_limit
+    )
+    UPDATE ingestion_jobs j
+    SET status = 'PROCESSING',
+        worker_id = p_worker_id,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    FROM picked
+    WHERE j.id = picked.id
+    RETURNING j.*;
+$$;
+
+-- Heartbeat: push out the leases a worker still holds; returns the ids it still owns
+CREATE OR REPLACE FUNCTION extend_job_leases(
+    p_worker_id text,
+    p_job_ids integer[],
+    p_lease_seconds integer DEFAULT 300
+)
+RETURNS SETOF integer
+LANGUAGE sql
+VOLATILE
+SECURITY DEFINER
+AS $$
+    UPDATE ingestion_jobs
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds)
+    WHERE id = ANY(p_job_ids)
+      AND worker_id = p_worker_id
+      AND status = 'PROCESSING'
+      AND lease_expires_at IS NOT NULL
+    RETURNING id;
+$$;
+
+-- Fan a job out into page-range children that any worker can claim. The parent
+-- waits (status WAITING, no lease) until its last child finishes; it then goes
+-- back to PENDING for the merge step. Idempotent: a retried split keeps the
+-- children it already created. p_ranges is [[first_page, last_page], ...];
+-- p_storage_path is where the children download the document from.
+CREATE OR REPLACE FUNCTION split_job(
+    p_job_id integer,
+    p_ranges jsonb,
+    p_storage_path text DEFAULT NULL
+)
+RETURNS integer
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_children integer;
+BEGIN
+    PERFORM 1 FROM ingestion_jobs WHERE id = p_job_id FOR UPDATE;
+    SELECT COUNT(*) INTO v_children FROM ingestion_jobs WHERE parent_id = p_job_id;
+    IF v_children = 0 THEN
+        INSERT INTO ingestion_jobs (source_url, state_code, county, municipality, pdf_storage_path, priority,
+                                    content_hash, profile, parent_id, page_start, page_end, message)
+        SELECT j.source_url, j.state_code, j.county, j.municipality, p_storage_path, j.priority,
+               j.content_hash, j.profile, j.id, (r->>0)::integer, (r->>1)::integer,
+               'Pages ' || (r->>0) || '-' || (r->>1) || ' of job ' || j.id
+        FROM ingestion_jobs j, jsonb_array_elements(p_ranges) r
+        WHERE j.id = p_job_id;
+        GET DIAGNOSTICS v_children = ROW_COUNT;
+    END IF;
+    UPDATE ingestion_jobs
+    SET status = 'WAITING',
+        stage = 'SPLIT',
+        checkpoint = NULL,
+        worker_id = NULL,
+        lease_expires_at = NULL,
+        message = 'Split into ' || v_children || ' page-range jobs',
+        updated_at = NOW()
+    WHERE id = p_job_id;
+    RETURN v_children;
+END;
+$$;
+
+-- Final status for a page-range child. Siblings finish one at a time under the
+-- parent's row lock, so exactly one of them sees that none are left running and
+-- requeues the parent for its merge (with fresh attempts). Returns true for that one.
+CREATE OR REPLACE FUNCTION finish_child_job(
+    p_job_id integer,
+    p_status text,
+    p_message text DEFAULT NULL
+)
+RETURNS boolean
+LANGUAGE plpgsql
+VOLATILE
+SECURITY DEFINER
+AS $$
+DECLARE
+    v_parent integer;
+BEGIN
+    SELECT parent_id INTO v_parent FROM ingestion_jobs WHERE id = p_job_id;
+    PERFORM 1 FROM ingestion_jobs WHERE id = v_parent FOR UPDATE;
+    UPDATE ingestion_jobs
+    SET status = p_status, message = p_message, lease_expires_at = NULL, updated_at = NOW()
+    WHERE id = p_job_id;
+    UPDATE ingestion_jobs p
+    SET status = 'PENDING', attempts = 0, message = 'Merging page-range results', updated_at = NOW()
+    WHERE p.id = v_parent
+      AND p.status = 'WAITING'
+      AND NOT EXISTS (SELECT 1 FROM ingestion_jobs c
+                      WHERE c.parent_id = v_parent AND c.status IN ('PENDING', 'PROCESSING'));
+    RETURN FOUND;
+END;
+$$;
+
+
 -- =============================================================================
 -- STEP 3: ENABLE ROW LEVEL SECURITY
 -- =============================================================================
 
+ALTER TABLE municipalities ENABLE ROW LEVEL SECURITY;
 ALTER TABLE zones ENABLE ROW LEVEL SECURITY;
 ALTER TABLE standards ENABLE ROW LEVEL SECURITY;
 ALTER TABLE ingestion_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE raw_extractions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE raw_extraction_blobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE header_aliases ENABLE ROW LEVEL SECURITY;
+ALTER TABLE job_profiles ENABLE ROW LEVEL SECURITY;
+ALTER TABLE zone_districts ENABLE ROW LEVEL SECURITY;
+ALTER TABLE zone_suggestions ENABLE ROW LEVEL SECURITY;
 
--- Public read access to published zones and standards
+-- Public read access to municipalities and published zones and standards
+CREATE POLICY "Public municipalities access" ON municipalities FOR SELECT USING (true);
 CREATE POLICY "Public zones access" ON zones FOR SELECT USING (published = true AND is_current = true);
 CREATE POLICY "Public standards access" ON standards FOR SELECT USING (
-    EXISTS (SELECT 1 FROM zones z WHERE z.id = standards.zone_id AND z.published = true AND z.is_current = true)
+    EXISTS (SELECT 1 FROM zones z WHERE z.municipality_id = standards.municipality_id AND z.id = standards.zone_id AND z.published = true AND z.is_current = true)
 );
 
 -- Anonymous access (for React app)
 CREATE POLICY "Anonymous zones access" ON zones FOR SELECT TO anon USING (published = true AND is_current = true);
 CREATE POLICY "Anonymous standards access" ON standards FOR SELECT TO anon USING (
-    EXISTS (SELECT 1 FROM zones z WHERE z.id = standards.zone_id AND z.published = true AND z.is_current = true)
+    EXISTS (SELECT 1 FROM zones z WHERE z.municipality_id = standards.municipality_id AND z.id = standards.zone_id AND z.published = true AND z.is_current = true)
 );
 
 -- Authenticated user access
 CREATE POLICY "Authenticated zones access" ON zones FOR SELECT TO authenticated USING (published = true AND is_current = true);
 CREATE POLICY "Authenticated standards access" ON standards FOR SELECT TO authenticated USING (
-    EXISTS (SELECT 1 FROM zones z WHERE z.id = standards.zone_id AND z.published = true AND z.is_current = true)
+    EXISTS (SELECT 1 FROM zones z WHERE z.municipality_id = standards.municipality_id AND z.id = standards.zone_id AND z.published = true AND z.is_current = true)
 );
 
 -- =============================================================================
@@ -294,28 +795,39 @@ CREATE POLICY "Authenticated standards access" ON standards FOR SELECT TO authen
 GRANT EXECUTE ON FUNCTION search_zones(text) TO PUBLIC;
 GRANT EXECUTE ON FUNCTION search_zones(text) TO anon;
 GRANT EXECUTE ON FUNCTION search_zones(text) TO authenticated;
+GRANT EXECUTE ON FUNCTION suggest_zones(text, integer) TO PUBLIC;
+GRANT EXECUTE ON FUNCTION suggest_zones(text, integer) TO anon;
+GRANT EXECUTE ON FUNCTION suggest_zones(text, integer) TO authenticated;
 
 -- =============================================================================
 -- STEP 5: INSERT SAMPLE DATA
 -- =============================================================================
 
+-- Sample municipalities
+INSERT INTO municipalities (id, state_code, county, name) VALUES
+(1, 'NJ', 'Ocean County', 'Brick Township'),
+(2, 'NJ', 'Monmouth County', 'Middletown');
+SELECT setval('municipalities_id_seq', 2);
+
 -- Sample zones
-INSERT INTO zones (state_code, county, municipality, zone_code, zone_name, ordinance_url, zone_key) VALUES
-('NJ', 'Ocean County', 'Brick Township', 'R-20', 'Single Family Residential 20,000', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-20'),
-('NJ', 'Ocean County', 'Brick Township', 'R-15', 'Single Family Residential 15,000', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-15'),
-('NJ', 'Ocean County', 'Brick Township', 'B-1', 'Neighborhood Business', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|B-1'),
-('NJ', 'Monmouth County', 'Middletown', 'R-15', 'Residential 15,000', 'https://example.com/middletown-zoning.pdf', 'NJ|MONMOUTH COUNTY|MIDDLETOWN|R-15');
+INSERT INTO zones (municipality_id, state_code, county, municipality, zone_code, zone_name, ordinance_url, zone_key) VALUES
+(1, 'NJ', 'Ocean County', 'Brick Township', 'R-20', 'Single Family Residential 20,000', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-20'),
+(1, 'NJ', 'Ocean County', 'Brick Township', 'R-15', 'Single Family Residential 15,000', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|R-15'),
+(1, 'NJ', 'Ocean County', 'Brick Township', 'B-1', 'Neighborhood Business', 'https://example.com/brick-zoning.pdf', 'NJ|OCEAN COUNTY|BRICK TOWNSHIP|B-1'),
+(2, 'NJ', 'Monmouth County', 'Middletown', 'R-15', 'Residential 15,000', 'https://example.com/middletown-zoning.pdf', 'NJ|MONMOUTH COUNTY|MIDDLETOWN|R-15');
 
 -- Sample standards with depth measurements
-INSERT INTO standards (zone_id, zone_code, all_standards, area_sqft_interior_lots, frontage_interior_lots, depth_interior_lots_ft, depth_corner_lots_ft, max_building_coverage_percent) VALUES
+INSERT INTO standards (municipality_id, zone_id, zone_code, all_standards, area_sqft_interior_lots, frontage_interior_lots, depth_interior_lots_ft, depth_corner_lots_ft, max_building_coverage_percent) VALUES
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-20' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-20' AND municipality_id = 1),
     'R-20',
     '[{"key": "area_interior_lots", "value_numeric": 20000, "units": "sq ft"}, {"key": "depth_interior_lots", "value_numeric": 150, "units": "ft"}, {"key": "depth_corner_lots", "value_numeric": 125, "units": "ft"}]'::jsonb,
     20000, 100, 150, 125, 25
 ),
 (
-    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality = 'Brick Township'),
+    1,
+    (SELECT id FROM zones WHERE zone_code = 'R-15' AND municipality_id = 1),
     'R-15',
     '[{"key": "area_interior_lots", "value_numeric": 15000, "units": "sq ft"}, {"key": "depth_interior_lots", "value_numeric": 125, "units": "ft"}, {"key": "depth_corner_lots", "value_numeric": 110, "units": "ft"}]'::jsonb,
     15000, 85, 125, 110, 30
@@ -0,0 +1,121 @@
+import os, sys, copy
+from typing import Any, Dict, List, Optional, Tuple
+
+# Persistent header -> canonical key resolutions learned from fuzzy matching.
+# Rows live in header_aliases, keyed by the normalized header (mapping.norm) and
+# scoped to a municipality ("NJ|Brick"), a state ("NJ") or globally ("").
+# Status workflow:
+#   LEARNED  - written automatically from a high-confidence fuzzy match
+#   APPROVED - confirmed or overridden by a reviewer; never replaced by learning
+#   REJECTED - the header is left unmapped in that scope
+# Reviewed rows (APPROVED/REJECTED) in any scope outrank LEARNED rows, and a
+# header reviewed in any scope is not learned again.
+ALIAS_LEARN_THRESHOLD = float(os.getenv("ALIAS_LEARN_THRESHOLD", "0.90"))
+
+SCOPES = ("municipality", "state", "global")
+
+def scope_keys(state: str, municipality: str) -> Dict[str, str]:
+    return {
+        "municipality": f"{state.upper().strip()}|{municipality.strip()}",
+        "state": state.upper().strip(),
+        "global": "",
+    }
+
+class AliasStore:
+    def __init__(self, state: str, municipality: str, rows: List[Dict[str, Any]] = (), learning: bool = True):
+        self.keys = scope_keys(state, municipality)
+        self.learning = learning  # False: lookups only, learn() is a no-op
+        self.reviewed: Dict[str, Dict[str, Optional[str]]] = {s: {} for s in SCOPES}
+        self.learned: Dict[str, Dict[str, str]] = {s: {} for s in SCOPES}
+        self.pending: Dict[str, Tuple[str, float]] = {}
+        for r in rows:
+            if r["scope"] in self.keys and r["scope_key"] == self.keys[r["scope"]]:
+                if r["status"] == "LEARNED":
+                    self.learned[r["scope"]][r["header_norm"]] = r["canonical_key"]
+                else:
+                    self.reviewed[r["scope"]][r["header_norm"]] = None if r["status"] == "REJECTED" else r["canonical_key"]
+
+    @classmethod
+    def load(cls, state: str, municipality: str) -> "AliasStore":
+        from supa import fetch_header_aliases
+        try:
+            return cls(state, municipality, fetch_header_aliases(list(scope_keys(state, municipality).values())))
+        except Exception as e:
+            print(f"⚠️ Header alias store unavailable, using fuzzy matching only: {e}")
+            return cls(state, municipality)
+
+    def lookup(self, header_norm: str) -> Tuple[bool, Optional[str]]:
+        """(found, canonical_key); reviewed rows first, then the most specific scope."""
+        for tables in (self.reviewed, self.learned):
+            for scope in SCOPES:
+                if header_norm in tables[scope]:
+                    return True, tables[scope][header_norm]
+        return False, None
+
+    def learn(self, header_norm: str, canonical_key: str, score: float):
+        if not self.learning or score < ALIAS_LEARN_THRESHOLD or not header_norm:
+            return
+        if any(header_norm in self.reviewed[scope] for scope in SCOPES):
+            return
+        self.learned["municipality"][header_norm] = canonical_key
+        self.pending[header_norm] = (canonical_key, score)
+
+    def draft(self) -> "AliasStore":
+        """A copy that learns on its own; nothing reaches this store until adopt(draft)."""
+        d = copy.copy(self)
+        d.learned = {scope: dict(table) for scope, table in self.learned.items()}
+        d.pending = {}
+        return d
+
+    def adopt(self, draft: "AliasStore"):
+        for hn, (key, score) in draft.pending.items():
+            self.learn(hn, key, score)
+
+    def flush(self):
+        if not self.pending:
+            return
+        from supa import save_header_aliases
+        rows = [{
+            "scope": "municipality",
+            "scope_key": self.keys["municipality"],
+            "header_norm": hn,
+            "canonical_key": key,
+            "score": round(score, 3),
+            "status": "LEARNED",
+        } for hn, (key, score) in self.pending.items()]
+        try:
+            save_header_aliases(rows)
+            print(f"🧠 Learned {len(rows)} header aliases for {self.keys['municipality']}")
+            self.pending.clear()
+        except Exception as e:
+            print(f"⚠️ Failed to persist learned header aliases: {e}")
+
+USAGE = """usage:
+  python aliases.py list [LEARNED|APPROVED|REJECTED]
+  python aliases.py approve <id> [canonical_key]
+  python aliases.py reject <id>
+  python aliases.py set <municipality|state|global> <scope_key> <header> <canonical_key>"""
+
+if __name__ == "__main__":
+    from supa import list_header_aliases, review_header_alias, save_header_aliases
+    from mapping import CANON, norm
+    cmd, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("", [])
+    if cmd == "list" and len(args) <= 1:
+        for r in list_header_aliases(args[0] if args else None):
+            print(f"{r['id']:>6} {r['status']:<8} {r['scope']:<12} {r['scope_key'] or '*':<28} "
+                  f"{r['header_norm'][:48]:<48} -> {r['canonical_key']} ({r['score']})")
+    elif cmd == "approve" and len(args) in (1, 2):
+        if len(args) == 2 and args[1] not in CANON:
+            sys.exit(f"Unknown canonical key: {args[1]}")
+        review_header_alias(int(args[0]), "APPROVED", args[1] if len(args) == 2 else None)
+    elif cmd == "reject" and len(args) == 1:
+        review_header_alias(int(args[0]), "REJECTED")
+    elif cmd == "set" and len(args) == 4 and args[0] in SCOPES:
+        if args[3] not in CANON:
+            sys.exit(f"Unknown canonical key: {args[3]}")
+        save_header_aliases([{
+            "scope": args[0], "scope_key": "" if args[0] == "global" else args[1],
+            "header_norm": norm(args[2]), "canonical_key": args[3], "score": None, "status": "APPROVED",
+        }], overwrite=True)
+    else:
+        sys.exit(USAGE)
@@ -0,0 +1,239 @@
+import os, sys, json, time, argparse, resource, subprocess
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Extraction quality vs. cost, per strategy in extractors.STRATEGIES, over a
+# local golden corpus: every <name>.pdf (or saved .html/.docx ordinance) needs a
+# hand-verified <name>.expected.json
+#
+#   {"state": "NJ", "county": "Ocean", "municipality": "Brick",
+#    "zones": {"R-20": {"area_interior_lots": 20000, "front_yard_principal": [25, 30]}, ...}}
+#
+# Standard keys are the pipeline's (StandardEntry.key); areas are compared in
+# square feet, as ingested. Only keys that appear somewhere in the expected file
+# are scored, so a file may verify a subset of columns. PDF strategies run on the
+# PDFs and the html/docx readers on their own kind. Each strategy/document pair
+# runs in its own process, so peak RSS is that run's alone.
+#
+#   python benchmark.py corpus/ [--strategies lattice,pdfplumber] [--json out.json]
+#   python benchmark.py corpus/ --baseline before.json   # exit 1 if F1 dropped
+EXTRACT_CORPUS_DIR = os.getenv("EXTRACT_CORPUS_DIR", "corpus")
+# the worker's per-page escalation (extractors.progressive_tables), benchmarked
+# alongside the registered strategies
+PROGRESSIVE = "progressive"
+# relative tolerance when comparing extracted numbers to expected ones
+MATCH_TOLERANCE = 0.005
+
+Fact = Tuple[str, str, float]
+
+def _values(v: Any) -> List[float]:
+    return [float(x) for x in (v if isinstance(v, list) else [v]) if x is not None]
+
+def expected_facts(expected: Dict[str, Any]) -> Tuple[Set[str], Set[str], List[Fact]]:
+    zones = set(expected["zones"])
+    keys = {k for stds in expected["zones"].values() for k in stds}
+    facts = [(z, k, v) for z, stds in expected["zones"].items() for k, vals in stds.items() for v in _values(vals)]
+    return zones, keys, facts
+
+def predicted_facts(payloads: List[Dict[str, Any]], keys: Set[str]) -> Tuple[Set[str], List[Fact]]:
+    from models import Zone
+    from parsers import acres_to_sq_ft
+    zones, facts = set(), set()
+    for p in payloads:
+        z = Zone.from_dict(p)
+        zones.add(z.zone_code)
+        for std in z.standards:
+            v = std.number
+            if std.key not in keys or v is None:
+                continue
+            if std.units == "ac" and "area" in std.key:
+                v = acres_to_sq_ft(v)
+            facts.add((z.zone_code, std.key, round(v, 4)))
+    return zones, sorted(facts)
+
+def _close(a: float, b: float) -> bool:
+    return abs(a - b) <= MATCH_TOLERANCE * max(abs(a), abs(b), 1e-9)
+
+def score(expected: Dict[str, Any], payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    exp_zones, keys, exp = expected_facts(expected)
+    got_zones, got = predicted_facts(payloads, keys)
+    matched: Set[int] = set()
+    tp = 0
+    for z, k, v in got:
+        hit = next((i for i, (ez, ek, ev) in enumerate(exp)
+                    if i not in matched and ez == z and ek == k and _close(ev, v)), None)
+        if hit is not None:
+            matched.add(hit)
+            tp += 1
+    return {
+        "zones_expected": len(exp_zones), "zones_found": len(got_zones), "zones_correct": len(exp_zones & got_zones),
+        "facts_expected": len(exp), "facts_found": len(got), "facts_correct": tp,
+    }
+
+def _ratio(a: int, b: int) -> float:
+    return round(a / b, 4) if b else 0.0
+
+def _f1(p: float, r: float) -> float:
+    return round(2 * p * r / (p + r), 4) if p + r else 0.0
+
+def with_rates(counts: Dict[str, Any]) -> Dict[str, Any]:
+    out = dict(counts)
+    out["zone_precision"] = _ratio(counts["zones_correct"], counts["zones_found"])
+    out["zone_recall"] = _ratio(counts["zones_correct"], counts["zones_expected"])
+    out["precision"] = _ratio(counts["facts_correct"], counts["facts_found"])
+    out["recall"] = _ratio(counts["facts_correct"], counts["facts_expected"])
+    out["f1"] = _f1(out["precision"], out["recall"])
+    return out
+
+def run_one(strategy: str, doc_path: str, expected_path: str) -> Dict[str, Any]:
+    """Extract, map and score one document in this process (the child side)."""
+    from extractors import STRATEGIES
+    from pipeline import dataframe_to_payloads, consolidate
+    from aliases import AliasStore
+    with open(expected_path) as f:
+        expected = json.load(f)
+    ctx = {"state": expected["state"], "county": expected.get("county"), "municipality": expected["municipality"],
+           "ordinance_url": None}
+    # fuzzy matching only: no stored aliases, and none learned during the run, so
+    # later tables aren't mapped with aliases picked up from earlier ones
+    ctx["aliases"] = AliasStore(ctx["state"], ctx["municipality"], learning=False)
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    groups: Dict[str, Any] = {}
+    tables, error = 0, None
+    if strategy == PROGRESSIVE:
+        from extractors import progressive_tables
+        from pipeline import page_scorer
+        items = progressive_tables(doc_path, page_scorer(ctx), float(os.getenv("CONFIDENCE_THRESHOLD", "0.90")))
+    else:
+        items = STRATEGIES[strategy](doc_path)
+    try:
+        for _, df, *mapped in items:
+            tables += 1
+            consolidate(mapped[0] if mapped else dataframe_to_payloads(df, ctx), groups)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    wall = time.perf_counter() - wall0
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)  # ghostscript
+    cpu = time.process_time() - cpu0 + children.ru_utime + children.ru_stime
+    rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, children.ru_maxrss)
+    return {
+        "tables": tables, "error": error, "wall_s": round(wall, 3), "cpu_s": round(cpu, 3),
+        "peak_rss_mb": round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1),
+        **score(expected, [z.to_dict() for z in groups.values()]),
+    }
+
+def run_isolated(strategy: str, doc_path: str, expected_path: str, timeout: float) -> Dict[str, Any]:
+    cmd = [sys.executable, os.path.abspath(__file__), "--_child", strategy, doc_path, expected_path]
+    try:
+        r = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout,
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+        return json.loads(r.stdout.strip().splitlines()[-1])
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout:.0f}s"}
+    except (IndexError, ValueError):
+        return {"error": (r.stderr.strip().splitlines() or ["no output"])[-1]}
+
+DOC_EXTENSIONS = {".pdf": "pdf", ".html": "html", ".htm": "html", ".docx": "docx"}
+
+def corpus(directory: str) -> List[Tuple[str, str, str, str]]:
+    docs = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        kind = DOC_EXTENSIONS.get(ext.lower())
+        if kind:
+            expected = os.path.join(directory, stem + ".expected.json")
+            if os.path.exists(expected):
+                docs.append((stem, os.path.join(directory, name), expected, kind))
+            else:
+                print(f"⚠️ Skipping {name}: no {stem}.expected.json")
+    return docs
+
+def applies(strategy: str, kind: str) -> bool:
+    return strategy == kind if strategy in ("html", "docx") else kind == "pdf"
+
+def known_strategies() -> List[str]:
+    from extractors import STRATEGIES
+    return list(STRATEGIES) + [PROGRESSIVE]
+
+COUNTS = ("zones_expected", "zones_found", "zones_correct", "facts_expected", "facts_found", "facts_correct")
+
+def run(directory: str, strategies: List[str], timeout: float) -> Dict[str, Any]:
+    docs = corpus(directory)
+    if not docs:
+        sys.exit(f"No documents with expected results in {directory}")
+    per_doc: Dict[str, Dict[str, Any]] = {}
+    summary: Dict[str, Any] = {}
+    for s in strategies:
+        totals = {c: 0 for c in COUNTS}
+        wall = cpu = rss = 0.0
+        errors = 0
+        mine = [d for d in docs if applies(s, d[3])]
+        if not mine: continue
+        for stem, path, expected, _ in mine:
+            r = run_isolated(s, path, expected, timeout)
+            if "facts_expected" not in r:
+                # the child died; count the document as fully missed
+                with open(expected) as f:
+                    exp_zones, _, exp = expected_facts(json.load(f))
+                r.update(zones_expected=len(exp_zones), zones_found=0, zones_correct=0,
+                         facts_expected=len(exp), facts_found=0, facts_correct=0)
+            r = with_rates(r)
+            per_doc.setdefault(stem, {})[s] = r
+            for c in COUNTS: totals[c] += r[c]
+            wall += r.get("wall_s") or 0.0
+            cpu += r.get("cpu_s") or 0.0
+            rss = max(rss, r.get("peak_rss_mb") or 0.0)
+            errors += bool(r.get("error"))
+            print(f"   {s:<12} {stem:<32} P={r['precision']:.2f} R={r['recall']:.2f} "
+                  f"{r.get('wall_s') or 0:>7.2f}s {r.get('peak_rss_mb') or 0:>7.1f} MB  {r.get('error') or ''}")
+        summary[s] = {**with_rates(totals), "wall_s": round(wall, 3), "cpu_s": round(cpu, 3),
+                      "peak_rss_mb": rss, "errors": errors,
+                      "f1_per_cpu_s": round(with_rates(totals)["f1"] / cpu, 4) if cpu else 0.0}
+    return {"corpus": os.path.abspath(directory), "documents": len(docs), "strategies": summary, "per_document": per_doc}
+
+def report(result: Dict[str, Any]):
+    print(f"\n📊 {result['documents']} documents from {result['corpus']}")
+    print(f"   {'strategy':<12}{'zone P':>8}{'zone R':>8}{'P':>7}{'R':>7}{'F1':>7}{'wall s':>9}{'cpu s':>9}{'RSS MB':>9}{'errors':>8}")
+    for s, r in result["strategies"].items():
+        print(f"   {s:<12}{r['zone_precision']:>8.2f}{r['zone_recall']:>8.2f}{r['precision']:>7.2f}{r['recall']:>7.2f}"
+              f"{r['f1']:>7.2f}{r['wall_s']:>9.2f}{r['cpu_s']:>9.2f}{r['peak_rss_mb']:>9.1f}{r['errors']:>8}")
+
+def regressions(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    out = []
+    for s, r in result["strategies"].items():
+        old: Optional[Dict[str, Any]] = baseline.get("strategies", {}).get(s)
+        if old and r["f1"] < old["f1"] - tolerance:
+            out.append(f"{s}: F1 {old['f1']:.3f} -> {r['f1']:.3f}")
+    return out
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--_child":
+        print(json.dumps(run_one(*sys.argv[2:5])))
+        return
+    names = known_strategies()
+    ap = argparse.ArgumentParser(description="Compare extraction strategies on a golden ordinance corpus")
+    ap.add_argument("corpus", nargs="?", default=EXTRACT_CORPUS_DIR)
+    ap.add_argument("--strategies", default=",".join(names), help=f"comma-separated, from {', '.join(names)}")
+    ap.add_argument("--timeout", type=float, default=900, help="seconds per document and strategy")
+    ap.add_argument("--json", help="also write the results to this file")
+    ap.add_argument("--baseline", help="results JSON from an earlier run; exit 1 if any strategy's F1 dropped")
+    ap.add_argument("--tolerance", type=float, default=0.01, help="F1 drop allowed against --baseline")
+    args = ap.parse_args()
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in names]
+    if unknown:
+        sys.exit(f"Unknown strategies: {', '.join(unknown)} (have {', '.join(names)})")
+    result = run(args.corpus, strategies, args.timeout)
+    report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            dropped = regressions(result, json.load(f), args.tolerance)
+        for line in dropped:
+            print(f"❌ Quality regression: {line}")
+        if dropped:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
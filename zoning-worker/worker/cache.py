@@ -0,0 +1,79 @@
+import time, threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+class _Flight:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class ResultCache:
+    """Thread-safe TTL + LRU cache with single-flight loading.
+
+    Concurrent misses for the same key share one loader call. Entries carry
+    tags (e.g. municipalities in the result) used for targeted invalidation;
+    a load that overlaps an invalidation is returned but not cached."""
+
+    def __init__(self, maxsize: int = 2048, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, frozenset]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = self.misses = self.coalesced = 0
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    tags: Callable[[Any], Iterable[Hashable]] = lambda v: ()) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            if flight:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+                leader = True
+                generation = self._generation
+        if not leader:
+            flight.event.wait()
+            if flight.error: raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if flight.error is None and generation == self._generation:
+                    self._data[key] = (time.monotonic() + self.ttl, flight.value, frozenset(tags(flight.value)))
+                    self._data.move_to_end(key)
+                    while len(self._data) > self.maxsize:
+                        self._data.popitem(last=False)
+            flight.event.set()
+        return flight.value
+
+    def invalidate(self, predicate: Callable[[Hashable, frozenset], bool]) -> int:
+        with self._lock:
+            self._generation += 1
+            dead = [k for k, (_, _, t) in self._data.items() if predicate(k, t)]
+            for k in dead:
+                del self._data[k]
+            return len(dead)
+
+    def clear(self):
+        self.invalidate(lambda k, t: True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses, "coalesced": self.coalesced}
@@ -0,0 +1,72 @@
+from __future__ import annotations
+import os, json, shutil, tempfile
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple
+from supa import update_job
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Stage outputs of process_job, so a retry resumes after the last completed stage.
+# The completed stage and small outputs (file hash, raw extraction hash, ids of
+# zones ingested so far) live on the job row; bulky outputs (downloaded file,
+# extracted tables) live under CHECKPOINT_DIR. A missing local file just means
+# that stage reruns. Checkpoints are cleared once a job reaches a final status.
+STAGES = ("DOWNLOADED", "EXTRACTED", "MAPPED")
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(tempfile.gettempdir(), "zoning-checkpoints"))
+
+class Checkpoint:
+    def __init__(self, job: Dict[str, Any]):
+        self.job_id = job["id"]
+        self.stage: Optional[str] = job.get("stage")
+        self.data: Dict[str, Any] = dict(job.get("checkpoint") or {})
+        self.dir = os.path.join(CHECKPOINT_DIR, f"job-{self.job_id}")
+
+    def reached(self, stage: str) -> bool:
+        return self.stage in STAGES and STAGES.index(self.stage) >= STAGES.index(stage)
+
+    def mark(self, stage: str, **data):
+        self.stage = stage
+        self.data.update(data)
+        update_job(self.job_id, stage=stage, checkpoint=self.data)
+
+    def record(self, **data):
+        """Progress within the current stage (e.g. zones ingested so far)."""
+        self.data.update(data)
+        update_job(self.job_id, checkpoint=self.data)
+
+    def file(self, name: str) -> str:
+        os.makedirs(self.dir, exist_ok=True)
+        return os.path.join(self.dir, name)
+
+    def downloaded(self) -> Optional[str]:
+        path = self.data.get("doc_path") or self.data.get("pdf_path")  # pdf_path: older checkpoints
+        return path if self.reached("DOWNLOADED") and path and os.path.exists(path) else None
+
+    def save_tables(self, tables: Iterable[Tuple]) -> Iterator[Tuple]:
+        """Pass (page, table, ...) items through while appending each table to the checkpoint file."""
+        with open(self.file("tables.jsonl"), "w") as f:
+            for item in tables:
+                page, df = item[:2]
+                rows = df.astype(object).where(df.notna(), None).values.tolist()
+                f.write(json.dumps({"page": page, "rows": rows}) + "\n")
+                yield item
+
+    def load_tables(self) -> Optional[Iterator[Tuple[int, pd.DataFrame]]]:
+        path = os.path.join(self.dir, "tables.jsonl")
+        if not os.path.exists(path):
+            return None
+
+        def tables():
+            import pandas as pd
+            with open(path) as f:
+                for line in f:
+                    t = json.loads(line)
+                    yield t["page"], pd.DataFrame(t["rows"])
+        return tables()
+
+    def clear_files(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def clear(self):
+        self.clear_files()
+        update_job(self.job_id, stage=None, checkpoint=None)
@@ -0,0 +1,208 @@
+import re, sys, zipfile
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+# Tables from HTML and DOCX ordinances, read straight from the markup (no page
+# rendering). Grids come out in the shape camelot gives dataframe_to_payloads:
+# a spanned cell's text sits in its first (top-left) cell with blanks in the
+# rest, and header rows are padded to the three rows coerce_headers reads.
+#
+#   python doctables.py code.html | code.docx     # print the tables found
+
+Grid = List[List[str]]
+HEADER_ROWS = 3
+
+def _clean(text: str) -> str:
+    lines = [re.sub(r"[ \t\r\f\v ]+", " ", l).strip() for l in text.split("\n")]
+    return "\n".join(l for l in lines if l)
+
+def _layout(rows: List[List[Tuple[str, int, int]]]) -> Grid:
+    """Place (text, colspan, rowspan) cells on a grid, leaving spanned positions blank."""
+    grid: Dict[Tuple[int, int], str] = {}
+    width = 0
+    for r, cells in enumerate(rows):
+        c = 0
+        for text, colspan, rowspan in cells:
+            while (r, c) in grid: c += 1
+            for dr in range(rowspan):
+                for dc in range(colspan):
+                    grid[(r + dr, c + dc)] = text if dr == dc == 0 else ""
+            c += colspan
+            width = max(width, c)
+    return [[grid.get((r, c), "") for c in range(width)] for r in range(len(rows))]
+
+def _header_depth(rows: List[List[Tuple[str, int, int]]], marked: int) -> int:
+    """Marked header rows, extended over rows that header cells span into."""
+    depth, r = max(marked, 1), 0
+    while r < min(depth, len(rows)):
+        depth = max([depth] + [r + rowspan for _, _, rowspan in rows[r]])
+        r += 1
+    return depth
+
+def pad_header(grid: Grid, header_rows: int) -> Grid:
+    """Insert blank rows after the header so it spans HEADER_ROWS rows."""
+    header_rows = max(1, min(header_rows, len(grid)))
+    if header_rows >= HEADER_ROWS:
+        return grid
+    blank = [""] * (len(grid[0]) if grid else 0)
+    return grid[:header_rows] + [list(blank) for _ in range(HEADER_ROWS - header_rows)] + grid[header_rows:]
+
+def _useful(grid: Grid) -> bool:
+    # layout tables (navigation, page chrome) rarely have two rows of two cells
+    return sum(1 for row in grid if sum(1 for c in row if c) >= 2) >= 2
+
+def _span(value: Optional[str]) -> int:
+    try:
+        return max(1, min(int(value or 1), 1000))
+    except ValueError:
+        return 1
+
+class _HTMLTables(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables: List[Grid] = []
+        # one entry per open <table>: rows, header row count, current row, current cell
+        self.stack: List[Dict] = []
+        self.skip = 0  # inside <script>/<style>
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag in ("script", "style"):
+            self.skip += 1
+        elif tag == "table":
+            self.stack.append({"rows": [], "header": 0, "in_head": False, "row": None, "cell": None})
+        elif not self.stack:
+            return
+        t = self.stack[-1] if self.stack else None
+        if t is None:
+            return
+        if tag == "thead":
+            t["in_head"] = True
+        elif tag == "tr":
+            self._end_row(t)
+            t["row"] = {"cells": [], "all_th": True, "head": t["in_head"]}
+        elif tag in ("td", "th"):
+            if t["row"] is None:
+                t["row"] = {"cells": [], "all_th": True, "head": t["in_head"]}
+            self._end_cell(t)
+            t["row"]["all_th"] &= tag == "th"
+            t["cell"] = {"text": [], "colspan": _span(a.get("colspan")), "rowspan": _span(a.get("rowspan"))}
+        elif tag == "br" and t["cell"] is not None:
+            t["cell"]["text"].append("\n")
+        elif tag in ("p", "div", "li") and t["cell"] is not None and t["cell"]["text"]:
+            t["cell"]["text"].append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self.skip = max(0, self.skip - 1)
+        if not self.stack:
+            return
+        t = self.stack[-1]
+        if tag == "thead":
+            t["in_head"] = False
+        elif tag in ("td", "th"):
+            self._end_cell(t)
+        elif tag == "tr":
+            self._end_row(t)
+        elif tag == "table":
+            self._end_row(t)
+            self.stack.pop()
+            grid = _layout(t["rows"])
+            if _useful(grid):
+                self.tables.append(pad_header(grid, _header_depth(t["rows"], t["header"])))
+
+    def handle_data(self, data):
+        if self.stack and not self.skip and self.stack[-1]["cell"] is not None:
+            self.stack[-1]["cell"]["text"].append(data)
+
+    def _end_cell(self, t):
+        cell = t["cell"]
+        if cell is not None:
+            t["row"]["cells"].append((_clean("".join(cell["text"])), cell["colspan"], cell["rowspan"]))
+            t["cell"] = None
+
+    def _end_row(self, t):
+        self._end_cell(t)
+        row = t["row"]
+        if row is not None and row["cells"]:
+            # header rows: <thead> rows, or leading rows of only <th>
+            if (row["head"] or row["all_th"]) and t["header"] == len(t["rows"]):
+                t["header"] += 1
+            t["rows"].append(row["cells"])
+        t["row"] = None
+
+def html_tables(html: str) -> List[Grid]:
+    p = _HTMLTables()
+    p.feed(html)
+    p.close()
+    return p.tables
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _docx_text(tc) -> str:
+    paras = []
+    for p in tc.iter(f"{W}p"):
+        parts = []
+        for el in p.iter():
+            if el.tag == f"{W}t" and el.text:
+                parts.append(el.text)
+            elif el.tag in (f"{W}br", f"{W}cr"):
+                parts.append("\n")
+            elif el.tag == f"{W}tab":
+                parts.append(" ")
+        paras.append("".join(parts))
+    return _clean("\n".join(paras))
+
+def docx_tables(path: str) -> List[Grid]:
+    with zipfile.ZipFile(path) as z:
+        root = ElementTree.fromstring(z.read("word/document.xml"))
+    tables = []
+    for tbl in root.iter(f"{W}tbl"):
+        rows: List[List[Optional[Tuple[str, int, int]]]] = []
+        merges: Dict[int, Tuple[int, int]] = {}  # grid column -> (row, cell index) of an open vertical merge
+        header = 0
+        for tr in tbl.findall(f"{W}tr"):
+            cells: List[Optional[Tuple[str, int, int]]] = []
+            col = 0
+            for tc in tr.findall(f"{W}tc"):
+                pr = tc.find(f"{W}tcPr")
+                span = _span(pr.find(f"{W}gridSpan").get(f"{W}val")) if pr is not None and pr.find(f"{W}gridSpan") is not None else 1
+                vmerge = pr.find(f"{W}vMerge") if pr is not None else None
+                if vmerge is not None and vmerge.get(f"{W}val", "continue") == "continue" and col in merges:
+                    # continuation of the cell above: grow its rowspan, leave this position blank
+                    r, i = merges[col]
+                    text, cs, rs = rows[r][i]
+                    rows[r][i] = (text, cs, rs + 1)
+                    cells.append(None)  # placeholder, dropped below
+                else:
+                    if vmerge is not None:
+                        merges[col] = (len(rows), len(cells))
+                    else:
+                        merges.pop(col, None)
+                    cells.append((_docx_text(tc), span, 1))
+                col += span
+            trpr = tr.find(f"{W}trPr")
+            if trpr is not None and trpr.find(f"{W}tblHeader") is not None and header == len(rows):
+                header += 1
+            rows.append(cells)
+        # merged continuations are covered by the rowspan of the cell above
+        rows = [[c for c in cells if c is not None] for cells in rows]
+        grid = _layout(rows)
+        if _useful(grid):
+            tables.append(pad_header(grid, _header_depth(rows, header)))
+    return tables
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python doctables.py <file.html|file.docx>")
+    path = sys.argv[1]
+    if path.lower().endswith(".docx"):
+        found = docx_tables(path)
+    else:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            found = html_tables(f.read())
+    for n, grid in enumerate(found, start=1):
+        print(f"--- table {n}: {len(grid)} rows x {len(grid[0]) if grid else 0} cols")
+        for row in grid:
+            print(" | ".join(c.replace("\n", " / ") for c in row))
@@ -1,29 +1,239 @@
-import tempfile, requests, pandas as pd
-import pdfplumber, camelot
+from __future__ import annotations
+import os, re, time, tempfile, hashlib, zipfile
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from throttle import host_slot
+import doctables
 
-def download_pdf(url: str) -> str:
-    fp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False).name
-    with requests.get(url, stream=True, timeout=120) as r:
+# requests, pandas, pdfplumber and camelot (which pulls in OpenCV) are imported
+# where they are used so importing this module stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Pages handed to camelot per call; bounds how many tables are held at once
+EXTRACT_PAGE_WINDOW = max(1, int(os.getenv("EXTRACT_PAGE_WINDOW", "10")))
+
+# (first, last) pages to extract, 1-based and inclusive; None = the whole document
+PageRange = Optional[Tuple[int, int]]
+
+def _pages(pdf_path: str, pages: PageRange) -> Tuple[int, int]:
+    total = page_count(pdf_path)
+    return (max(1, pages[0]), min(total, pages[1])) if pages else (1, total)
+
+# Document kinds the worker extracts; everything but "pdf" is read from markup
+DOC_KINDS = ("pdf", "html", "docx")
+
+def sniff_kind(path: str, content_type: str = "", url: str = "") -> str:
+    """Document kind from the file's leading bytes, then Content-Type, then extension.
+    Servers often label ordinances application/octet-stream, so bytes decide first."""
+    with open(path, "rb") as f:
+        head = f.read(2048)
+    if head.lstrip().startswith(b"%PDF"):
+        return "pdf"
+    if head.startswith(b"PK\x03\x04"):
+        try:
+            with zipfile.ZipFile(path) as z:
+                if "word/document.xml" in z.namelist(): return "docx"
+        except zipfile.BadZipFile:
+            pass
+    lowered = head.lower()
+    if any(m in lowered for m in (b"<!doctype html", b"<html", b"<table")):
+        return "html"
+    ct = content_type.split(";")[0].strip().lower()
+    if ct == "application/pdf": return "pdf"
+    if ct in ("text/html", "application/xhtml+xml"): return "html"
+    if ct == "application/vnd.openxmlformats-officedocument.wordprocessingml.document": return "docx"
+    ext = os.path.splitext(url.split("?")[0].split("#")[0])[1].lower()
+    return {".htm": "html", ".html": "html", ".xhtml": "html", ".docx": "docx"}.get(ext, "pdf")
+
+def download_document(url: str) -> Tuple[str, str]:
+    """Download to a temp file; returns (path, kind)."""
+    import requests
+    fp = tempfile.NamedTemporaryFile(delete=False).name
+    with host_slot(url), requests.get(url, stream=True, timeout=120) as r:
         r.raise_for_status()
         with open(fp, "wb") as f:
             for chunk in r.iter_content(8192):
                 if chunk: f.write(chunk)
-    return fp
+        content_type = r.headers.get("Content-Type", "")
+    return fp, sniff_kind(fp, content_type, url)
 
-def extract_tables(pdf_path: str) -> list[pd.DataFrame]:
-    dfs: list[pd.DataFrame] = []
+def download_pdf(url: str) -> str:
+    return download_document(url)[0]
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def page_count(pdf_path: str) -> int:
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
+
+# Extraction strategies by name: each yields (page, table) for a document, or for
+# a page range of a PDF (a split job's child). The
+# worker runs "auto" for PDFs and the matching markup reader for HTML and DOCX
+# (see iter_document_tables); benchmark.py compares them on the golden corpus.
+STRATEGIES: Dict[str, Callable[..., Iterator[Tuple[int, pd.DataFrame]]]] = {}
+
+def strategy(name: str):
+    def register(fn):
+        STRATEGIES[name] = fn
+        return fn
+    return register
+
+def _camelot(pdf_path: str, flavor: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    import camelot
+    start, end = _pages(pdf_path, pages)
+    for first in range(start, end + 1, EXTRACT_PAGE_WINDOW):
+        last = min(end, first + EXTRACT_PAGE_WINDOW - 1)
+        tables = camelot.read_pdf(pdf_path, flavor=flavor, pages=f"{first}-{last}")
+        for t in tables:
+            yield int(t.page), t.df
+        del tables
+
+@strategy("lattice")
+def camelot_lattice(pdf_path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    return _camelot(pdf_path, "lattice", pages)
+
+@strategy("stream")
+def camelot_stream(pdf_path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    return _camelot(pdf_path, "stream", pages)
+
+@strategy("pdfplumber")
+def pdfplumber_tables(pdf_path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    import pandas as pd
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        first, last = (max(1, pages[0]), min(len(pdf.pages), pages[1])) if pages else (1, len(pdf.pages))
+        for n in range(first, last + 1):
+            page = pdf.pages[n - 1]
+            for t in page.extract_tables() or []:
+                df = pd.DataFrame(t)
+                if not df.empty: yield n, df
+            page.close()  # drop the page's parsed objects before the next one
+
+@strategy("auto")
+def iter_tables(pdf_path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """Yield (page, table) as pages are extracted, EXTRACT_PAGE_WINDOW pages at a time.
+
+    Same fallback as before, decided over the whole document: camelot lattice,
+    then camelot stream if lattice found nothing, then pdfplumber."""
+    found = False
+    for flavor in ("lattice", "stream"):
+        try:
+            for item in _camelot(pdf_path, flavor, pages):
+                found = True
+                yield item
+        except Exception:
+            if found: raise
+        if found: return
+    yield from pdfplumber_tables(pdf_path, pages)
+
+# Progressive extraction: engines cheapest first. Every page gets the first; a
+# page escalates to the next only while its tables score below the threshold.
+ESCALATION = ("pdfplumber", "stream", "lattice")
+# Pages pdfplumber found no table on still escalate if they mention two of these
+# (whitespace-aligned tables without rules are invisible to it)
+TABLE_CUES = re.compile(r"lot area|frontage|front yard|side yard|rear yard|setback|coverage|height|density", re.I)
+
+# score(tables on one page) -> (confidence, one mapped result per table, keep);
+# keep (or None) is called only if the page keeps this engine's tables
+Scorer = Callable[[List["pd.DataFrame"]], Tuple[float, List[Any], Optional[Callable[[], None]]]]
+
+def _camelot_pages(pdf_path: str, flavor: str, pages: List[int]) -> Dict[int, List[pd.DataFrame]]:
+    import camelot
+    found: Dict[int, List[pd.DataFrame]] = {n: [] for n in pages}
+    for t in camelot.read_pdf(pdf_path, flavor=flavor, pages=",".join(map(str, pages))):
+        found[int(t.page)].append(t.df)
+    return found
+
+def _tabular(page, has_tables: bool) -> bool:
+    return has_tables or len({m.lower() for m in TABLE_CUES.findall(page.extract_text() or "")}) >= 2
+
+def tabular_pages(pdf_path: str) -> Set[int]:
+    """Pages that hold a table or read like a bulk-standards table (no extraction)."""
+    import pdfplumber
+    found = set()
+    with pdfplumber.open(pdf_path) as pdf:
+        for n, page in enumerate(pdf.pages, start=1):
+            if _tabular(page, bool(page.find_tables())): found.add(n)
+            page.close()
+    return found
+
+def progressive_tables(pdf_path: str, score: Scorer, threshold: float, deadline: Optional[float] = None,
+                       pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame, Any]]:
+    """Yield (page, table, mapped), keeping each page's best-scoring engine.
+
+    pdfplumber reads every page. Pages that hold tables (or look like they do)
+    but score below threshold are re-read with camelot stream, then lattice,
+    EXTRACT_PAGE_WINDOW pages at a time. No new escalation starts after
+    deadline (a time.monotonic() value); those pages keep their best so far."""
+    import pandas as pd
+    import pdfplumber
+    escalated = {flavor: 0 for flavor in ESCALATION[1:]}
+    skipped = 0
+    with pdfplumber.open(pdf_path) as pdf:
+        start, end = (max(1, pages[0]), min(len(pdf.pages), pages[1])) if pages else (1, len(pdf.pages))
+        for first in range(start, end + 1, EXTRACT_PAGE_WINDOW):
+            window = range(first, min(end, first + EXTRACT_PAGE_WINDOW - 1) + 1)
+            best: Dict[int, Tuple[float, List[Any], List[pd.DataFrame]]] = {}
+            weak = []
+            for n in window:
+                page = pdf.pages[n - 1]
+                tables = [df for df in (pd.DataFrame(t) for t in page.extract_tables() or []) if not df.empty]
+                tabular = _tabular(page, bool(tables))
+                page.close()
+                best[n] = (*score(tables), tables)
+                if tabular and best[n][0] < threshold: weak.append(n)
+            for flavor in ESCALATION[1:]:
+                if not weak: break
+                if deadline is not None and time.monotonic() >= deadline:
+                    skipped += len(weak)
+                    break
+                escalated[flavor] += len(weak)
+                try:
+                    found = _camelot_pages(pdf_path, flavor, weak)
+                except Exception as e:
+                    print(f"⚠️ camelot {flavor} failed on pages {weak}: {e}")
+                    continue
+                for n, tables in found.items():
+                    scored = (*score(tables), tables)
+                    if scored[0] > best[n][0]: best[n] = scored
+                weak = [n for n in weak if best[n][0] < threshold]
+            for n in window:
+                _, mapped, keep, tables = best.pop(n)
+                if keep: keep()
+                for df, m in zip(tables, mapped):
+                    yield n, df, m
+    print(f"🪜 {end - start + 1} pages: escalated {escalated['stream']} to stream, {escalated['lattice']} to lattice"
+          + (f"; {skipped} left at their best after the time budget" if skipped else ""))
+
+def _frames(grids) -> Iterator[Tuple[int, pd.DataFrame]]:
+    # markup has no pages; the table's position in the document stands in
+    import pandas as pd
+    for n, grid in enumerate(grids, start=1):
+        yield n, pd.DataFrame(grid)
+
+@strategy("html")
+def html_tables(path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    with open(path, "rb") as f:
+        raw = f.read()
     try:
-        tables = camelot.read_pdf(pdf_path, flavor="lattice", pages="all")
-        dfs += [t.df for t in tables] if tables.n > 0 else []
-        if not dfs:
-            tables = camelot.read_pdf(pdf_path, flavor="stream", pages="all")
-            dfs += [t.df for t in tables] if tables.n > 0 else []
-    except Exception:
-        pass
-    if not dfs:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                for t in page.extract_tables() or []:
-                    df = pd.DataFrame(t)
-                    if not df.empty: dfs.append(df)
-    return dfs
+        html = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        html = raw.decode("cp1252", errors="replace")  # older code-hosting sites
+    return _frames(doctables.html_tables(html))
+
+@strategy("docx")
+def docx_tables(path: str, pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    return _frames(doctables.docx_tables(path))
+
+def iter_document_tables(path: str, kind: str = "pdf", pdf_strategy: str = "auto",
+                         pages: PageRange = None) -> Iterator[Tuple[int, pd.DataFrame]]:
+    return STRATEGIES[pdf_strategy if kind == "pdf" else kind](path, pages)
+
+def extract_tables(pdf_path: str) -> list[pd.DataFrame]:
+    return [df for _, df in iter_tables(pdf_path)]
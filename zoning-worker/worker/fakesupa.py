@@ -0,0 +1,342 @@
+import copy, re, threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# In-memory stand-in for the Supabase client, covering the PostgREST calls the
+# worker makes (see supa.py) and the claim_jobs / extend_job_leases RPCs. Used by loadtest.py
+# through supa.set_client(); rows live in plain dicts, one list per table.
+#
+#   from fakesupa import FakeClient
+#   supa.set_client(FakeClient())
+
+Row = Dict[str, Any]
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+def _ts(v: Any) -> Optional[datetime]:
+    if isinstance(v, str) and re.match(r"\d{4}-\d\d-\d\dT", v):
+        return datetime.fromisoformat(v.replace("Z", "+00:00"))
+    return None
+
+def _cmp_key(v: Any) -> Any:
+    # timestamps are compared as datetimes, numbers that arrived as filter strings as numbers
+    t = _ts(v)
+    if t: return t
+    if isinstance(v, str):
+        try: return float(v)
+        except ValueError: return v
+    return v
+
+def _compare(op: str, a: Any, b: Any) -> bool:
+    if op == "is":
+        return a is None if b in (None, "null") else a is (str(b).lower() == "true")
+    if op == "in":
+        return str(a) in {str(x) for x in b}
+    if a is None:
+        return op == "neq" and b is not None
+    a, b = _cmp_key(a), _cmp_key(b)
+    return {"eq": a == b, "neq": a != b, "lt": a < b, "lte": a <= b, "gt": a > b, "gte": a >= b}[op]
+
+def _split(expr: str) -> List[str]:
+    """Split a PostgREST logic list on top-level commas."""
+    parts, depth, cur = [], 0, ""
+    for ch in expr:
+        if ch == "," and depth == 0:
+            parts.append(cur); cur = ""; continue
+        depth += ch == "("
+        depth -= ch == ")"
+        cur += ch
+    return parts + [cur] if cur else parts
+
+def _logic(expr: str) -> Callable[[Row], bool]:
+    """Predicate for one or_() term: and(...), or(...) or col.op.value."""
+    m = re.fullmatch(r"(and|or)\((.*)\)", expr.strip())
+    if m:
+        preds = [_logic(p) for p in _split(m.group(2))]
+        combine = all if m.group(1) == "and" else any
+        return lambda r: combine(p(r) for p in preds)
+    col, op, val = expr.strip().split(".", 2)
+    if op == "in":
+        val = [v.strip() for v in val.strip("()").split(",")]
+    return lambda r: _compare(op, r.get(col), val)
+
+class _Response:
+    def __init__(self, data: Any):
+        self.data = data
+
+class _Query:
+    def __init__(self, client: "FakeClient", table: str):
+        self.client, self.table = client, table
+        self.op, self.values, self.options = "select", None, {}
+        self.columns: Optional[List[str]] = None
+        self.filters: List[Callable[[Row], bool]] = []
+        self.orders: List[tuple] = []
+        self.limit_n: Optional[int] = None
+        self.offset_n = 0
+        self.single_row = False
+
+    # statements
+    def select(self, columns: str = "*", **_):
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        return self
+
+    def insert(self, values, **_):
+        self.op, self.values = "insert", values
+        return self
+
+    def upsert(self, values, on_conflict: str = "id", ignore_duplicates: bool = False, **_):
+        self.op, self.values = "upsert", values
+        self.options = {"on_conflict": [c.strip() for c in on_conflict.split(",")], "ignore": ignore_duplicates}
+        return self
+
+    def update(self, values, **_):
+        self.op, self.values = "update", values
+        return self
+
+    def delete(self, **_):
+        self.op = "delete"
+        return self
+
+    # filters and modifiers
+    def _filter(self, op: str, col: str, val: Any):
+        self.filters.append(lambda r: _compare(op, r.get(col), val))
+        return self
+
+    def eq(self, col, val): return self._filter("eq", col, val)
+    def neq(self, col, val): return self._filter("neq", col, val)
+    def lt(self, col, val): return self._filter("lt", col, val)
+    def lte(self, col, val): return self._filter("lte", col, val)
+    def gt(self, col, val): return self._filter("gt", col, val)
+    def gte(self, col, val): return self._filter("gte", col, val)
+    def in_(self, col, vals): return self._filter("in", col, list(vals))
+    def is_(self, col, val): return self._filter("is", col, val)
+
+    def or_(self, expr: str):
+        preds = [_logic(p) for p in _split(expr)]
+        self.filters.append(lambda r: any(p(r) for p in preds))
+        return self
+
+    def order(self, col: str, desc: bool = False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n: int):
+        self.limit_n = n
+        return self
+
+    def range(self, start: int, end: int):
+        self.offset_n, self.limit_n = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    maybe_single = single
+
+    def execute(self) -> _Response:
+        with self.client.lock:
+            data = getattr(self, f"_{self.op}")()
+            data = copy.deepcopy(data)
+        if self.single_row:
+            if len(data) != 1:
+                raise ValueError(f"{self.table}: expected 1 row, got {len(data)}")
+            return _Response(data[0])
+        return _Response(data)
+
+    def _matching(self) -> List[Row]:
+        return [r for r in self.client.rows(self.table) if all(f(r) for f in self.filters)]
+
+    def _select(self) -> List[Row]:
+        rows = self._matching()
+        for col, desc in reversed(self.orders):
+            rows.sort(key=lambda r: (r.get(col) is None, _cmp_key(r.get(col))), reverse=desc)
+        rows = rows[self.offset_n:self.offset_n + self.limit_n] if self.limit_n is not None else rows[self.offset_n:]
+        return [{c: r.get(c) for c in self.columns} if self.columns else r for r in rows]
+
+    def _insert(self) -> List[Row]:
+        values = self.values if isinstance(self.values, list) else [self.values]
+        return [self.client.insert_row(self.table, v) for v in values]
+
+    def _upsert(self) -> List[Row]:
+        values = self.values if isinstance(self.values, list) else [self.values]
+        keys = self.options["on_conflict"]
+        out = []
+        for v in values:
+            existing = next((r for r in self.client.rows(self.table)
+                             if all(r.get(k) == v.get(k) for k in keys)), None)
+            if existing is None:
+                out.append(self.client.insert_row(self.table, v))
+            elif not self.options["ignore"]:
+                existing.update(self.client.resolve(v))
+                out.append(existing)
+        return out
+
+    def _update(self) -> List[Row]:
+        rows = self._matching()
+        for r in rows:
+            r.update(self.client.resolve(self.values))
+            self.client.on_write(self.table, r)
+        return rows
+
+    def _delete(self) -> List[Row]:
+        rows = self._matching()
+        dead = {id(r) for r in rows}
+        self.client.tables[self.table] = [r for r in self.client.rows(self.table) if id(r) not in dead]
+        return rows
+
+class _Rpc:
+    def __init__(self, fn: Callable[[], Any]):
+        self.fn = fn
+
+    def execute(self) -> _Response:
+        return _Response(self.fn())
+
+class FakeClient:
+    """Just enough of supabase.Client for the worker: table() queries and rpc()."""
+
+    # column defaults the schema would fill in (01_schema.sql)
+    DEFAULTS: Dict[str, Row] = {
+        "ingestion_jobs": {"status": "PENDING", "priority": 0, "attempts": 0, "message": None,
+                           "content_hash": None, "coalesced_into": None, "stage": None, "checkpoint": None, "profile": False,
+                           "worker_id": None, "lease_expires_at": None, "pdf_storage_path": None,
+                           "parent_id": None, "page_start": None, "page_end": None},
+        "header_aliases": {"scope_key": "", "status": "LEARNED"},
+    }
+
+    def __init__(self):
+        self.tables: Dict[str, List[Row]] = {}
+        self.ids: Dict[str, int] = {}
+        self.lock = threading.RLock()
+
+    def rows(self, table: str) -> List[Row]:
+        return self.tables.setdefault(table, [])
+
+    def resolve(self, values: Row) -> Row:
+        return {k: _now() if v == "now()" else copy.deepcopy(v) for k, v in values.items()}
+
+    def insert_row(self, table: str, values: Row) -> Row:
+        row = {**copy.deepcopy(self.DEFAULTS.get(table, {})), **self.resolve(values)}
+        if table != "raw_extraction_blobs" and "id" not in row:
+            self.ids[table] = self.ids.get(table, 0) + 1
+            row["id"] = self.ids[table]
+        row.setdefault("created_at", _now())
+        row.setdefault("updated_at", row["created_at"])
+        self.on_write(table, row)
+        self.rows(table).append(row)
+        return row
+
+    def on_write(self, table: str, row: Row):
+        if table == "ingestion_jobs":
+            # generated column
+            m = re.match(r"^[A-Za-z]+://([^/:?#]+)", row.get("source_url") or "")
+            row["source_host"] = m.group(1).lower() if m else None
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: Optional[Row] = None) -> _Rpc:
+        fn = getattr(self, f"rpc_{name}", None)
+        if fn is None:
+            raise NotImplementedError(f"FakeClient has no RPC {name}")
+        return _Rpc(lambda: copy.deepcopy(fn(**(params or {}))))
+
+    def rpc_claim_jobs(self, p_worker_id: str, p_limit: int = 1, p_lease_seconds: int = 300,
+                       p_aging_seconds: int = 600, p_max_per_host: int = 2, p_max_attempts: int = 3) -> List[Row]:
+        # same steps as the SQL function in 02_rpc_functions.sql; the client lock
+        # stands in for row locks
+        with self.lock:
+            jobs = self.rows("ingestion_jobs")
+            now = datetime.now(timezone.utc)
+            for j in jobs:
+                lease = _ts(j.get("lease_expires_at"))
+                stale = lease < now if lease else (now - _ts(j["updated_at"])).total_seconds() > p_lease_seconds
+                if j["status"] != "PROCESSING" or j.get("coalesced_into") or not stale:
+                    continue
+                j.update(status="FAILED" if j["attempts"] >= p_max_attempts else "PENDING",
+                         message=f"Lease expired on worker {j.get('worker_id') or '?'} (attempt {j['attempts']})",
+                         worker_id=None, lease_expires_at=None, updated_at=_now())
+                if j["status"] == "FAILED":
+                    for f in jobs:
+                        if f.get("coalesced_into") == j["id"] and f["status"] == "PROCESSING":
+                            f.update(status="FAILED", message=f"Coalesced with job {j['id']}: {j['message']}", updated_at=_now())
+            for p in jobs:
+                if p["status"] == "WAITING":
+                    self._release_parent(p["id"])
+
+            busy: Dict[Any, int] = {}
+            for j in jobs:
+                if j["status"] == "PROCESSING" and not j.get("pdf_storage_path") and not j.get("coalesced_into"):
+                    busy[j["source_host"]] = busy.get(j["source_host"], 0) + 1
+            pending = sorted(
+                (j for j in jobs if j["status"] == "PENDING"),
+                key=lambda j: (-(j["priority"] + (now - _ts(j["created_at"])).total_seconds() / max(p_aging_seconds, 1)),
+                               j["created_at"]),
+            )
+            load = dict(busy)
+            out = []
+            for j in pending:
+                if j.get("pdf_storage_path"):
+                    out.append(j)  # reads the stored copy, not the host
+                    continue
+                load[j["source_host"]] = load.get(j["source_host"], 0) + 1
+                if load[j["source_host"]] <= p_max_per_host:
+                    out.append(j)
+            expires = (now + timedelta(seconds=p_lease_seconds)).isoformat()
+            for j in out[:p_limit]:
+                j.update(status="PROCESSING", worker_id=p_worker_id, lease_expires_at=expires, updated_at=_now())
+            return out[:p_limit]
+
+    def rpc_extend_job_leases(self, p_worker_id: str, p_job_ids: List[int], p_lease_seconds: int = 300) -> List[int]:
+        with self.lock:
+            expires = (datetime.now(timezone.utc) + timedelta(seconds=p_lease_seconds)).isoformat()
+            held = []
+            for j in self.rows("ingestion_jobs"):
+                if (j["id"] in p_job_ids and j.get("worker_id") == p_worker_id
+                        and j["status"] == "PROCESSING" and j.get("lease_expires_at")):
+                    j["lease_expires_at"] = expires
+                    held.append(j["id"])
+            return held
+
+    def _release_parent(self, parent_id: int) -> bool:
+        jobs = self.rows("ingestion_jobs")
+        parent = next((j for j in jobs if j["id"] == parent_id), None)
+        if not parent or parent["status"] != "WAITING":
+            return False
+        if any(c.get("parent_id") == parent_id and c["status"] in ("PENDING", "PROCESSING") for c in jobs):
+            return False
+        parent.update(status="PENDING", attempts=0, message="Merging page-range results", updated_at=_now())
+        return True
+
+    def rpc_split_job(self, p_job_id: int, p_ranges: List[List[int]], p_storage_path: Optional[str] = None) -> int:
+        with self.lock:
+            jobs = self.rows("ingestion_jobs")
+            parent = next(j for j in jobs if j["id"] == p_job_id)
+            children = sum(1 for j in jobs if j.get("parent_id") == p_job_id)
+            if not children:
+                for first, last in p_ranges:
+                    self.insert_row("ingestion_jobs", {
+                        **{k: parent[k] for k in ("source_url", "state_code", "county", "municipality",
+                                                  "priority", "content_hash", "profile")},
+                        "pdf_storage_path": p_storage_path, "parent_id": p_job_id,
+                        "page_start": first, "page_end": last, "message": f"Pages {first}-{last} of job {p_job_id}",
+                    })
+                children = len(p_ranges)
+            parent.update(status="WAITING", stage="SPLIT", checkpoint=None, worker_id=None, lease_expires_at=None,
+                          message=f"Split into {children} page-range jobs", updated_at=_now())
+            return children
+
+    def rpc_finish_child_job(self, p_job_id: int, p_status: str, p_message: Optional[str] = None) -> bool:
+        with self.lock:
+            child = next(j for j in self.rows("ingestion_jobs") if j["id"] == p_job_id)
+            child.update(status=p_status, message=p_message, lease_expires_at=None, updated_at=_now())
+            return self._release_parent(child["parent_id"])
+
+    def rpc_resolve_municipality(self, p_state_code: str, p_county: Optional[str], p_name: str) -> int:
+        with self.lock:
+            key = {"state_code": p_state_code.upper(), "county": p_county or "", "name": p_name}
+            row = next((m for m in self.rows("municipalities") if all(m[k] == v for k, v in key.items())), None)
+            return (row or self.insert_row("municipalities", key))["id"]
@@ -0,0 +1,48 @@
+import os
+from typing import Dict, List, Tuple
+from extractors import page_count, tabular_pages
+from models import Zone
+from pipeline import consolidate
+
+# Map-reduce for long PDFs: a job over SPLIT_MIN_PAGES pages is split into
+# children of SPLIT_PAGES pages each (parent_id, page_start, page_end) that any
+# worker node can claim. Each child extracts and maps its range and saves the
+# result as a raw extraction. When the last one finishes, the parent is requeued
+# and merges the children's payloads with the same zone_code consolidation as
+# one worker reading the whole document, then ingests as usual.
+SPLIT_MIN_PAGES = int(os.getenv("SPLIT_MIN_PAGES", "150"))  # 0 = never split
+SPLIT_PAGES = max(1, int(os.getenv("SPLIT_PAGES", "40")))
+# Read every page's text first and only queue ranges with table-like pages
+SPLIT_PRESCAN = os.getenv("SPLIT_PRESCAN", "false").lower() == "true"
+
+def plan_ranges(pdf_path: str) -> List[List[int]]:
+    """[first, last] page ranges to queue as children, or [] to run the job whole."""
+    pages = page_count(pdf_path)
+    if not SPLIT_MIN_PAGES or pages < SPLIT_MIN_PAGES:
+        return []
+    relevant = tabular_pages(pdf_path) if SPLIT_PRESCAN else None
+    ranges = []
+    for first in range(1, pages + 1, SPLIT_PAGES):
+        last = min(pages, first + SPLIT_PAGES - 1)
+        if relevant is not None:
+            # skip ranges of prose, and trim the rest to their table-like pages
+            hits = [n for n in range(first, last + 1) if n in relevant]
+            if not hits: continue
+            first, last = hits[0], hits[-1]
+        ranges.append([first, last])
+    return ranges
+
+def merge_children(job_id: int) -> Tuple[Dict[str, Zone], float, List[str]]:
+    """Consolidate the children's payloads in page order.
+    Returns zone groups, best confidence, and the page ranges that failed."""
+    from supa import child_results
+    zone_groups: Dict[str, Zone] = {}
+    best_conf = 0.0
+    failed: List[str] = []
+    for c in child_results(job_id):
+        if c["status"] != "DONE" or c["payloads"] is None:
+            failed.append(f"pages {c['page_start']}-{c['page_end']}: {c['message'] or c['status']}")
+            continue
+        consolidate((Zone.from_dict(p) for p in c["payloads"]), zone_groups)
+        best_conf = max(best_conf, c["confidence"])
+    return zone_groups, best_conf, failed
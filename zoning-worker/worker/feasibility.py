@@ -0,0 +1,197 @@
+import os, threading, time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from parsers import acres_to_sq_ft
+
+# Reverse search: given a lot (and optionally a proposed building), which zones
+# allow it? Every current zone's numeric standards are held in one float matrix
+# (NaN where the ordinance gave no value), and a batch of lots is compared
+# against all zones at once, one vectorized comparison per check. Areas are
+# already square feet (acre values are converted at ingest). The query service
+# serves this as POST /feasibility and reloads a municipality after its ingest.
+
+# Lots are evaluated this many at a time (the per-check arrays are lots x zones)
+FEASIBILITY_LOT_CHUNK = int(os.getenv("FEASIBILITY_LOT_CHUNK", "512"))
+
+# (check, lot field, standards columns for interior lots, for corner lots, "min" | "max")
+# Corner columns are tried in order; the first non-null value applies.
+CHECKS: List[Tuple[str, str, Tuple[str, ...], Tuple[str, ...], str]] = [
+    ("lot_area", "area_sqft", ("area_sqft_interior_lots",), ("area_sqft_corner_lots", "area_sqft_interior_lots"), "min"),
+    ("frontage", "frontage_ft", ("frontage_interior_lots",), ("frontage_feet_corner_lots", "frontage_interior_lots"), "min"),
+    ("depth", "depth_ft", ("depth_interior_lots_ft",), ("depth_corner_lots_ft", "depth_interior_lots_ft"), "min"),
+    ("front_yard", "front_yard_ft", ("front_yard_principal_building",), ("front_yard_principal_building",), "min"),
+    ("side_yard", "side_yard_ft", ("side_yard_principal_building",), ("side_yard_principal_building",), "min"),
+    # the street side of a corner lot is held to the street side yard, else the front yard
+    ("street_side_yard", "street_side_yard_ft", (), ("street_side_yard_principal_building", "front_yard_principal_building"), "min"),
+    ("rear_yard", "rear_yard_ft", ("rear_yard_principal_building",), ("rear_yard_principal_building",), "min"),
+    ("height", "height_ft", ("feet_max_height_principal_building",), ("feet_max_height_principal_building",), "max"),
+    ("stories", "stories", ("stories_max_height_principal_building",), ("stories_max_height_principal_building",), "max"),
+    ("building_coverage", "building_coverage_pct", ("max_building_coverage_percent",), ("max_building_coverage_percent",), "max"),
+    ("lot_coverage", "lot_coverage_pct", ("max_lot_coverage_percent",), ("max_lot_coverage_percent",), "max"),
+    ("far", "far", ("maximum_far",), ("maximum_far",), "max"),
+    ("density", "density_du_ac", ("maximum_density",), ("maximum_density",), "max"),
+]
+COLUMNS = sorted({c for _, _, interior, corner, _ in CHECKS for c in interior + corner})
+LOT_FIELDS = [field for _, field, _, _, _ in CHECKS]
+ZONE_FIELDS = ("zone_key", "zone_code", "zone_name", "municipality", "county", "state")
+
+def _muni_key(state: Optional[str], municipality: Optional[str]) -> Tuple[str, str]:
+    return (state or "").upper(), (municipality or "").lower()
+
+def _num(v: Any) -> float:
+    try:
+        return float(v) if v is not None and v != "" else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+def lot_matrix(lots: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(lots x LOT_FIELDS float matrix, corner flags). FAR and density are derived
+    from floor_area_sqft / units when not given; area may be given in acres."""
+    m = np.full((len(lots), len(LOT_FIELDS)), np.nan)
+    corner = np.zeros(len(lots), dtype=bool)
+    for i, lot in enumerate(lots):
+        lot = dict(lot)
+        if lot.get("area_sqft") is None and lot.get("area_acres") is not None:
+            lot["area_sqft"] = acres_to_sq_ft(_num(lot["area_acres"]))
+        area = _num(lot.get("area_sqft"))
+        if lot.get("far") is None and lot.get("floor_area_sqft") is not None and area > 0:
+            lot["far"] = _num(lot["floor_area_sqft"]) / area
+        if lot.get("density_du_ac") is None and lot.get("units") is not None and area > 0:
+            lot["density_du_ac"] = _num(lot["units"]) / (area / 43560)
+        m[i] = [_num(lot.get(f)) for f in LOT_FIELDS]
+        corner[i] = bool(lot.get("corner"))
+    return m, corner
+
+class _Block:
+    """One municipality's zones: metadata plus a zones x COLUMNS matrix."""
+    __slots__ = ("zones", "values")
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.zones: List[Dict[str, Any]] = []
+        self.values = np.full((len(rows), len(COLUMNS)), np.nan)
+        for i, z in enumerate(rows):
+            std = z.get("standards") or [{}]
+            std = std[0] if isinstance(std, list) else std
+            self.zones.append({**{f: z.get(f) for f in ZONE_FIELDS}, "state": z.get("state_code")})
+            self.values[i] = [_num(std.get(c)) for c in COLUMNS]
+
+class FeasibilityEngine:
+    """All current zones' standards in memory, evaluated against lots in batch.
+
+    Loaded on first use; mark_stale(state, municipality) after an ingest makes
+    the next evaluation reload just that municipality."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.blocks: Dict[Tuple[str, str], _Block] = {}
+        # municipality key -> (state, municipality) as written by the ingest
+        self.stale: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        self.loaded = False
+        self._assemble()
+
+    def mark_stale(self, state: str, municipality: str):
+        with self.lock:
+            self.stale[_muni_key(state, municipality)] = (state, municipality)
+
+    def _load(self):
+        from supa import fetch_zone_standards
+        t0 = time.perf_counter()
+        by_muni: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for z in fetch_zone_standards(COLUMNS):
+            by_muni.setdefault(_muni_key(z.get("state_code"), z.get("municipality")), []).append(z)
+        self.blocks = {k: _Block(rows) for k, rows in by_muni.items()}
+        self.loaded, self.stale = True, {}
+        self._assemble()
+        print(f"📐 Loaded standards for {len(self.zones)} zones in {len(self.blocks)} municipalities "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+    def _refresh(self):
+        from supa import fetch_zone_standards
+        for key, (state, municipality) in self.stale.items():
+            rows = fetch_zone_standards(COLUMNS, state_code=state, municipality=municipality)
+            if rows:
+                self.blocks[key] = _Block(rows)
+            else:
+                self.blocks.pop(key, None)
+        print(f"📐 Reloaded standards for {', '.join(m for _, m in self.stale.values())}")
+        self.stale = {}
+        self._assemble()
+
+    def _assemble(self):
+        # concatenating the per-municipality blocks is cheap next to refetching them
+        blocks = list(self.blocks.values())
+        self.zones = [z for b in blocks for z in b.zones]
+        values = np.vstack([b.values for b in blocks]) if blocks else np.empty((0, len(COLUMNS)))
+        col = {c: values[:, i] for i, c in enumerate(COLUMNS)}
+        self.required = {}
+        for name, _, interior, corner, _ in CHECKS:
+            self.required[name] = tuple(self._coalesce([col[c] for c in cols], len(self.zones)) for cols in (interior, corner))
+        self.state = np.array([(z["state"] or "").upper() for z in self.zones], dtype=object)
+        self.county = np.array([(z["county"] or "").lower() for z in self.zones], dtype=object)
+        self.municipality = np.array([(z["municipality"] or "").lower() for z in self.zones], dtype=object)
+
+    @staticmethod
+    def _coalesce(arrays: List[np.ndarray], n: int) -> np.ndarray:
+        out = np.full(n, np.nan)
+        for a in reversed(arrays):
+            out = np.where(np.isnan(a), out, a)
+        return out
+
+    def _ensure_current(self):
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            elif self.stale:
+                self._refresh()
+            return self.zones, self.required, self.state, self.county, self.municipality
+
+    def evaluate(self, lots: List[Dict[str, Any]], state: Optional[str] = None, county: Optional[str] = None,
+                 municipality: Optional[str] = None, include_failing: bool = False) -> List[Dict[str, Any]]:
+        """For each lot, the zones that allow it with each check as true/false/null.
+
+        A check is null when the lot or the zone has no value for it; a zone
+        allows a lot when no check fails and at least one was evaluated."""
+        zones, required, st, co, mu = self._ensure_current()
+        sel = np.ones(len(zones), dtype=bool)
+        if state: sel &= st == state.upper()
+        if county: sel &= co == county.lower()
+        if municipality: sel &= mu == municipality.lower()
+        idx = np.flatnonzero(sel)
+        req = {name: (interior[idx], corner[idx]) for name, (interior, corner) in required.items()}
+
+        lot_values, corner_lot = lot_matrix(lots)
+        out = []
+        for start in range(0, len(lots), FEASIBILITY_LOT_CHUNK):
+            stop = start + FEASIBILITY_LOT_CHUNK
+            status = self._status(lot_values[start:stop], corner_lot[start:stop], req)
+            fails = sum((s == 0).astype(np.int16) for s in status.values())
+            checked = sum((s >= 0).astype(np.int16) for s in status.values())
+            allowed = (fails == 0) & (checked > 0)
+            for li in range(allowed.shape[0]):
+                lot = lots[start + li]
+                cols = np.arange(len(idx)) if include_failing else np.flatnonzero(allowed[li])
+                out.append({
+                    "lot_id": lot.get("id", start + li),
+                    "allowed_count": int(allowed[li].sum()),
+                    "zones": [{
+                        **zones[idx[zi]],
+                        "allowed": bool(allowed[li, zi]),
+                        "checks": {name: None if s[li, zi] < 0 else bool(s[li, zi]) for name, s in status.items()},
+                    } for zi in cols.tolist()],
+                })
+        return out
+
+    @staticmethod
+    def _status(lot_values: np.ndarray, corner: np.ndarray,
+                req: Dict[str, Tuple[np.ndarray, np.ndarray]]) -> Dict[str, np.ndarray]:
+        """lots x zones int8 per check: 1 pass, 0 fail, -1 not evaluated."""
+        status = {}
+        for f, (name, _, _, _, kind) in enumerate(CHECKS):
+            lot = lot_values[:, f][:, None]
+            interior, corner_req = req[name]
+            need = np.where(corner[:, None], corner_req[None, :], interior[None, :])
+            known = ~np.isnan(need) & ~np.isnan(lot)
+            with np.errstate(invalid="ignore"):
+                ok = lot >= need if kind == "min" else lot <= need
+            status[name] = np.where(known, ok, -1).astype(np.int8)
+        return status
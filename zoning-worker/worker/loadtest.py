@@ -0,0 +1,220 @@
+import os, sys, json, time, random, argparse, tempfile, threading, resource
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+# End-to-end load test of the worker with no network or database: synthetic
+# zoning-table PDFs are served from a local HTTP server, jobs go into an
+# in-memory Supabase stand-in (fakesupa.py), and process_job runs them with the
+# real download/extract/map/ingest code. Reports throughput, per-stage latency
+# percentiles and peak RSS.
+#
+#   python loadtest.py --jobs 50 --workers 2 --max-pages 20
+#   python loadtest.py --jobs 200 --json before.json
+#
+# Workers are threads sharing one FakeClient (forked workers could not share an
+# in-memory store), so compare runs with the same --workers.
+
+COLUMNS = [
+    ("Zone", "", ""),
+    ("Interior Lots", "Area", "sq ft"),
+    ("Interior Lots", "Frontage", "feet"),
+    ("Interior Lots", "Depth", "feet"),
+    ("Principal Building", "Front Yard", "feet"),
+    ("Principal Building", "Side Yard", "feet"),
+    ("Principal Building", "Rear Yard", "feet"),
+    ("Maximum", "Lot Coverage", "percent"),
+    ("Maximum", "Height", "feet"),
+]
+ROWS_PER_PAGE = 30
+
+def zone_rows(n: int, rng: random.Random) -> List[List[str]]:
+    rows = []
+    for i in range(1, n + 1):
+        area = rng.choice([5000, 7500, 10000, 20000, 40000])
+        rows.append([
+            f"R-{i}", f"{area:,}", str(rng.choice([50, 75, 100, 150])), str(rng.choice([100, 125, 150])),
+            str(rng.choice([20, 25, 30, 35])), str(rng.choice([5, 8, 10, 15])), str(rng.choice([20, 25, 30])),
+            f"{rng.choice([25, 30, 35, 40])}%", str(rng.choice([30, 35, 40])),
+        ])
+    return rows
+
+def _pdf_text(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_table_pdf(path: str, rows: List[List[str]], rows_per_page: int = ROWS_PER_PAGE):
+    """Write a minimal PDF with one ruled table per page (header rows repeated on each page)."""
+    x0, top, row_h = 36, 756, 14
+    widths = [44] + [62] * (len(COLUMNS) - 1)
+    xs = [x0]
+    for w in widths: xs.append(xs[-1] + w)
+    header = [list(r) for r in zip(*COLUMNS)]
+    pages = [rows[i:i + rows_per_page] for i in range(0, len(rows), rows_per_page)] or [[]]
+
+    streams = []
+    for chunk in pages:
+        table = header + chunk
+        ys = [top - i * row_h for i in range(len(table) + 1)]
+        ops = ["0.5 w"]
+        ops += [f"{xs[0]} {y} m {xs[-1]} {y} l S" for y in ys]
+        ops += [f"{x} {ys[0]} m {x} {ys[-1]} l S" for x in xs]
+        for r, cells in enumerate(table):
+            for c, text in enumerate(cells):
+                if text:
+                    ops.append(f"BT /F1 6 Tf {xs[c] + 2} {ys[r] - 10} Td ({_pdf_text(text)}) Tj ET")
+        streams.append("\n".join(ops).encode())
+
+    n = len(streams)
+    objs = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(f"{4 + 2 * i} 0 R".encode() for i in range(n)) + f"] /Count {n} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, s in enumerate(streams):
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                    f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>".encode())
+        objs.append(f"<< /Length {len(s)} >>\nstream\n".encode() + s + b"\nendstream")
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, body in enumerate(objs, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objs) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{o:010d} 00000 n \n".encode() for o in offsets)
+    out += f"trailer\n<< /Size {len(objs) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    with open(path, "wb") as f:
+        f.write(out)
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, fmt, *args):
+        pass
+
+def serve_dir(directory: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def percentile(values: List[float], p: float) -> float:
+    if not values: return 0.0
+    s = sorted(values)
+    k = (len(s) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def run(args) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="zoning-loadtest-")
+    os.environ["CHECKPOINT_DIR"] = os.path.join(workdir, "checkpoints")
+
+    import supa, throttle, checkpoints, query_service, metrics
+    from fakesupa import FakeClient
+    from main import process_job
+
+    # no real hosts to protect, and no query service to notify
+    throttle.HOST_MIN_INTERVAL = args.host_interval
+    throttle.HOST_MAX_CONCURRENCY = supa.HOST_MAX_CONCURRENCY = max(args.workers, 1)
+    checkpoints.CHECKPOINT_DIR = os.environ["CHECKPOINT_DIR"]
+    query_service.QUERY_SERVICE_URLS = []
+    client = FakeClient()
+    supa.set_client(client)
+
+    rng = random.Random(args.seed)
+    docs = os.path.join(workdir, "docs")
+    os.makedirs(docs)
+    t0 = time.perf_counter()
+    for i in range(args.jobs):
+        pages = rng.randint(args.min_pages, args.max_pages)
+        write_table_pdf(os.path.join(docs, f"code-{i}.pdf"), zone_rows(pages * ROWS_PER_PAGE, rng))
+    print(f"🧪 Generated {args.jobs} PDFs in {time.perf_counter() - t0:.1f}s under {docs}")
+
+    server = serve_dir(docs)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    client.table("ingestion_jobs").insert([
+        {"source_url": f"{base}/code-{i}.pdf", "state_code": "NJ", "county": "Loadtest",
+         "municipality": f"Town {i}", "priority": rng.choice([0, 0, 0, 10])}
+        for i in range(args.jobs)
+    ]).execute()
+
+    timings: Dict[str, List[float]] = {}
+    per_job = threading.local()
+    lock = threading.Lock()
+
+    def collect(stage: str, seconds: float):
+        # per-call timings summed per job, so each stage has one sample per job
+        per_job.stages[stage] = per_job.stages.get(stage, 0.0) + seconds
+
+    def record(stages: Dict[str, float]):
+        with lock:
+            for stage, seconds in stages.items():
+                timings.setdefault(stage, []).append(seconds)
+
+    def worker(n: int):
+        while True:
+            batch = supa.claim_jobs(f"loadtest/{n}", 1)
+            if not batch: return
+            job = batch[0]
+            per_job.stages = {}
+            t = time.perf_counter()
+            try:
+                process_job(job)
+            except Exception as e:
+                supa.finish_job(job["id"], "FAILED", f"{type(e).__name__}: {e}")
+            per_job.stages["job"] = time.perf_counter() - t
+            record(per_job.stages)
+
+    metrics.set_collector(collect)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,), name=f"loadtest-{n}") for n in range(args.workers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - started
+    metrics.set_collector(None)
+    server.shutdown()
+
+    statuses: Dict[str, int] = {}
+    for j in client.rows("ingestion_jobs"):
+        statuses[j["status"]] = statuses.get(j["status"], 0) + 1
+    return {
+        "jobs": args.jobs,
+        "workers": args.workers,
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_min": round(args.jobs / elapsed * 60, 2) if elapsed else 0.0,
+        "statuses": statuses,
+        "zones": len(client.rows("zones")),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "stages": {
+            stage: {"n": len(v), **{f"p{p}": round(percentile(v, p), 4) for p in (50, 95, 99)}}
+            for stage, v in sorted(timings.items())
+        },
+    }
+
+def report(result: Dict[str, Any]):
+    print(f"\n📊 {result['jobs']} jobs, {result['workers']} workers in {result['elapsed_s']}s "
+          f"= {result['jobs_per_min']} jobs/min; peak RSS {result['peak_rss_mb']} MB")
+    print(f"   statuses: {result['statuses']}, zones ingested: {result['zones']}")
+    print(f"   {'stage':<14}{'n':>6}{'p50 s':>10}{'p95 s':>10}{'p99 s':>10}")
+    for stage, s in result["stages"].items():
+        print(f"   {stage:<14}{s['n']:>6}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Load test the zoning worker against an in-memory Supabase stand-in")
+    ap.add_argument("--jobs", type=int, default=20)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--min-pages", type=int, default=1)
+    ap.add_argument("--max-pages", type=int, default=10)
+    ap.add_argument("--host-interval", type=float, default=0.0, help="HOST_MIN_INTERVAL_SECONDS for the run")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args()
+    result = run(args)
+    report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
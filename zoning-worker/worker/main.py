@@ -1,15 +1,33 @@
-import os, traceback
-from typing import Dict, Any
+import os, shutil, socket, threading, time, traceback
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
 AUTO_INGEST = os.getenv("AUTO_INGEST","true").lower() == "true"
 CONF_THRESH = float(os.getenv("CONFIDENCE_THRESHOLD","0.90"))
+# >1 imports heavy dependencies once in a parent process and forks warm children
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES","1"))
+COALESCE_JOBS = os.getenv("COALESCE_JOBS","true").lower() == "true"
+# "progressive" escalates weak pages from pdfplumber to camelot; any other
+# extractors.STRATEGIES name runs that strategy over the whole PDF
+EXTRACTION_MODE = os.getenv("EXTRACTION_MODE","progressive")
+# seconds from job start after which no page escalates further (0 = no limit)
+JOB_TIME_BUDGET_SECONDS = float(os.getenv("JOB_TIME_BUDGET_SECONDS","600"))
 
-from supa import next_job, update_job, save_raw, call_admin_ingest
-from extractors import download_pdf, extract_tables
-from pipeline import dataframe_to_payloads
+from supa import claim_jobs, extend_leases, update_job, finish_job, get_job, attach_job, find_coalesce_target, save_raw, load_raw_by_hash, call_admin_ingest, MAX_JOB_ATTEMPTS, JOB_LEASE_SECONDS
+from supa import split_job, finish_child_job, store_document, fetch_stored_document
+from extractors import download_document, iter_document_tables, progressive_tables, sniff_kind, file_sha256
+from pipeline import dataframe_to_payloads, consolidate, page_scorer
+from fanout import SPLIT_PAGES, plan_ranges, merge_children
+from models import Zone
+from aliases import AliasStore
+from checkpoints import Checkpoint
+from query_service import notify_ingest
+from suggest import refresh_municipality as refresh_suggestions
+from shards import SHARD_DIR, export_municipality as export_shard
+from metrics import timed
+from profiling import should_profile, profile_job
 
 def ctx_from_job(job: Dict[str, Any]) -> Dict[str, Any]:
     return {
@@ -19,103 +37,319 @@ def ctx_from_job(job: Dict[str, Any]) -> Dict[str, Any]:
         "ordinance_url": job["source_url"],
     }
 
+def coalesce(job: Dict[str, Any], **match) -> bool:
+    """Attach the job to an equivalent in-flight or recent run instead of recomputing."""
+    if not COALESCE_JOBS: return False
+    leader = find_coalesce_target(job, **match)
+    if not leader: return False
+    print(f"🔗 Job {job['id']} coalesced with job {leader['id']} (same {', '.join(match)})")
+    attach_job(job["id"], leader["id"])
+    if leader["status"] in ("PROCESSING", "WAITING"):
+        # the leader may have finished between the lookup and the attach
+        leader = get_job(leader["id"])
+        if leader["status"] in ("PENDING", "PROCESSING", "WAITING"): return True
+    finish_job(job["id"], leader["status"], f"Coalesced with job {leader['id']}: {leader['message'] or leader['status']}")
+    return True
+
+def finish(job: Dict[str, Any], status: str, message: Optional[str] = None):
+    if job.get("parent_id"):
+        finish_child_job(job["id"], status, message)
+    else:
+        finish_job(job["id"], status, message)
+
+def extract(doc_path: str, doc_kind: str, ctx: Dict[str, Any], started: float, pages=None):
+    """(page, table[, payloads]) for the document; progressive extraction maps as it scores."""
+    if doc_kind != "pdf" or EXTRACTION_MODE != "progressive":
+        return iter_document_tables(doc_path, doc_kind, EXTRACTION_MODE, pages)
+    deadline = started + JOB_TIME_BUDGET_SECONDS if JOB_TIME_BUDGET_SECONDS > 0 else None
+    return progressive_tables(doc_path, page_scorer(ctx), CONF_THRESH, deadline, pages)
+
 def process_job(job: Dict[str, Any]):
-    update_job(job["id"], status="PROCESSING", message=None)
-    pdf_path = download_pdf(job["source_url"])
-    dfs = extract_tables(pdf_path)
-    if not dfs:
-        update_job(job["id"], status="FAILED", message="No tables found"); return
-
-    ctx = ctx_from_job(job)
-    all_payloads = []
-    best_conf = 0.0
-
-    for df in dfs:
-        payloads = dataframe_to_payloads(df, ctx)
-        if not payloads: continue
-        all_payloads.extend(payloads)
-        best_conf = max(best_conf, max((p.get("_confidence",0.0) for p in payloads), default=0.0))
-
-    if not all_payloads:
-        update_job(job["id"], status="FAILED", message="Parsed 0 payloads"); return
-
-    # Group payloads by zone_code to create consolidated zone records
-    zone_groups = {}
-    for p in all_payloads:
-        zone_code = p["zone_code"]
-        if zone_code not in zone_groups:
-            zone_groups[zone_code] = {
-                "state": p["state"],
-                "county": p["county"], 
-                "municipality": p["municipality"],
-                "zone_code": zone_code,
-                "zone_name": p.get("zone_name"),
-                "ordinance_url": p.get("ordinance_url"),
-                "all_standards": [],
-                "_confidence": p.get("_confidence", 0.0)
-            }
-        # Merge standards from this payload
-        zone_groups[zone_code]["all_standards"].extend(p.get("standards", []))
-        # Keep the highest confidence for this zone
-        zone_groups[zone_code]["_confidence"] = max(
-            zone_groups[zone_code]["_confidence"], 
-            p.get("_confidence", 0.0)
-        )
-
-    consolidated_payloads = list(zone_groups.values())
-
-    # Save raw for review always  
-    save_raw(job["id"], {"payloads": consolidated_payloads}, best_conf)
-
-    # Ingest ALL zones found (remove confidence threshold filtering)
+    started = time.monotonic()
+    attempts = (job.get("attempts") or 0) + 1
+    update_job(job["id"], status="PROCESSING", message=None, attempts=attempts)
+    ckpt = Checkpoint(job)
+    if ckpt.stage:
+        print(f"♻️ Resuming job {job['id']} after stage {ckpt.stage} (attempt {attempts})")
+    # a page-range child of a split job, or a split job back to merge its children
+    child = job.get("parent_id") is not None
+    pages = (job["page_start"], job["page_end"]) if child else None
+    merging = ckpt.stage == "SPLIT"
+
+    # Stage 1: download (not needed once payloads are checkpointed)
+    # HTML and DOCX ordinances skip PDF rendering: their tables are read from the markup
+    doc_path = None if merging or ckpt.reached("MAPPED") else ckpt.downloaded()
+    doc_kind = (ckpt.data.get("doc_kind") or sniff_kind(doc_path)) if doc_path else None
+    if not doc_path and child:
+        # the parent already coalesced; read its stored copy rather than the origin
+        with timed("download"):
+            if job.get("pdf_storage_path"):
+                tmp_path = fetch_stored_document(job["pdf_storage_path"])
+                doc_kind = sniff_kind(tmp_path)
+            else:
+                tmp_path, doc_kind = download_document(job["source_url"])
+            doc_path = ckpt.file(f"source.{doc_kind}")
+            shutil.move(tmp_path, doc_path)
+        ckpt.mark("DOWNLOADED", doc_path=doc_path, doc_kind=doc_kind)
+    elif not doc_path and not merging and not ckpt.reached("MAPPED"):
+        if coalesce(job, source_url=job["source_url"]): return
+        with timed("download"):
+            tmp_path, doc_kind = download_document(job["source_url"])
+            doc_path = ckpt.file(f"source.{doc_kind}")
+            shutil.move(tmp_path, doc_path)
+            content_hash = file_sha256(doc_path)
+        update_job(job["id"], content_hash=content_hash)
+        if coalesce(job, content_hash=content_hash):
+            ckpt.clear(); return
+        ckpt.mark("DOWNLOADED", doc_path=doc_path, doc_kind=doc_kind, content_hash=content_hash)
+
+    # Long PDFs fan out into page-range children that any worker can claim
+    if doc_kind == "pdf" and not child and not ckpt.reached("EXTRACTED"):
+        ranges = plan_ranges(doc_path)
+        if ranges:
+            storage_path = None
+            try:
+                storage_path = store_document(doc_path, f"jobs/{job['id']}/{ckpt.data['content_hash']}.pdf")
+            except Exception as e:
+                print(f"⚠️ Could not store the document for job {job['id']}; children will download it: {e}")
+            # split_job resets the row's stage and checkpoint; the files go only once it
+            # has succeeded, so a retry after a failed split resumes from DOWNLOADED
+            n = split_job(job["id"], ranges, storage_path)
+            ckpt.clear_files()
+            print(f"🧩 Split job {job['id']} into {n} page-range jobs of up to {SPLIT_PAGES} pages")
+            return
+
+    # Stages 2-3: extract, map and consolidate page by page, so only the current
+    # page window's tables and the consolidated zones are held in memory.
+    # Extracted tables are checkpointed as they stream; the mapped result is
+    # checkpointed as the raw extraction itself. A split job instead merges the
+    # raw extractions its children saved.
+    if ckpt.reached("MAPPED"):
+        raw = load_raw_by_hash(ckpt.data["raw_hash"])
+        consolidated_payloads = [Zone.from_dict(p) for p in raw["payloads"]]
+        best_conf = ckpt.data.get("best_conf", 0.0)
+        failed_ranges = ckpt.data.get("failed_ranges") or []
+    else:
+        failed_ranges: List[str] = []
+        if merging:
+            with timed("merge"):
+                zone_groups, best_conf, failed_ranges = merge_children(job["id"])
+        else:
+            ctx = ctx_from_job(job)
+            ctx["aliases"] = AliasStore.load(ctx["state"], ctx["municipality"])
+            tables = ckpt.load_tables() if ckpt.reached("EXTRACTED") else None
+            extracting = tables is None
+            if extracting:
+                tables = ckpt.save_tables(extract(doc_path, doc_kind, ctx, started, pages))
+            zone_groups: Dict[str, Zone] = {}
+            best_conf = 0.0
+            n_tables = 0
+
+            with timed("extract_map"):
+                for page, df, *mapped in tables:
+                    n_tables += 1
+                    with timed("map"):
+                        payloads = mapped[0] if mapped else dataframe_to_payloads(df, ctx)
+                        if not payloads: continue
+                        best_conf = max(best_conf, max((p.confidence for p in payloads), default=0.0))
+                        consolidate(payloads, zone_groups)
+
+            ctx["aliases"].flush()
+
+            if child:
+                # the parent merges and ingests; a range with no zone tables is a normal result
+                with timed("save_raw"):
+                    save_raw(job["id"], {"payloads": [p.to_dict() for p in zone_groups.values()]}, best_conf)
+                ckpt.clear()
+                if finish_child_job(job["id"], "DONE", f"Pages {pages[0]}-{pages[1]}: {len(zone_groups)} zones from {n_tables} tables"):
+                    print(f"🧩 Job {job['id']} was the last page range of job {job['parent_id']}; merge queued")
+                return
+            if not n_tables:
+                ckpt.clear()
+                finish_job(job["id"], "FAILED", "No tables found"); return
+            if extracting:
+                ckpt.mark("EXTRACTED")
+        if not zone_groups:
+            ckpt.clear()
+            finish_job(job["id"], "FAILED", "Parsed 0 payloads" + (f"; failed {'; '.join(failed_ranges)}" if failed_ranges else "")); return
+
+        consolidated_payloads = list(zone_groups.values())
+
+        # Save raw for review always  
+        with timed("save_raw"):
+            raw_hash = save_raw(job["id"], {"payloads": [p.to_dict() for p in consolidated_payloads]}, best_conf)
+        ckpt.mark("MAPPED", raw_hash=raw_hash, best_conf=best_conf, failed_ranges=failed_ranges)
+
+    # Stage 4: ingest ALL zones found (remove confidence threshold filtering)
     if AUTO_INGEST and consolidated_payloads:
-        ingested = 0
+        # zones ingested by an earlier attempt are skipped; call_admin_ingest is an upsert either way
+        done: Dict[str, int] = dict(ckpt.data.get("ingested") or {})
         failed = 0
         for p in consolidated_payloads:
+            if p.zone_code in done: continue
             try:
-                p.pop("_confidence", None)
-                # Fix: Copy all_standards to standards for database ingestion (keep both keys)
-                if "all_standards" in p:
-                    p["standards"] = p["all_standards"]
-                    # Debug: Check for depth standards
-                    depth_standards = [s for s in p["standards"] if s.get("key", "").startswith("depth_")]
-                    if depth_standards:
-                        print(f"🔍 Zone {p.get('zone_code', 'unknown')} - sending {len(depth_standards)} depth standards to database")
-                        for ds in depth_standards:
-                            print(f"  📏 {ds.get('key')}: {ds.get('value_numeric')} {ds.get('units', '')}")
-                call_admin_ingest(p)
-                ingested += 1
+                # Debug: Check for depth standards
+                depth_standards = [s for s in p.standards if s.key.startswith("depth_")]
+                if depth_standards:
+                    print(f"🔍 Zone {p.zone_code} - sending {len(depth_standards)} depth standards to database")
+                    for ds in depth_standards:
+                        print(f"  📏 {ds.key}: {ds.value_numeric} {ds.units or ''}")
+                with timed("ingest_zone"):
+                    done[p.zone_code] = call_admin_ingest(p)
+                ckpt.record(ingested=done)
             except Exception as e:
-                print(f"❌ Failed to ingest zone {p.get('zone_code', 'unknown')}: {e}")
+                print(f"❌ Failed to ingest zone {p.zone_code}: {e}")
                 failed += 1
-        
+        ingested = len(done)
+        if ingested:
+            try:
+                refresh_suggestions(job["state_code"], job["municipality"])
+            except Exception as e:
+                print(f"⚠️ Could not refresh suggestions for {job['municipality']}: {e}")
+            if SHARD_DIR:
+                try:
+                    with timed("export_shard"):
+                        export_shard(job["state_code"], job["municipality"])
+                except Exception as e:
+                    print(f"⚠️ Could not export search shard for {job['municipality']}: {e}")
+            notify_ingest(job["state_code"], job["county"], job["municipality"], consolidated_payloads)
+
         msg = f"Ingested {ingested}/{len(consolidated_payloads)} zones (failed: {failed}); best_conf={best_conf:.2f}"
         status = "DONE" if failed == 0 else "PARTIAL_SUCCESS" if ingested > 0 else "FAILED"
-        update_job(job["id"], status=status, message=msg)
+        if failed_ranges:
+            # zones on the failed page ranges are missing
+            msg += f"; {len(failed_ranges)} page ranges failed ({'; '.join(failed_ranges)})"
+            if status == "DONE": status = "PARTIAL_SUCCESS"
+        if failed and attempts < MAX_JOB_ATTEMPTS:
+            # Requeue; the retry resumes at ingest and skips the zones already in `ingested`
+            update_job(job["id"], status="PENDING", worker_id=None, lease_expires_at=None, message=f"Retrying: {msg}")
+            return
+        ckpt.clear()
+        finish_job(job["id"], status, msg)
     else:
-        update_job(job["id"], status="NEEDS_REVIEW",
-                   message=f"Found {len(consolidated_payloads)} zones; best_conf={best_conf:.2f} (AUTO_INGEST disabled)")
+        ckpt.clear()
+        finish_job(job["id"], "NEEDS_REVIEW",
+                   f"Found {len(consolidated_payloads)} zones; best_conf={best_conf:.2f} (AUTO_INGEST disabled)")
+
+# Heavy modules the job path needs; imported once in the prefork parent so
+# children start warm instead of each paying the import cost.
+WARM_IMPORTS = ("pandas", "camelot", "cv2", "pdfplumber", "rapidfuzz", "yaml", "requests", "supabase")
+
+def warm_imports():
+    import importlib
+    t0 = time.perf_counter()
+    for name in WARM_IMPORTS:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"⚠️ Could not preload {name}: {e}")
+    print(f"🔥 Preloaded {len(WARM_IMPORTS)} modules in {time.perf_counter() - t0:.1f}s")
+
+def prefork(n: int):
+    """Import once, then fork n warm workers and replace any that exit."""
+    import signal
+    warm_imports()
+    children: Dict[int, int] = {}
+    stopping = False
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                run_worker(f"{os.getpid()}/{slot}")
+            finally:
+                os._exit(0)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try: os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError: pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(n):
+        spawn(slot)
+    print(f"🍴 Forked {n} workers: {sorted(children)}")
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        slot = children.pop(pid, None)
+        if slot is not None and not stopping:
+            print(f"⚠️ Worker {pid} exited ({status}), respawning")
+            time.sleep(1)
+            spawn(slot)
 
 def main():
-    from supa import POLL_INTERVAL
-    print(f"🚀 Zoning worker started, polling every {POLL_INTERVAL} seconds...")
+    if WORKER_PROCESSES > 1 and hasattr(os, "fork"):
+        prefork(WORKER_PROCESSES)
+    else:
+        run_worker()
+
+def heartbeat(worker_id: str, held: set, stop: threading.Event):
+    """Renew the leases of claimed jobs until stop is set."""
+    while not stop.wait(JOB_LEASE_SECONDS / 3):
+        ids = sorted(held)
+        if not ids: continue
+        try:
+            lost = set(ids) - set(extend_leases(worker_id, ids))
+            for job_id in lost & held:
+                print(f"⚠️ Lease on job {job_id} was lost; another worker may run it")
+        except Exception as e:
+            print(f"⚠️ Lease heartbeat failed: {e}")
+
+def job_errored(job: Dict[str, Any], error_msg: str):
+    """Requeue a job whose processing raised, or fail it once out of attempts."""
+    attempts = (job.get("attempts") or 0) + 1
+    if attempts < MAX_JOB_ATTEMPTS:
+        # Requeue; the retry resumes from the job's last checkpoint
+        update_job(job["id"], status="PENDING", attempts=attempts,
+                   worker_id=None, lease_expires_at=None, message=f"Retrying after: {error_msg}")
+    else:
+        Checkpoint(job).clear()
+        finish(job, "FAILED", f"{error_msg}\n{traceback.format_exc()[:1500]}")
+
+def run_worker(name: str = "main"):
+    from supa import POLL_INTERVAL, BATCH_SIZE
+    worker_id = f"{socket.gethostname()}/{os.getpid()}/{name}"
+    held: set = set()
+    stop = threading.Event()
+    threading.Thread(target=heartbeat, args=(worker_id, held, stop), name="lease-heartbeat", daemon=True).start()
+    print(f"🚀 Zoning worker {worker_id} started, claiming up to {BATCH_SIZE} jobs every {POLL_INTERVAL} seconds...")
     while True:
         try:
-            job = next_job()
-            if not job:
-                print("📋 No pending jobs found, waiting...")
-                import time; time.sleep(POLL_INTERVAL); continue
-            print(f"📄 Processing job {job['id']}: {job['source_url']}")
-            process_job(job)
+            # One round trip claims the whole batch; unstarted jobs stay leased meanwhile
+            batch = claim_jobs(worker_id)
         except Exception as e:
-            error_msg = f"{type(e).__name__}: {e}"
-            print(f"❌ Error getting/processing job: {error_msg}")
-            if 'job' in locals() and job:
+            print(f"❌ Error claiming jobs: {type(e).__name__}: {e}")
+            time.sleep(POLL_INTERVAL); continue
+        if not batch:
+            print("📋 No pending jobs found, waiting...")
+            time.sleep(POLL_INTERVAL); continue
+        held.update(j["id"] for j in batch)
+        for job in batch:
+            try:
+                print(f"📄 Processing job {job['id']}: {job['source_url']}")
+                if should_profile(job):
+                    profile_job(job, process_job)
+                else:
+                    process_job(job)
+            except Exception as e:
+                error_msg = f"{type(e).__name__}: {e}"
+                print(f"❌ Error processing job {job['id']}: {error_msg}")
                 try:
-                    update_job(job["id"], status="FAILED", message=f"{error_msg}\n{traceback.format_exc()[:1500]}")
+                    job_errored(job, error_msg)
                 except:
-                    pass  # Don't crash if we can't update the job
-            import time; time.sleep(POLL_INTERVAL)  # Wait before retrying
+                    pass  # Don't crash if we can't update the job; its lease will expire
+                time.sleep(POLL_INTERVAL)  # Wait before retrying
+            finally:
+                held.discard(job["id"])
 
 if __name__ == "__main__":
     main()
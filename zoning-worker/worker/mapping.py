@@ -1,5 +1,4 @@
-import re, unicodedata, yaml, os
-from rapidfuzz import fuzz, process
+import re, unicodedata, os
 
 # Canonical keys mapped to your specific database fields - EXPANDED for better coverage
 CANON = {
@@ -213,6 +212,7 @@ def norm(s: str) -> str:
     return s
 
 def load_profile(state: str, muni: str) -> dict:
+    import yaml
     # profile filename pattern: "Municipality_State.yml"
     name = f"{muni.strip().replace(' ','_')}_{state.upper().strip()}.yml"
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -223,7 +223,17 @@ def load_profile(state: str, muni: str) -> dict:
         with open(os.path.join(script_dir, "profiles/default.yml"), "r") as f:
             return yaml.safe_load(f) or {}
 
-def header_map(raw_headers: list[str], profile: dict) -> dict[str, str|None]:
+_CANON_NORM: list[tuple[str, str, str, int]] | None = None
+
+def _canon_norm() -> list[tuple[str, str, str, int]]:
+    # (canonical key, raw pattern, normalized pattern, token count), normalized once per process
+    global _CANON_NORM
+    if _CANON_NORM is None:
+        _CANON_NORM = [(k, a, norm(a), len(norm(a).split())) for k, alts in CANON.items() for a in alts]
+    return _CANON_NORM
+
+def header_map(raw_headers: list[str], profile: dict, aliases=None) -> dict[str, str|None]:
+    from rapidfuzz import fuzz
     mapping: dict[str, str|None] = {}
     prof_aliases = profile.get("aliases", {})  # exact header -> canonical
     # prefer explicit profile map
@@ -231,17 +241,20 @@ def header_map(raw_headers: list[str], profile: dict) -> dict[str, str|None]:
         hn = norm(h)
         if h in prof_aliases:
             mapping[h] = prof_aliases[h]; continue
+        # then previously learned / reviewed resolutions (AliasStore)
+        if aliases is not None:
+            found, key = aliases.lookup(hn)
+            if found:
+                mapping[h] = key; continue
         # fuzzy to CANON
         candidates = []
-        for k, alts in CANON.items():
-            for a in alts:
-                score = fuzz.token_set_ratio(hn, norm(a)) / 100.0
-                # Add specificity bonus - prefer patterns with more tokens/words
-                pattern_tokens = len(norm(a).split())
-                header_tokens = len(hn.split())
-                specificity_bonus = min(pattern_tokens, header_tokens) * 0.01  # Small bonus for specificity
-                adjusted_score = min(1.0, score + specificity_bonus)
-                candidates.append((adjusted_score, k, a))
+        header_tokens = len(hn.split())
+        for k, a, an, pattern_tokens in _canon_norm():
+            score = fuzz.token_set_ratio(hn, an) / 100.0
+            # Add specificity bonus - prefer patterns with more tokens/words
+            specificity_bonus = min(pattern_tokens, header_tokens) * 0.01  # Small bonus for specificity
+            adjusted_score = min(1.0, score + specificity_bonus)
+            candidates.append((adjusted_score, k, a))
         
         if candidates:
             # Sort by score (desc), then by pattern specificity (prefer longer patterns)
@@ -253,6 +266,8 @@ def header_map(raw_headers: list[str], profile: dict) -> dict[str, str|None]:
         # Use lower threshold for area fields to be more aggressive
         threshold = 0.55 if any("area" in alt.lower() for alt in CANON.get(best_key or "", [])) else float(profile.get("threshold", 0.72))
         mapping[h] = best_key if best_score >= threshold else None
+        if aliases is not None and mapping[h]:
+            aliases.learn(hn, mapping[h], best_score)
         
         # Debug for corner/interior lots specifically
         if "corner" in hn or "interior" in hn:
@@ -0,0 +1,20 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# Stage timings of process_job. Nothing is recorded unless a collector is
+# installed (loadtest.py does), so the hooks cost one perf_counter pair each.
+_collector: Optional[Callable[[str, float], None]] = None
+
+def set_collector(fn: Optional[Callable[[str, float], None]]):
+    global _collector
+    _collector = fn
+
+@contextmanager
+def timed(stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if _collector is not None:
+            _collector(stage, time.perf_counter() - t0)
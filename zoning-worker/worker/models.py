@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Compact value types shared by the pipeline, consolidation and ingest.
+# Serialized shapes match the JSON stored in raw_extractions / standards.all_standards,
+# optional keys are only emitted when set (compute_confidence and the SQL
+# get_standard_value helper both rely on key presence).
+
+@dataclass(slots=True)
+class Measurement:
+    raw: str
+    value: Optional[float] = None
+    units: Optional[str] = None
+    notes: Optional[str] = None
+    # every number in the cell, range bounds and an embedded lot depth ("20,000 sf x 150")
+    values: Tuple[float, ...] = ()
+    low: Optional[float] = None
+    high: Optional[float] = None
+    depth: Optional[float] = None
+
+    @property
+    def is_range(self) -> bool:
+        return self.low is not None
+
+    @property
+    def is_empty(self) -> bool:
+        return self.value is None and self.raw.strip().lower() in {"", "—", "-", "--", "n/a", "na"}
+
+@dataclass(slots=True)
+class StandardEntry:
+    key: str
+    value_numeric: Optional[float] = None
+    value_text: Optional[str] = None
+    units: Optional[str] = None
+    notes: Optional[str] = None
+    section_ref: Optional[str] = None
+    range_low: Optional[float] = None
+    range_high: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"key": self.key, "units": self.units, "section_ref": self.section_ref}
+        if self.value_numeric is not None: d["value_numeric"] = self.value_numeric
+        if self.value_text is not None: d["value_text"] = self.value_text
+        if self.notes is not None: d["notes"] = self.notes
+        if self.range_low is not None: d["range_low"] = self.range_low
+        if self.range_high is not None: d["range_high"] = self.range_high
+        return d
+
+    @property
+    def number(self) -> Optional[float]:
+        """The value ingest uses: the number, or the lower bound of a range."""
+        return self.value_numeric if self.value_numeric is not None else self.range_low
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "StandardEntry":
+        return cls(
+            key=d["key"],
+            value_numeric=d.get("value_numeric"),
+            value_text=d.get("value_text"),
+            # older payloads occasionally used "unit"
+            units=d.get("units", d.get("unit")),
+            notes=d.get("notes"),
+            section_ref=d.get("section_ref"),
+            range_low=d.get("range_low"),
+            range_high=d.get("range_high"),
+        )
+
+@dataclass(slots=True)
+class Zone:
+    state: str
+    county: str
+    municipality: str
+    zone_code: str
+    zone_name: Optional[str] = None
+    ordinance_url: Optional[str] = None
+    standards: List[StandardEntry] = field(default_factory=list)
+    permitted_uses: List[str] = field(default_factory=list)
+    conditional_uses: List[str] = field(default_factory=list)
+    confidence: float = 0.0
+
+    def merge(self, other: "Zone"):
+        """Fold another extraction of the same zone_code into this one."""
+        self.standards.extend(other.standards)
+        self.confidence = max(self.confidence, other.confidence)
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {
+            "state": self.state,
+            "county": self.county,
+            "municipality": self.municipality,
+            "zone_code": self.zone_code,
+            "zone_name": self.zone_name,
+            "ordinance_url": self.ordinance_url,
+            "all_standards": [s.to_dict() for s in self.standards],
+            "_confidence": self.confidence,
+        }
+        if self.permitted_uses: d["permitted_uses"] = list(self.permitted_uses)
+        if self.conditional_uses: d["conditional_uses"] = list(self.conditional_uses)
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Zone":
+        stds = d.get("all_standards", d.get("standards", []))
+        return cls(
+            state=d["state"],
+            county=d["county"],
+            municipality=d["municipality"],
+            zone_code=d["zone_code"],
+            zone_name=d.get("zone_name"),
+            ordinance_url=d.get("ordinance_url"),
+            standards=[StandardEntry.from_dict(s) for s in stds],
+            permitted_uses=list(d.get("permitted_uses", [])),
+            conditional_uses=list(d.get("conditional_uses", [])),
+            confidence=d.get("_confidence", 0.0),
+        )
@@ -1,5 +1,6 @@
 import re
-from typing import Tuple, Any
+from typing import Any
+from models import Measurement, StandardEntry
 
 REQUIRED = {"pb_front_yard_ft","pb_side_yard_ft","pb_rear_yard_ft","max_height_ft","max_lot_coverage_pct"}
 
@@ -7,77 +8,116 @@ def acres_to_sq_ft(acres: float) -> float:
     """Convert acres to square feet. 1 acre = 43,560 square feet"""
     return acres * 43560
 
-def parse_cell(cell: Any) -> Tuple[float|None, str|None, str|None, str]:
+_NUM = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|\.\d+"
+# One scan per cell. Alternatives are tried left to right, so longer unit
+# spellings come before their prefixes ("du/ac" before "ac", "sq ft" before "ft").
+# Fractions ("1/2", "1 1/2") come before numbers and slashes; only small proper
+# fractions count, so side-yard pairs like "10/25" stay two numbers. A digit in
+# parentheses is a footnote only directly after a value ("20(1)", "20 (1)").
+_TOKEN = re.compile(
+    r"(?P<frac>(?<![\d.,/])(?:\d+ )?[1-7]/[2348](?![\d.,/]))"
+    rf"|(?P<num>{_NUM})"
+    r"|\((?P<foot>[A-Za-z∆□]+|(?:(?<=\d\()|(?<=\d \())\d{1,2})\)"
+    r"|(?P<pct>%)"
+    r"|(?P<du>(?<![a-z])(?:du|dwelling\s+units?|units?)\s*(?:/|per)\s*(?:gross\s+)?ac(?:res?|\.)?)"
+    r"|(?P<sf>(?<![a-z])(?:sq\.?\s*f(?:ee)?t\.?|square\s+f(?:ee|oo)t|s\.?f\.?(?![a-z])))"
+    r"|(?P<ac>(?<![a-z])ac(?:res?|\.)?(?![a-z]))"
+    r"|(?P<ft>(?<![a-z])f(?:ee)?t\.?(?![a-z])|')"
+    r"|(?P<rng>–|—|-|\bto\b)"
+    r"|(?P<x>(?<![a-z])[x×](?![a-z]))"
+    r"|(?P<slash>/)"
+    r"|(?P<depth>depth)"
+    r"|(?P<deep>deep)",
+    re.I,
+)
+_UNITS = {"pct": "%", "du": "du/ac", "sf": "sf", "ac": "ac", "ft": "ft"}
+_EMPTY = {"", "—", "-", "--", "n/a", "na"}
+
+def _gap(text: str, a, b, allowed: str = "") -> bool:
+    """True when only whitespace (and `allowed` chars) separate tokens a and b."""
+    return not text[a.end():b.start()].strip(" " + allowed)
+
+def _number(m) -> float:
+    text = m.group().replace(",", "")
+    if "/" not in text:
+        return float(text)
+    whole, _, frac = text.rpartition(" ")
+    n, d = frac.split("/")
+    return float(whole or 0) + int(n) / int(d)
+
+def lex_cell(cell: Any) -> Measurement:
+    """Lex a table cell into a Measurement in a single pass.
+
+    Value precedence: a range (value is the lower bound) unless a percentage
+    or acreage comes before it, then a percentage, then acres, then the first
+    number. Footnote markers like "(B)" or "20(1)" go to notes; lot sizes such
+    as "20,000 sf x 150" or "Depth: 150 ft" also set depth.
+    """
     raw = str(cell or "").strip()
     raw_norm = re.sub(r"\s+", " ", raw)
-    if raw in {"", "—", "-", "--", "n/a", "na", "N/A"}:
-        return None, None, None, raw
-    # footnote markers
-    notes = " ".join(re.findall(r"\(([A-Za-z∆□]+)\)", raw)) or None
-    # percent
-    m = re.search(r"(\d+(?:\.\d+)?)\s*%", raw)
-    if m: return float(m.group(1)), "%", notes, raw_norm
-    # acres
-    m = re.search(r"(\d+(?:\.\d+)?)\s*ac", raw, flags=re.I)
-    if m: return float(m.group(1)), "ac", notes, raw_norm
-    # range (with comma support for thousands)
-    m = re.search(r"(\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?)\s*(?:–|-|to)\s*(\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?)", raw_norm)
-    if m: 
-        # Remove commas before converting to float
-        num_str = m.group(1).replace(",", "")
-        return float(num_str), "range", notes, raw_norm
-    # number (with comma support for thousands)
-    m = re.search(r"(\d{1,3}(?:,\d{3})*(?:\.\d+)?|\d+(?:\.\d+)?)", raw_norm)
-    if m: 
-        # Remove commas before converting to float
-        num_str = m.group(1).replace(",", "")
-        return float(num_str), None, notes, raw_norm
-    return None, None, notes, raw_norm
+    if raw.lower() in _EMPTY:
+        return Measurement(raw)
 
-def extract_depth_from_text(text: str) -> float|None:
-    """Extract depth measurements from lot size text.
-    
-    Common patterns:
-    - "20,000 sq ft x 150 ft depth"
-    - "20,000 x 150"
-    - "Area: 20,000 sq ft, Depth: 150 ft"
-    - "20,000 sf / 150 ft deep"
-    """
-    if not text:
-        return None
-        
-    text = str(text).lower().strip()
-    
-    # Pattern 1: "number x number" (second number is depth)
-    pattern1 = re.search(r'(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:sq\s*ft|sf|square\s*feet)?\s*x\s*(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:ft|feet)?', text)
-    if pattern1:
-        depth_str = pattern1.group(2).replace(',', '')
-        return float(depth_str)
-    
-    # Pattern 2: Explicit "depth: number"
-    pattern2 = re.search(r'depth:?\s*(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:ft|feet)?', text)
-    if pattern2:
-        depth_str = pattern2.group(1).replace(',', '')
-        return float(depth_str)
-    
-    # Pattern 3: "number ft deep" or "number feet deep"
-    pattern3 = re.search(r'(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:ft|feet)\s+deep', text)
-    if pattern3:
-        depth_str = pattern3.group(1).replace(',', '')
-        return float(depth_str)
-    
-    # Pattern 4: "/" separator (area / depth)
-    pattern4 = re.search(r'(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:sq\s*ft|sf|square\s*feet)?\s*/\s*(\d{1,3}(?:,\d{3})*(?:\.\d+)?)\s*(?:ft|feet)', text)
-    if pattern4:
-        depth_str = pattern4.group(2).replace(',', '')
-        return float(depth_str)
-    
-    return None
+    toks = [("num" if m.lastgroup == "frac" else m.lastgroup, m) for m in _TOKEN.finditer(raw_norm)]
+    notes = " ".join(m.group("foot") for kind, m in toks if kind == "foot") or None
+    values = tuple(_number(m) for kind, m in toks if kind == "num")
+
+    pct = acres = rng = first = depth = None
+    depth_rank = 5
+    for i, (kind, m) in enumerate(toks):
+        if kind == "depth" and depth_rank > 2:
+            n = toks[i + 1] if i + 1 < len(toks) else None
+            if n and n[0] == "num" and _gap(raw_norm, m, n[1], ":"):
+                depth, depth_rank = n[1], 2
+        if kind != "num":
+            continue
+        first = first or m
+        j = i + 1
+        unit = toks[j][0] if j < len(toks) and toks[j][0] in _UNITS and _gap(raw_norm, m, toks[j][1]) else None
+        if unit == "pct" and pct is None: pct = m
+        if unit == "ac" and acres is None: acres = m
+        if unit: j += 1
+        sep = toks[j] if j < len(toks) and _gap(raw_norm, toks[j - 1][1], toks[j][1]) else None
+        nxt = toks[j + 1] if sep and j + 1 < len(toks) and toks[j + 1][0] == "num" and _gap(raw_norm, sep[1], toks[j + 1][1]) else None
+        if not sep:
+            continue
+        if sep[0] == "rng" and not unit and nxt and rng is None:
+            rng = (m, nxt[1])
+        elif sep[0] == "x" and unit in (None, "sf") and nxt and depth_rank > 1:
+            depth, depth_rank = nxt[1], 1
+        elif sep[0] == "deep" and unit == "ft" and depth_rank > 3:
+            depth, depth_rank = m, 3
+        elif sep[0] == "slash" and unit in (None, "sf") and nxt and depth_rank > 4:
+            after = toks[j + 2] if j + 2 < len(toks) else None
+            if after and after[0] == "ft" and _gap(raw_norm, nxt[1], after[1]):
+                depth, depth_rank = nxt[1], 4
+
+    num = _number
+    out = Measurement(raw_norm, notes=notes, values=values, depth=num(depth) if depth else None)
+    # a range wins unless a percentage/acreage appears before it ("10-15%" is a range)
+    if rng and all(t is None or t.start() >= rng[1].start() for t in (pct, acres)):
+        out.value, out.low, out.high = num(rng[0]), num(rng[0]), num(rng[1])
+        # a unit after the upper bound applies to the whole range ("1-2 ac", "10 to 15%")
+        for kind, m in toks:
+            if m.start() > rng[1].start() and kind in _UNITS:
+                if _gap(raw_norm, rng[1], m): out.units = _UNITS[kind]
+                break
+    elif pct:
+        out.value, out.units = num(pct), "%"
+    elif acres:
+        out.value, out.units = num(acres), "ac"
+    elif first:
+        out.value = num(first)
+        j = next(i for i, (_, m) in enumerate(toks) if m is first) + 1
+        if j < len(toks) and toks[j][0] in _UNITS and _gap(raw_norm, first, toks[j][1]):
+            out.units = _UNITS[toks[j][0]]
+    return out
 
-def compute_confidence(header_map: dict, standards: list[dict]) -> float:
+def compute_confidence(header_map: dict, standards: list[StandardEntry]) -> float:
     mapped = sum(1 for v in header_map.values() if v)
     total = max(1, len(header_map))
     header_cov = mapped / total
-    req_cov = sum(1 for k in REQUIRED if any(s["key"]==k for s in standards)) / max(1, len(REQUIRED))
-    parsable = sum(1 for s in standards if ("value_numeric" in s or "value_text" in s)) / max(1, len(standards))
+    keys = {s.key for s in standards}
+    req_cov = sum(1 for k in REQUIRED if k in keys) / max(1, len(REQUIRED))
+    parsable = sum(1 for s in standards if (s.value_numeric is not None or s.value_text is not None)) / max(1, len(standards))
     return 0.5*header_cov + 0.3*req_cov + 0.2*parsable
@@ -1,8 +1,11 @@
-import pandas as pd
-import re
-from typing import Dict, Any, List
+from __future__ import annotations
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List
 from mapping import header_map, load_profile
-from parsers import parse_cell, compute_confidence, extract_depth_from_text
+from models import Measurement, StandardEntry, Zone
+from parsers import lex_cell, compute_confidence
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 def coerce_headers(df: pd.DataFrame) -> list[str]:
     # Handle complex multi-level headers by combining up to 3 rows with parent propagation
@@ -74,8 +77,8 @@ def coerce_headers(df: pd.DataFrame) -> list[str]:
 def dataframe_to_payloads(
     df: pd.DataFrame,
     ctx: Dict[str, Any]
-) -> List[Dict[str, Any]]:
-    df = df.copy()
+) -> List[Zone]:
+    # dropna already returns new frames, so the caller's table is never modified
     df = df.dropna(how="all", axis=0).dropna(how="all", axis=1)
     if df.empty: return []
 
@@ -85,11 +88,11 @@ def dataframe_to_payloads(
     df.columns = headers
 
     profile = load_profile(ctx["state"], ctx["municipality"])
-    hmap = header_map(list(df.columns), profile)
+    hmap = header_map(list(df.columns), profile, ctx.get("aliases"))
 
     # find zone column
     zone_col = next((c for c,k in hmap.items() if k=="zone"), df.columns[0])
-    payloads: List[Dict[str, Any]] = []
+    payloads: List[Zone] = []
 
     for _, row in df.iterrows():
         # Handle pandas Series properly for zone column
@@ -111,18 +114,17 @@ def dataframe_to_payloads(
         
         print(f"🔍 Processing zone: '{zone_val}'")
 
-        payload = {
-            "state": ctx["state"],
-            "county": ctx["county"],
-            "municipality": ctx["municipality"],
-            "zone_code": zone_val,
-            "zone_name": None,
-            "ordinance_url": ctx.get("ordinance_url"),
-            "standards": [],
-            "permitted_uses": [],
-            "conditional_uses": []
-        }
+        payload = Zone(
+            state=ctx["state"],
+            county=ctx["county"],
+            municipality=ctx["municipality"],
+            zone_code=zone_val,
+            ordinance_url=ctx.get("ordinance_url"),
+        )
 
+        # Each cell is lexed once; the depth pass below reuses these results
+        lexed: Dict[str, Measurement] = {}
+        embedded_depths: List[StandardEntry] = []
         for raw_col, canon in hmap.items():
             if canon and canon != "zone":
                 # Handle pandas Series properly
@@ -132,50 +134,27 @@ def dataframe_to_payloads(
                         cell_value = cell_value.iloc[0] if len(cell_value) > 0 else ""
                 else:
                     cell_value = ""
-                # Special handling for maximum density - always store as text
-                if canon == "maximum_density":
-                    if str(cell_value).strip() and str(cell_value).strip().lower() not in {"—", "-", "--", "n/a", "na"}:
-                        entry = {"key": canon, "units": None, "section_ref": None}
-                        entry["value_text"] = str(cell_value).strip()
-                        # Still extract footnote markers
-                        notes = " ".join(re.findall(r"\(([A-Za-z∆□]+)\)", str(cell_value))) or None
-                        if notes: entry["notes"] = notes
-                    else:
-                        continue
+                m = lexed[raw_col] = lex_cell(cell_value)
+                if m.is_empty:
+                    continue
+                entry = StandardEntry(canon, units=m.units, notes=m.notes)
+                # Maximum density is always kept as text; ranges keep their text plus bounds
+                if canon == "maximum_density" or m.is_range or m.value is None:
+                    entry.value_text = m.raw
+                    if canon == "maximum_density" and not m.is_range:
+                        entry.value_numeric = m.value
                 else:
-                    vnum, units, note, raw_text = parse_cell(cell_value)
-                    if vnum is None and (raw_text.strip()=="" or raw_text.strip().lower() in {"—","-","n/a"}):
-                        continue
-                    entry = {"key": canon, "units": units, "section_ref": None}
-                    if units == "range" or (vnum is None and raw_text):
-                        entry["value_text"] = raw_text
-                    elif vnum is not None:
-                        entry["value_numeric"] = vnum
-                    else:
-                        entry["value_text"] = raw_text
-                    if note: entry["notes"] = note
-                payload["standards"].append(entry)
+                    entry.value_numeric = m.value
+                if m.is_range:
+                    entry.range_low, entry.range_high = m.low, m.high
+                payload.standards.append(entry)
 
-        # Extract depth measurements with positional awareness
-        # First, try to extract from area columns (embedded depth info)
-        for raw_col, canon in hmap.items():
-            if canon in ["area_interior_lots", "area_corner_lots"]:
-                if raw_col in row.index:
-                    cell_value = row[raw_col]
-                    if hasattr(cell_value, 'iloc'):
-                        cell_value = cell_value.iloc[0] if len(cell_value) > 0 else ""
-                    
-                    depth_value = extract_depth_from_text(str(cell_value))
-                    if depth_value:
-                        depth_key = "depth_interior_lots" if canon == "area_interior_lots" else "depth_corner_lots"
-                        depth_entry = {
-                            "key": depth_key, 
-                            "value_numeric": depth_value,
-                            "units": "ft", 
-                            "section_ref": None
-                        }
-                        payload["standards"].append(depth_entry)
-                        print(f"📏 Extracted {depth_key}: {depth_value} ft from '{str(cell_value)[:50]}...'")
+                # Area cells often carry the lot depth too ("20,000 sf x 150")
+                if canon in ("area_interior_lots", "area_corner_lots") and m.depth:
+                    depth_key = "depth_interior_lots" if canon == "area_interior_lots" else "depth_corner_lots"
+                    embedded_depths.append(StandardEntry(depth_key, value_numeric=m.depth, units="ft"))
+                    print(f"📏 Extracted {depth_key}: {m.depth} ft from '{m.raw[:50]}...'")
+        payload.standards.extend(embedded_depths)
 
         # Second, use positional logic for separate depth columns
         # Find columns that contain "depth" text and determine if they're for interior or corner lots
@@ -189,8 +168,9 @@ def dataframe_to_payloads(
                     cell_value = cell_value.iloc[0] if len(cell_value) > 0 else ""
                 
                 # Check if this is a numeric depth value
-                try:
-                    depth_value = float(str(cell_value).strip().replace(",", ""))
+                m = lexed.get(depth_col) or lex_cell(cell_value)
+                if m.value is not None and not m.is_range and m.units in (None, "ft"):
+                    depth_value = m.value
                     
                     # Use positional logic to determine if this is interior or corner
                     # Look for area columns before this depth column
@@ -234,22 +214,33 @@ def dataframe_to_payloads(
                             print(f"🔍 DEPTH DEBUG: Defaulting to interior depth for column {col_idx} ('{depth_col}'), no area type detected")
                     
                     # Check if we already have this depth type from area extraction
-                    existing_keys = [s.get("key") for s in payload["standards"]]
-                    if depth_key not in existing_keys:
-                        depth_entry = {
-                            "key": depth_key,
-                            "value_numeric": depth_value,
-                            "units": "ft",
-                            "section_ref": None
-                        }
-                        payload["standards"].append(depth_entry)
+                    if not any(s.key == depth_key for s in payload.standards):
+                        payload.standards.append(StandardEntry(depth_key, value_numeric=depth_value, units="ft"))
                         print(f"📏 Positional extract {depth_key}: {depth_value} ft (column {col_idx}, area_before: {area_before_depth})")
-                    
-                except (ValueError, TypeError):
-                    # Not a numeric depth value, skip
-                    pass
 
-        payload["_confidence"] = compute_confidence(hmap, payload["standards"])
+        payload.confidence = compute_confidence(hmap, payload.standards)
         payloads.append(payload)
 
     return payloads
+
+def page_scorer(ctx: Dict[str, Any]):
+    """Scorer for extractors.progressive_tables: maps a page's tables and rates
+    them by mean payload confidence (0 when nothing maps). Mapping learns into a
+    draft of the alias store, adopted only if the page keeps those tables."""
+    aliases = ctx.get("aliases")
+    def score(tables):
+        draft = aliases.draft() if aliases is not None else None
+        mapped = [dataframe_to_payloads(df, {**ctx, "aliases": draft}) for df in tables]
+        confs = [p.confidence for payloads in mapped for p in payloads]
+        keep = (lambda: aliases.adopt(draft)) if draft is not None else None
+        return (sum(confs) / len(confs) if confs else 0.0), mapped, keep
+    return score
+
+def consolidate(payloads: Iterable[Zone], zone_groups: Dict[str, Zone]) -> Dict[str, Zone]:
+    """Group payloads by zone_code into consolidated zone records, in place."""
+    for p in payloads:
+        if p.zone_code in zone_groups:
+            zone_groups[p.zone_code].merge(p)
+        else:
+            zone_groups[p.zone_code] = p
+    return zone_groups
@@ -0,0 +1,130 @@
+import os, sys, time, marshal, tempfile, threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+import rawstore
+
+# Opt-in profiling of single jobs. A job is profiled when its `profile` column
+# is set or it matches PROFILE_JOBS; everything else runs without a profiler.
+# A profiled run records a deterministic cProfile dump (pstats) and stack
+# samples in collapsed "a;b;c count" form (flamegraph.pl, speedscope), both
+# stored compressed in job_profiles next to the job's raw extraction.
+#
+#   PROFILE_JOBS=all | Brick,NJ|Middletown
+#   python profiling.py list [job_id] | show <id> [sort] | export <id> [dir]
+
+# "all", or comma-separated municipalities ("Brick") / "STATE|Municipality" keys
+PROFILE_JOBS = {p.strip().lower() for p in os.getenv("PROFILE_JOBS", "").split(",") if p.strip()}
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+
+def should_profile(job: Dict[str, Any]) -> bool:
+    if job.get("profile"):
+        return True
+    if not PROFILE_JOBS:
+        return False
+    muni = (job.get("municipality") or "").lower()
+    return bool(PROFILE_JOBS & {"all", muni, f"{(job.get('state_code') or '').lower()}|{muni}"})
+
+def _label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """Samples one thread's stack from a background thread into collapsed stacks."""
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id, self.interval = thread_id, interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+def profile_job(job: Dict[str, Any], run: Callable[[Dict[str, Any]], Any]):
+    """Run run(job) under cProfile and the stack sampler, then store the profile."""
+    import cProfile
+    from supa import save_job_profile
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    error: Optional[BaseException] = None
+    sampler.start()
+    t0 = time.perf_counter()
+    profiler.enable()
+    try:
+        return run(job)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - t0
+        sampler.stop()
+        try:
+            profiler.create_stats()
+            codec, pstats_blob = rawstore.compress(marshal.dumps(profiler.stats))
+            _, collapsed_blob = rawstore.compress(sampler.collapsed().encode())
+            pid = save_job_profile({
+                "job_id": job["id"],
+                "attempt": (job.get("attempts") or 0) + 1,
+                "wall_seconds": round(wall, 3),
+                "samples": sum(sampler.stacks.values()),
+                "error": f"{type(error).__name__}: {error}" if error else None,
+                "codec": codec,
+                "pstats": rawstore.to_bytea(pstats_blob),
+                "collapsed": rawstore.to_bytea(collapsed_blob),
+            })
+            print(f"🔬 Saved profile {pid} for job {job['id']} ({wall:.1f}s, {sum(sampler.stacks.values())} samples)")
+        except Exception as e:
+            print(f"⚠️ Could not save profile for job {job['id']}: {e}")
+
+def load_stats(row: Dict[str, Any]):
+    import pstats
+    with tempfile.NamedTemporaryFile(suffix=".pstats", delete=False) as f:
+        f.write(rawstore.decompress(row["codec"], rawstore.from_bytea(row["pstats"])))
+    try:
+        return pstats.Stats(f.name)
+    finally:
+        os.unlink(f.name)
+
+def export(row: Dict[str, Any], directory: str = ".") -> tuple:
+    base = os.path.join(directory, f"job-{row['job_id']}-profile-{row['id']}")
+    with open(base + ".pstats", "wb") as f:
+        f.write(rawstore.decompress(row["codec"], rawstore.from_bytea(row["pstats"])))
+    with open(base + ".collapsed", "wb") as f:
+        f.write(rawstore.decompress(row["codec"], rawstore.from_bytea(row["collapsed"])))
+    return base + ".pstats", base + ".collapsed"
+
+USAGE = "usage: python profiling.py list [job_id] | show <profile_id> [sort] | export <profile_id> [dir]"
+
+if __name__ == "__main__":
+    from supa import list_job_profiles, load_job_profile
+    cmd, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("", [])
+    if cmd == "list" and len(args) <= 1:
+        for r in list_job_profiles(int(args[0]) if args else None):
+            print(f"{r['id']:>6} job {r['job_id']:<6} attempt {r['attempt'] or '-':<3} "
+                  f"{float(r['wall_seconds'] or 0):>8.1f}s {r['samples'] or 0:>7} samples  "
+                  f"{r['created_at']}  {r['error'] or ''}")
+    elif cmd == "show" and len(args) in (1, 2):
+        load_stats(load_job_profile(int(args[0]))).sort_stats(args[1] if len(args) == 2 else "cumulative").print_stats(40)
+    elif cmd == "export" and len(args) in (1, 2):
+        pstats_path, collapsed_path = export(load_job_profile(int(args[0])), args[1] if len(args) == 2 else ".")
+        print(f"{pstats_path}\n{collapsed_path}")
+        print(f"open with: snakeviz {pstats_path}  |  flamegraph.pl {collapsed_path} > flame.svg  |  speedscope {collapsed_path}")
+    else:
+        sys.exit(USAGE)
@@ -0,0 +1,335 @@
+import os, re, hmac, json, time, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+from dotenv import load_dotenv
+from cache import ResultCache
+
+# Read-side HTTP service in front of the search_zones / get_zone_details RPCs.
+# Results are cached (TTL + LRU) and identical in-flight requests share one RPC;
+# the worker calls POST /invalidate after ingesting a municipality.
+#
+#   GET  /search?q=R-20 Brick NJ
+#   GET  /zones/<zone_id>
+#   GET  /suggest?q=r20&limit=10
+#   GET  /zones-at?lon=-74.1&lat=40.05
+#   POST /zones-at     {"points": [{"id","lon","lat"}, ...]} or {"features": [parcel polygons]}
+#   POST /invalidate   {"state","county","municipality","zone_codes","zone_names"}
+#   POST /feasibility  {"lots": [{"id","area_sqft","frontage_ft","depth_ft","corner",...}], "county", ...}
+#   GET  /health
+load_dotenv(override=True)
+
+QUERY_SERVICE_HOST = os.getenv("QUERY_SERVICE_HOST", "0.0.0.0")
+QUERY_SERVICE_PORT = int(os.getenv("QUERY_SERVICE_PORT", "8080"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+QUERY_CORS_ORIGIN = os.getenv("QUERY_CORS_ORIGIN", "*")
+# Shared secret for /invalidate (sent by the worker as X-Invalidate-Token); unset = /invalidate disabled
+QUERY_SERVICE_TOKEN = os.getenv("QUERY_SERVICE_TOKEN", "")
+# Larger POST bodies are refused with 413 before they are read
+QUERY_MAX_BODY_BYTES = int(os.getenv("QUERY_MAX_BODY_BYTES", str(16 * 1024 * 1024)))
+# Comma-separated base URLs the worker notifies after ingest, e.g. http://query:8080
+QUERY_SERVICE_URLS = [u.strip().rstrip("/") for u in os.getenv("QUERY_SERVICE_URL", "").split(",") if u.strip()]
+# In-memory district index (needs shapely); rebuilt after this long or after an invalidate
+SPATIAL_INDEX_TTL = float(os.getenv("SPATIAL_INDEX_TTL_SECONDS", "3600"))
+ZONES_AT_MAX_POINTS = int(os.getenv("ZONES_AT_MAX_POINTS", "10000"))
+FEASIBILITY_MAX_LOTS = int(os.getenv("FEASIBILITY_MAX_LOTS", "5000"))
+SUGGEST_INDEX_TTL = float(os.getenv("SUGGEST_INDEX_TTL_SECONDS", "3600"))
+
+cache = ResultCache(maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL)
+
+def norm_query(q: str) -> str:
+    # search_zones matches with ILIKE and UPPER, so case does not change results;
+    # spacing does, so the RPC is sent the same collapsed text the cache is keyed on
+    return re.sub(r"\s+", " ", q or "").strip()
+
+def _muni_tags(rows: List[Dict[str, Any]]) -> Iterable[tuple]:
+    return {("muni", (r.get("state") or "").upper(), (r.get("municipality") or "").lower()) for r in rows}
+
+def search(q: str) -> List[Dict[str, Any]]:
+    from supa import sb
+    q = norm_query(q)
+    return cache.get_or_load(("search", q.lower()), lambda: sb.rpc("search_zones", {"search_query": q}).execute().data or [], _muni_tags)
+
+def zone_details(zone_id: int) -> List[Dict[str, Any]]:
+    from supa import sb
+    key = ("zone", zone_id)
+    return cache.get_or_load(key, lambda: sb.rpc("get_zone_details", {"zone_id": zone_id}).execute().data or [], _muni_tags)
+
+class _SpatialIndex:
+    """District STRtree plus each zone's lookup row, loaded on first use."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.zones: Dict[str, Dict[str, Any]] = {}
+        self.built_at = 0.0
+
+    def mark_stale(self):
+        self.built_at = 0.0
+
+    def get(self):
+        with self.lock:
+            if self.index is None or time.monotonic() - self.built_at > SPATIAL_INDEX_TTL:
+                self._build()
+            return self.index, self.zones
+
+    def _build(self):
+        from supa import fetch_districts, fetch_zones_by_key
+        from spatial import DistrictIndex, STANDARD_COLUMNS
+        t0 = time.perf_counter()
+        districts = fetch_districts()
+        zones = {}
+        for z in fetch_zones_by_key(sorted({d["zone_key"] for d in districts}), list(STANDARD_COLUMNS)):
+            std = (z.pop("standards", None) or [{}])
+            std = std[0] if isinstance(std, list) else std
+            zones[z["zone_key"]] = {**z, "state": z.pop("state_code"), **{c: std.get(c) for c in STANDARD_COLUMNS}}
+        self.index, self.zones = DistrictIndex(districts), zones
+        self.built_at = time.monotonic()
+        print(f"🗺️ Built district index: {len(districts)} districts, {len(zones)} zones "
+              f"in {time.perf_counter() - t0:.1f}s")
+
+spatial_index = _SpatialIndex()
+
+def zones_at(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Zone and standards for each {"id","lon","lat"} point, in input order.
+
+    Points outside every district come back with zone_key None. Uses the
+    in-memory index when shapely is installed, else the zones_at_points RPC."""
+    from spatial import shapely, STANDARD_COLUMNS
+    points = [{"id": str(p.get("id", i)), "lon": float(p["lon"]), "lat": float(p["lat"])} for i, p in enumerate(points)]
+    if shapely is None:
+        from supa import zones_at_points
+        return zones_at_points(points)
+    index, zones = spatial_index.get()
+    empty = {"zone_key": None, "zone_code": None, "zone_name": None, "municipality": None, "county": None,
+             "state": None, "ordinance_url": None, **{c: None for c in STANDARD_COLUMNS}}
+    out = []
+    for p, d in zip(points, index.lookup([(p["lon"], p["lat"]) for p in points])):
+        row = {"point_id": p["id"], "lon": p["lon"], "lat": p["lat"], **empty}
+        if d is not None:
+            # a district whose zone has not been ingested still reports its code
+            row.update(zone_key=d["zone_key"], zone_code=d["zone_code"],
+                       municipality=d["municipality"], state=d["state_code"])
+            row.update({k: v for k, v in zones.get(d["zone_key"], {}).items()
+                        if k not in ("zone_key", "zone_code", "municipality", "state")})
+        out.append(row)
+    return out
+
+class _Suggestions:
+    """In-memory SuggestIndex. The first request loads it; later reloads (TTL or
+    invalidate) run in the background while the old index keeps answering."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.built_at = 0.0
+        self.reloading = False
+
+    def mark_stale(self):
+        self.built_at = 0.0
+
+    def _load(self):
+        from supa import fetch_suggestions
+        from suggest import SuggestIndex
+        t0 = time.perf_counter()
+        index = SuggestIndex(fetch_suggestions())
+        self.index, self.built_at = index, time.monotonic()
+        print(f"🔤 Loaded {len(index.rows)} suggestions in {time.perf_counter() - t0:.1f}s")
+
+    def _reload(self):
+        try:
+            self._load()
+        except Exception as e:
+            print(f"⚠️ Suggestion reload failed: {e}")
+        finally:
+            self.reloading = False
+
+    def get(self):
+        with self.lock:
+            if self.index is None:
+                self._load()
+            elif time.monotonic() - self.built_at > SUGGEST_INDEX_TTL and not self.reloading:
+                self.reloading = True
+                threading.Thread(target=self._reload, name="suggest-reload", daemon=True).start()
+            return self.index
+
+suggestions = _Suggestions()
+
+def suggest(q: str, limit: int = 10) -> List[Dict[str, Any]]:
+    return suggestions.get().query(q, max(1, min(limit, 50)))
+
+_feasibility = None
+_feasibility_lock = threading.Lock()
+
+def feasibility_engine():
+    # created on first request, so the service runs without numpy until it is used
+    global _feasibility
+    with _feasibility_lock:
+        if _feasibility is None:
+            from feasibility import FeasibilityEngine
+            _feasibility = FeasibilityEngine()
+        return _feasibility
+
+def invalidate(state: str, municipality: str, county: Optional[str] = None,
+               zone_codes: Iterable[str] = (), zone_names: Iterable[Optional[str]] = ()) -> int:
+    """Drop cached results the ingest could have changed.
+
+    Mirrors the search_zones match: a query is affected if it contains the
+    municipality, county, state or one of the ingested zone codes/names
+    (a blank zone name matches every query, exactly as in the RPC)."""
+    tag = ("muni", (state or "").upper(), (municipality or "").lower())
+    terms = [t.lower() for t in (municipality, county, state, *zone_codes) if t]
+    blank_name = any(not (n or "").strip() for n in zone_names)
+    terms += [n.lower() for n in zone_names if n and n.strip()]
+
+    def affected(key, tags) -> bool:
+        if tag in tags:
+            return True
+        if key[0] == "search":
+            return blank_name or any(t in key[1] for t in terms)
+        return False
+
+    spatial_index.mark_stale()
+    suggestions.mark_stale()
+    if _feasibility is not None:
+        _feasibility.mark_stale(state, municipality)
+    return cache.invalidate(affected)
+
+def notify_ingest(state: str, county: str, municipality: str, zones) -> None:
+    """Called by the worker after a municipality's zones are ingested."""
+    if not QUERY_SERVICE_URLS:
+        return
+    import requests
+    body = {
+        "state": state, "county": county, "municipality": municipality,
+        "zone_codes": [z.zone_code for z in zones], "zone_names": [z.zone_name for z in zones],
+    }
+    for url in QUERY_SERVICE_URLS:
+        try:
+            requests.post(f"{url}/invalidate", json=body, timeout=5,
+                          headers={"X-Invalidate-Token": QUERY_SERVICE_TOKEN}).raise_for_status()
+        except Exception as e:
+            print(f"⚠️ Query cache invalidation failed for {url}: {e}")
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "ZoningQuery/1.0"
+
+    def _send(self, code: int, body: Any):
+        data = json.dumps(body, default=str).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Access-Control-Allow-Origin", QUERY_CORS_ORIGIN)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.send_header("Access-Control-Allow-Origin", QUERY_CORS_ORIGIN)
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        self.end_headers()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        try:
+            if url.path == "/search":
+                return self._send(200, search(params.get("q", "")))
+            if url.path == "/suggest":
+                return self._send(200, suggest(params.get("q", ""), int(params.get("limit", "10"))))
+            m = re.fullmatch(r"/zones/(\d+)", url.path)
+            if m:
+                return self._send(200, zone_details(int(m.group(1))))
+            if url.path == "/zones-at":
+                return self._send(200, zones_at([{"id": params.get("id", "0"), "lon": params["lon"], "lat": params["lat"]}]))
+            if url.path == "/health":
+                return self._send(200, {"ok": True, "cache": cache.stats()})
+            self._send(404, {"error": "not found"})
+        except (KeyError, ValueError) as e:
+            self._send(400, {"error": f"bad request: {e}"})
+        except Exception as e:
+            print(f"❌ Query failed for {self.path}: {e}")
+            self._send(502, {"error": str(e)})
+
+    def _body_size(self) -> int:
+        size = int(self.headers.get("Content-Length") or 0)
+        if size < 0: raise ValueError("negative Content-Length")
+        return size
+
+    def _read_json(self) -> Dict[str, Any]:
+        return json.loads(self.rfile.read(self._body_size()) or b"{}")
+
+    def _zones_at(self):
+        try:
+            body = self._read_json()
+            if "features" in body:
+                from spatial import parcel_points
+                points = parcel_points(body["features"])
+            else:
+                points = body["points"]
+            if len(points) > ZONES_AT_MAX_POINTS:
+                return self._send(413, {"error": f"at most {ZONES_AT_MAX_POINTS} points per request"})
+            return self._send(200, zones_at(points))
+        except (KeyError, ValueError, TypeError, ImportError) as e:
+            return self._send(400, {"error": f"bad request: {e}"})
+        except Exception as e:
+            print(f"❌ Zone lookup failed: {e}")
+            self._send(502, {"error": str(e)})
+
+    def _feasibility(self):
+        try:
+            body = self._read_json()
+            lots = body["lots"]
+            if not isinstance(lots, list) or len(lots) > FEASIBILITY_MAX_LOTS:
+                return self._send(400, {"error": f"lots must be a list of at most {FEASIBILITY_MAX_LOTS}"})
+            return self._send(200, feasibility_engine().evaluate(
+                lots, body.get("state"), body.get("county"), body.get("municipality"),
+                bool(body.get("include_failing"))))
+        except (KeyError, ValueError, TypeError) as e:
+            return self._send(400, {"error": f"bad request: {e}"})
+        except Exception as e:
+            print(f"❌ Feasibility failed: {e}")
+            self._send(502, {"error": str(e)})
+
+    def do_POST(self):
+        try:
+            if self._body_size() > QUERY_MAX_BODY_BYTES:
+                self.close_connection = True  # the unread body can't be reused as the next request
+                return self._send(413, {"error": f"request body over {QUERY_MAX_BODY_BYTES} bytes"})
+        except ValueError as e:
+            self.close_connection = True
+            return self._send(400, {"error": f"bad request: {e}"})
+        if urlparse(self.path).path == "/zones-at":
+            return self._zones_at()
+        if urlparse(self.path).path == "/feasibility":
+            return self._feasibility()
+        if urlparse(self.path).path != "/invalidate":
+            return self._send(404, {"error": "not found"})
+        if not QUERY_SERVICE_TOKEN:
+            return self._send(403, {"error": "invalidation is disabled: QUERY_SERVICE_TOKEN is not set"})
+        if not hmac.compare_digest(self.headers.get("X-Invalidate-Token", "").encode(), QUERY_SERVICE_TOKEN.encode()):
+            return self._send(403, {"error": "forbidden"})
+        try:
+            body = self._read_json()
+            dropped = invalidate(body["state"], body["municipality"], body.get("county"),
+                                 body.get("zone_codes") or (), body.get("zone_names") or ())
+        except (KeyError, ValueError) as e:
+            return self._send(400, {"error": f"bad request: {e}"})
+        print(f"🧹 Invalidated {dropped} cached results for {body['municipality']}, {body['state']}")
+        self._send(200, {"invalidated": dropped})
+
+    def log_message(self, fmt, *args):
+        pass
+
+def serve(host: str = QUERY_SERVICE_HOST, port: int = QUERY_SERVICE_PORT):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"🔎 Query service listening on {host}:{port} (ttl={QUERY_CACHE_TTL}s, size={QUERY_CACHE_SIZE})")
+    if not QUERY_SERVICE_TOKEN:
+        print("⚠️ QUERY_SERVICE_TOKEN is not set; /invalidate is disabled and cached results expire by TTL only")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    serve()
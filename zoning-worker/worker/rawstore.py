@@ -0,0 +1,78 @@
+import os, sys, json, zlib, hashlib
+from typing import Any, Dict, Tuple
+
+# Content-addressed, compressed encoding for raw_extractions payloads.
+# zstandard is optional; without it blobs are written with zlib and the codec
+# column records which one so either can be read back.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RAW_ZSTD_LEVEL = int(os.getenv("RAW_ZSTD_LEVEL", "10"))
+
+def canonical_json(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def compress(data: bytes) -> Tuple[str, bytes]:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=RAW_ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+def decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd raw extractions")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == "zlib":
+        return zlib.decompress(blob)
+    raise ValueError(f"Unknown raw extraction codec: {codec}")
+
+def encode(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Row for raw_extraction_blobs; identical payloads always hash the same."""
+    data = canonical_json(payload)
+    codec, blob = compress(data)
+    return {"content_hash": content_hash(data), "codec": codec, "payload": to_bytea(blob), "raw_bytes": len(data)}
+
+def decode(row: Dict[str, Any]) -> Dict[str, Any]:
+    return json.loads(decompress(row["codec"], from_bytea(row["payload"])))
+
+# PostgREST exchanges bytea as "\x<hex>" text
+def to_bytea(blob: bytes) -> str:
+    return "\\x" + blob.hex()
+
+def from_bytea(value: str) -> bytes:
+    return bytes.fromhex(value[2:] if value.startswith("\\x") else value)
+
+def _standard_set(zone: Dict[str, Any]) -> set:
+    return {(s.get("key"), s.get("value_numeric"), s.get("value_text"), s.get("units"))
+            for s in zone.get("all_standards", [])}
+
+def diff_payloads(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """Zone-level diff of two {"payloads": [...]} raw extractions."""
+    za = {z["zone_code"]: z for z in a.get("payloads", [])}
+    zb = {z["zone_code"]: z for z in b.get("payloads", [])}
+    changed = {}
+    for code in za.keys() & zb.keys():
+        sa, sb_ = _standard_set(za[code]), _standard_set(zb[code])
+        if sa != sb_:
+            changed[code] = {"removed": sorted(sa - sb_, key=str), "added": sorted(sb_ - sa, key=str)}
+    return {
+        "added": sorted(zb.keys() - za.keys()),
+        "removed": sorted(za.keys() - zb.keys()),
+        "changed": changed,
+    }
+
+if __name__ == "__main__":
+    # python rawstore.py show <raw_id> | diff <raw_id_a> <raw_id_b>
+    from supa import load_raw, diff_raw
+    cmd, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("", [])
+    if cmd == "show" and len(args) == 1:
+        print(json.dumps(load_raw(int(args[0])), indent=2))
+    elif cmd == "diff" and len(args) == 2:
+        print(json.dumps(diff_raw(int(args[0]), int(args[1])), indent=2))
+    else:
+        sys.exit("usage: python rawstore.py show <raw_id> | diff <raw_id_a> <raw_id_b>")
@@ -0,0 +1,148 @@
+import os, re, sys, json, gzip, glob, hashlib, time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Static search shards: after a successful job the worker writes the
+# municipality's zones (the columns search_zones returns) to a content-versioned
+# JSON file under SHARD_DIR, plus per-county indexes and a manifest. nginx serves
+# the directory at /shards/ (see Zoning-Search-App-PublicV2/nginx.conf), so the
+# app searches a municipality client-side after one cached fetch.
+#
+#   SHARD_DIR/manifest.json                      municipalities -> shard files (small, revalidated)
+#   SHARD_DIR/county/NJ/ocean.json               a county's municipalities
+#   SHARD_DIR/muni/NJ/brick.<version>.json[.gz]  immutable; version = content hash
+#
+#   python shards.py export [STATE Municipality]
+SHARD_DIR = os.getenv("SHARD_DIR", "")
+SHARD_FORMAT = 1
+# shard files kept per municipality, so clients holding the previous manifest still load
+SHARD_KEEP_VERSIONS = 2
+
+STANDARD_COLUMNS = (
+    "area_sqft_interior_lots", "frontage_interior_lots", "area_sqft_corner_lots", "frontage_feet_corner_lots",
+    "depth_interior_lots_ft", "depth_corner_lots_ft",
+    "max_building_coverage_percent", "max_lot_coverage_percent",
+    "stories_max_height_principal_building", "feet_max_height_principal_building",
+    "maximum_density", "maximum_far",
+)
+COLUMNS = ("zone_code", "zone_name", "municipality", "county", "state", "ordinance_url") + STANDARD_COLUMNS
+
+def slug(name: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", (name or "").lower()).strip("-") or "unknown"
+
+def _number(v: Any) -> Any:
+    # NUMERIC arrives as a string or float; integers are written without ".0"
+    if v is None: return None
+    f = float(v)
+    return int(f) if f.is_integer() else f
+
+def shard_doc(state: str, municipality: str, zones: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Columnar shard of zones rows from fetch_zone_standards."""
+    rows = []
+    for z in sorted(zones, key=lambda z: z["zone_code"]):
+        std = z.get("standards") or [{}]
+        std = std[0] if isinstance(std, list) else std
+        rows.append([z["zone_code"], z.get("zone_name") or None, z["municipality"], z.get("county"),
+                     z["state_code"], z.get("ordinance_url") or None] + [_number(std.get(c)) for c in STANDARD_COLUMNS])
+    county = next((z.get("county") for z in zones if z.get("county")), None)
+    return {"format": SHARD_FORMAT, "state": state, "county": county, "municipality": municipality,
+            "columns": list(COLUMNS), "rows": rows}
+
+def _write(path: str, data: bytes, gz: bool = False):
+    # write-then-rename, so nginx never serves a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    outputs = [(path, data)] + ([(path + ".gz", gzip.compress(data, mtime=0))] if gz else [])
+    for target, body in outputs:
+        tmp = f"{target}.tmp.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, target)
+
+@contextmanager
+def _locked(shard_dir: str):
+    # workers on one host (or sharing the volume) update the manifest in turn
+    os.makedirs(shard_dir, exist_ok=True)
+    with open(os.path.join(shard_dir, ".lock"), "w") as f:
+        if fcntl: fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl: fcntl.flock(f, fcntl.LOCK_UN)
+
+def _read_json(path: str, default: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def _dump(doc: Dict[str, Any]) -> bytes:
+    return json.dumps(doc, separators=(",", ":"), ensure_ascii=False).encode()
+
+def export_municipality(state: str, municipality: str, shard_dir: str = SHARD_DIR) -> Optional[str]:
+    """Write the municipality's shard and update the manifest and county index.
+    Returns the shard path relative to shard_dir (None if it has no zones)."""
+    from supa import fetch_zone_standards
+    zones = fetch_zone_standards(list(STANDARD_COLUMNS), state_code=state, municipality=municipality)
+    key = f"{state.upper()}|{municipality.lower()}"
+    rel = None
+    if zones:
+        doc = shard_doc(state, municipality, zones)
+        body = _dump(doc)
+        version = hashlib.sha256(body).hexdigest()[:16]
+        rel = f"muni/{state.upper()}/{slug(municipality)}.{version}.json"
+        if not os.path.exists(os.path.join(shard_dir, rel)):
+            _write(os.path.join(shard_dir, rel), body, gz=True)
+
+    with _locked(shard_dir):
+        manifest_path = os.path.join(shard_dir, "manifest.json")
+        manifest = _read_json(manifest_path, {"format": SHARD_FORMAT, "municipalities": {}})
+        old = manifest["municipalities"].get(key)
+        if old and rel and old["file"] == rel:
+            return rel
+        if rel:
+            manifest["municipalities"][key] = {
+                "state": state.upper(), "county": doc["county"], "municipality": municipality,
+                "file": rel, "zones": len(doc["rows"]), "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            }
+        else:
+            manifest["municipalities"].pop(key, None)
+        manifest["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+        counties = {(m["state"], m["county"]) for m in (old, manifest["municipalities"].get(key)) if m and m.get("county")}
+        for st, county in counties:
+            _write(os.path.join(shard_dir, f"county/{st}/{slug(county)}.json"), _dump({
+                "format": SHARD_FORMAT, "state": st, "county": county,
+                "municipalities": {k: m for k, m in manifest["municipalities"].items()
+                                   if m["state"] == st and m.get("county") == county},
+            }))
+        _write(manifest_path, _dump(manifest), gz=True)
+        _prune(shard_dir, state, municipality, keep={rel, old and old.get("file")})
+    return rel
+
+def _prune(shard_dir: str, state: str, municipality: str, keep: set):
+    files = glob.glob(os.path.join(shard_dir, f"muni/{state.upper()}/{glob.escape(slug(municipality))}.*.json"))
+    files.sort(key=os.path.getmtime, reverse=True)
+    for path in files[SHARD_KEEP_VERSIONS:]:
+        if os.path.relpath(path, shard_dir) not in keep:
+            for p in (path, path + ".gz"):
+                if os.path.exists(p): os.remove(p)
+
+USAGE = "usage: python shards.py export [STATE Municipality]   (needs SHARD_DIR)"
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not SHARD_DIR or not args or args[0] != "export" or len(args) not in (1, 3):
+        sys.exit(USAGE)
+    if len(args) == 3:
+        munis = [(args[1].upper(), args[2])]
+    else:
+        from supa import fetch_zone_names
+        munis = sorted({(z["state_code"], z["municipality"]) for z in fetch_zone_names()})
+    for state, muni in munis:
+        print(f"🗂️ {muni}, {state}: {export_municipality(state, muni) or 'no zones'}")
@@ -0,0 +1,143 @@
+import os, sys, json
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Zoning district polygons: import from GeoJSON/shapefiles into zone_districts
+# (linked to zones by zone_key), and an in-memory STRtree for batch
+# point-in-district lookups. shapely (lookups, parcel polygons), pyshp
+# (shapefiles) and pyproj (non-WGS84 sources) are optional; the import itself
+# only needs plain GeoJSON.
+#
+#   python spatial.py import districts.geojson NJ Brick [zone_field] [--epsg 3424]
+try:
+    import shapely
+except ImportError:
+    shapely = None
+
+# standards columns returned with every lookup (same as the zones_at_points RPC)
+STANDARD_COLUMNS = (
+    "area_sqft_interior_lots", "frontage_interior_lots", "area_sqft_corner_lots", "frontage_feet_corner_lots",
+    "depth_interior_lots_ft", "depth_corner_lots_ft",
+    "front_yard_principal_building", "side_yard_principal_building", "rear_yard_principal_building",
+    "max_building_coverage_percent", "max_lot_coverage_percent",
+    "stories_max_height_principal_building", "feet_max_height_principal_building",
+    "maximum_density", "maximum_far",
+)
+ZONE_FIELDS = ("ZONE", "ZONING", "ZONE_CODE", "ZONECODE", "DISTRICT", "ZONE_DIST", "ZONEDIST")
+
+def read_features(path: str) -> Iterator[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """(GeoJSON geometry, properties) for each feature of a .geojson/.json or .shp file."""
+    if path.lower().endswith(".shp"):
+        import shapefile  # pyshp
+        with shapefile.Reader(path) as r:
+            for sr in r.iterShapeRecords():
+                yield sr.shape.__geo_interface__, sr.record.as_dict()
+        return
+    with open(path) as f:
+        data = json.load(f)
+    for feat in data.get("features", [data] if data.get("type") == "Feature" else []):
+        if feat.get("geometry"):
+            yield feat["geometry"], feat.get("properties") or {}
+
+def _polygons(geometry: Dict[str, Any]) -> List[list]:
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"District geometry must be a polygon, got {geometry['type']}")
+
+def multipolygon_ewkt(geometry: Dict[str, Any]) -> str:
+    """EWKT for a zone_districts.geom value (PostGIS parses it from text)."""
+    polys = ",".join(
+        "(" + ",".join("(" + ",".join(f"{x} {y}" for x, y, *_ in ring) + ")" for ring in poly) + ")"
+        for poly in _polygons(geometry)
+    )
+    return f"SRID=4326;MULTIPOLYGON({polys})"
+
+def _reproject(geometry: Dict[str, Any], epsg: int) -> Dict[str, Any]:
+    from pyproj import Transformer
+    t = Transformer.from_crs(epsg, 4326, always_xy=True)
+    return {"type": "MultiPolygon", "coordinates": [
+        [[list(t.transform(x, y)) for x, y, *_ in ring] for ring in poly] for poly in _polygons(geometry)
+    ]}
+
+def zone_field_of(props: Dict[str, Any]) -> Optional[str]:
+    upper = {k.upper(): k for k in props}
+    return next((upper[f] for f in ZONE_FIELDS if f in upper), None)
+
+def district_rows(path: str, state: str, municipality: str, zone_field: Optional[str] = None,
+                  epsg: int = 4326) -> List[Dict[str, Any]]:
+    from supa import make_zone_key
+    rows = []
+    for geometry, props in read_features(path):
+        field = zone_field or zone_field_of(props)
+        code = str(props.get(field) or "").strip() if field else ""
+        if not code:
+            continue
+        if epsg != 4326:
+            geometry = _reproject(geometry, epsg)
+        rows.append({
+            "zone_key": make_zone_key(state, municipality, code),
+            "state_code": state,
+            "municipality": municipality,
+            "zone_code": " ".join(code.split()),
+            "source": os.path.basename(path),
+            "properties": json.loads(json.dumps(props, default=str)),
+            "geom": multipolygon_ewkt(geometry),
+        })
+    return rows
+
+class DistrictIndex:
+    """STRtree over district polygons; lookups take many points per call.
+
+    Where districts overlap (overlay zones) the smallest polygon wins, as in
+    the zones_at_points RPC."""
+
+    def __init__(self, districts: List[Dict[str, Any]]):
+        if shapely is None:
+            raise ImportError("shapely is required for in-memory district lookups")
+        self.districts = [d for d in districts if d.get("geom")]
+        geoms = [shapely.geometry.shape(d["geom"]) for d in self.districts]
+        self.areas = [g.area for g in geoms]
+        self.tree = shapely.STRtree(geoms)
+
+    def lookup(self, coords: Sequence[Tuple[float, float]]) -> List[Optional[Dict[str, Any]]]:
+        """District for each (lon, lat), or None outside every district."""
+        if not coords:
+            return []
+        pts = shapely.points(coords)
+        best: List[Optional[int]] = [None] * len(coords)
+        point_idx, tree_idx = self.tree.query(pts, predicate="intersects")
+        for p, t in zip(point_idx.tolist(), tree_idx.tolist()):
+            if best[p] is None or self.areas[t] < self.areas[best[p]]:
+                best[p] = t
+        return [self.districts[t] if t is not None else None for t in best]
+
+def parcel_points(features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lookup points for parcel polygons: a point guaranteed inside each parcel."""
+    if shapely is None:
+        raise ImportError("shapely is required to look up parcel polygons; send points instead")
+    out = []
+    for i, feat in enumerate(features):
+        p = shapely.geometry.shape(feat["geometry"]).representative_point()
+        out.append({"id": str(feat.get("id") or (feat.get("properties") or {}).get("id") or i), "lon": p.x, "lat": p.y})
+    return out
+
+USAGE = "usage: python spatial.py import <file.geojson|file.shp> <STATE> <Municipality> [zone_field] [--epsg N]"
+
+if __name__ == "__main__":
+    from supa import replace_districts
+    args = sys.argv[1:]
+    epsg = 4326
+    if "--epsg" in args:
+        i = args.index("--epsg")
+        epsg = int(args[i + 1])
+        del args[i:i + 2]
+    if len(args) in (4, 5) and args[0] == "import":
+        rows = district_rows(args[1], args[2].upper(), args[3], args[4] if len(args) == 5 else None, epsg)
+        if not rows:
+            sys.exit(f"No districts with a zone code found in {args[1]} (pass the zone field name)")
+        replace_districts(args[2].upper(), args[3], rows)
+        print(f"🗺️ Imported {len(rows)} districts for {args[3]}, {args[2].upper()} "
+              f"({len({r['zone_key'] for r in rows})} zones)")
+    else:
+        sys.exit(USAGE)
@@ -0,0 +1,114 @@
+import re, sys, heapq
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+# Typeahead suggestions for zone codes, zone names, municipality and county
+# names. Terms are normalized to lowercase letters and digits, so "R20",
+# "r-20" and "R 20" all complete to "R-20" (suggest_zones in
+# 02_rpc_functions.sql normalizes the same way). Rows are rebuilt for a
+# municipality after each ingest; the query service keeps a sorted copy in
+# memory and answers each keystroke with two bisects.
+#
+#   python suggest.py rebuild | query <prefix>
+
+# words a name is not also indexed from ("Township of Brick" -> "brick", not "of brick")
+SKIP_WORDS = {"of", "the", "and", "city", "town", "township", "borough", "village", "county"}
+
+def normalize(text: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]", "", (text or "").lower())
+
+def terms(name: str) -> List[str]:
+    """Normalized terms for a name: the whole name, then from each later word."""
+    words = (name or "").split()
+    out = [normalize(name)]
+    for i in range(1, len(words)):
+        if words[i].lower() not in SKIP_WORDS:
+            out.append(normalize(" ".join(words[i:])))
+    return list(dict.fromkeys(t for t in out if t))
+
+def county_value(county: str) -> str:
+    # parseSearchInput recognizes a county by its trailing "County"
+    return county if county.lower().endswith("county") else f"{county} County"
+
+def suggestion_rows(zones: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """zone_suggestions rows for zones rows (zone_code, zone_name, municipality, county, state_code)."""
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    per_muni: Dict[tuple, int] = {}
+
+    def add(kind: str, names: List[str], label: str, value: str, z: Dict[str, Any], weight: int, shared: bool = False):
+        for term in dict.fromkeys(t for n in names if n for t in terms(n)):
+            rows.setdefault((kind, term, value), {
+                "term": term, "kind": kind, "label": label, "value": value,
+                "state_code": z["state_code"], "county": z.get("county") or "",
+                "municipality": "" if shared else z["municipality"], "weight": weight,
+            })
+
+    for z in zones:
+        key = (z["state_code"], z["municipality"])
+        per_muni[key] = per_muni.get(key, 0) + 1
+    for z in zones:
+        state, muni, code = z["state_code"], z["municipality"], z["zone_code"]
+        where = f"{muni}, {state}"
+        name = (z.get("zone_name") or "").strip()
+        add("zone", [code, name], f"{code} {name} · {where}" if name else f"{code} · {where}",
+            f"{code} {muni} {state}", z, 1)
+        add("municipality", [muni], where, f"{muni} {state}", z, per_muni[(state, muni)])
+        if z.get("county"):
+            add("county", [z["county"]], f"{county_value(z['county'])}, {state}",
+                f"{county_value(z['county'])} {state}", z, 0, shared=True)
+    return list(rows.values())
+
+def refresh_municipality(state: str, municipality: str):
+    """Rebuild one municipality's suggestions from its current zones."""
+    from supa import fetch_zone_names, replace_suggestions
+    rows = suggestion_rows(fetch_zone_names(state_code=state, municipality=municipality))
+    replace_suggestions(state, municipality, rows)
+    return len(rows)
+
+def _rank(row: Dict[str, Any], exact: bool) -> tuple:
+    return (not exact, -row["weight"], len(row["label"]), row["label"])
+
+class SuggestIndex:
+    """zone_suggestions rows sorted by term; a prefix is a contiguous slice."""
+
+    # matches looked at per query; very short prefixes match far more than one dropdown shows
+    MAX_SCAN = 5000
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.rows = sorted(rows, key=lambda r: r["term"])
+        self.terms = [r["term"] for r in self.rows]
+
+    def query(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        p = normalize(prefix)
+        if not p:
+            return []
+        lo = bisect_left(self.terms, p)
+        # terms are [a-z0-9] only, so "{" sorts after every continuation of p
+        hi = min(bisect_left(self.terms, p + "{", lo), lo + self.MAX_SCAN)
+        best: Dict[str, tuple] = {}
+        for i in range(lo, hi):
+            r = self.rows[i]
+            rank = _rank(r, self.terms[i] == p)
+            if r["value"] not in best or rank < best[r["value"]][0]:
+                best[r["value"]] = (rank, i)
+        return [
+            {"kind": r["kind"], "label": r["label"], "value": r["value"], "state": r["state_code"],
+             "county": r["county"] or None, "municipality": r["municipality"] or None}
+            for r in (self.rows[i] for _, i in heapq.nsmallest(limit, best.values()))
+        ]
+
+USAGE = "usage: python suggest.py rebuild | query <prefix> [limit]"
+
+if __name__ == "__main__":
+    cmd, args = (sys.argv[1], sys.argv[2:]) if len(sys.argv) > 1 else ("", [])
+    if cmd == "rebuild" and not args:
+        from supa import fetch_zone_names
+        munis = sorted({(z["state_code"], z["municipality"]) for z in fetch_zone_names()})
+        for state, muni in munis:
+            print(f"🔤 {muni}, {state}: {refresh_municipality(state, muni)} suggestions")
+    elif cmd == "query" and len(args) in (1, 2):
+        from supa import suggest_zones
+        for s in suggest_zones(args[0], int(args[1]) if len(args) == 2 else 10):
+            print(f"{s['kind']:<13} {s['label']:<50} -> {s['value']}")
+    else:
+        sys.exit(USAGE)
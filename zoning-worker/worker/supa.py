@@ -1,56 +1,350 @@
-import os, json, time
-from typing import Optional, Any, Dict, List
-from supabase import create_client, Client
-from parsers import extract_depth_from_text
+import os, json, time, tempfile
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Any, Dict, List
+from models import StandardEntry, Zone
+from parsers import acres_to_sq_ft, lex_cell
+from throttle import HOST_MAX_CONCURRENCY
+import rawstore
+
+if TYPE_CHECKING:
+    from supabase import Client
 
-SUPABASE_URL = os.environ["SUPABASE_URL"]
-SERVICE_ROLE = os.environ["SUPABASE_SERVICE_ROLE_KEY"]
 POLL_INTERVAL = int(os.getenv("POLL_INTERVAL_SECONDS", "5"))
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1"))
+# A waiting job gains one priority point every JOB_AGING_SECONDS
+JOB_AGING_SECONDS = int(os.getenv("JOB_AGING_SECONDS", "600"))
+# Duplicate jobs attach to a run of the same ordinance finished within this window
+COALESCE_WINDOW_SECONDS = int(os.getenv("COALESCE_WINDOW_SECONDS", "3600"))
+# Claimed jobs are leased; a worker that stops renewing loses them after this long
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+MAX_JOB_ATTEMPTS = int(os.getenv("MAX_JOB_ATTEMPTS", "3"))
+# Storage bucket a split job copies its document to for its children ("" = children re-download)
+JOB_STORAGE_BUCKET = os.getenv("JOB_STORAGE_BUCKET", "ordinances")
 
-sb: Client = create_client(SUPABASE_URL, SERVICE_ROLE)
+_client: Optional["Client"] = None
 
-def next_job() -> Optional[Dict[str, Any]]:
-    r = sb.table("ingestion_jobs").select("*").eq("status","PENDING") \
-        .order("created_at", desc=False).limit(BATCH_SIZE).execute()
-    return r.data[0] if r.data else None
+def get_client() -> "Client":
+    # Created on first use: importing this module needs neither the supabase
+    # package nor credentials, and forked workers never share a connection pool.
+    global _client
+    if _client is None:
+        from supabase import create_client
+        _client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_ROLE_KEY"])
+    return _client
+
+def set_client(client: Optional["Client"]):
+    global _client
+    _client = client
+
+class _LazyClient:
+    def __getattr__(self, name: str):
+        return getattr(get_client(), name)
+
+sb: "Client" = _LazyClient()  # type: ignore[assignment]
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: set_client(None))
+
+def claim_jobs(worker_id: str, limit: int = BATCH_SIZE) -> List[Dict[str, Any]]:
+    # Highest priority (plus aging) first, skipping hosts already at their concurrency
+    # limit; the RPC marks them PROCESSING under a lease in the same statement
+    r = sb.rpc("claim_jobs", {
+        "p_worker_id": worker_id,
+        "p_limit": limit,
+        "p_lease_seconds": JOB_LEASE_SECONDS,
+        "p_aging_seconds": JOB_AGING_SECONDS,
+        "p_max_per_host": HOST_MAX_CONCURRENCY,
+        "p_max_attempts": MAX_JOB_ATTEMPTS,
+    }).execute()
+    return sorted(r.data or [], key=lambda j: (-(j.get("priority") or 0), j["created_at"]))
+
+def extend_leases(worker_id: str, job_ids: List[int]) -> List[int]:
+    """Renew leases on jobs this worker holds; returns the ids it still owns."""
+    r = sb.rpc("extend_job_leases", {
+        "p_worker_id": worker_id, "p_job_ids": job_ids, "p_lease_seconds": JOB_LEASE_SECONDS,
+    }).execute()
+    return r.data or []
 
 def update_job(job_id: int, **fields):
     fields["updated_at"] = "now()"
     sb.table("ingestion_jobs").update(fields).eq("id", job_id).execute()
 
-def save_raw(job_id: int, payload: Dict[str, Any], confidence: float):
+def get_job(job_id: int) -> Optional[Dict[str, Any]]:
+    r = sb.table("ingestion_jobs").select("*").eq("id", job_id).limit(1).execute()
+    return r.data[0] if r.data else None
+
+def finish_job(job_id: int, status: str, message: Optional[str] = None):
+    """Final status for a job and every job coalesced into it."""
+    update_job(job_id, status=status, message=message, lease_expires_at=None)
+    sb.table("ingestion_jobs").update({
+        "status": status,
+        "message": f"Coalesced with job {job_id}: {message or status}",
+        "updated_at": "now()",
+    }).eq("coalesced_into", job_id).eq("status", "PROCESSING").execute()
+
+def attach_job(job_id: int, leader_id: int):
+    # Followers already waiting on job_id move with it
+    sb.table("ingestion_jobs").update({"coalesced_into": leader_id, "updated_at": "now()"}) \
+        .eq("coalesced_into", job_id).execute()
+    # followers hold no lease; they finish together with the leader
+    update_job(job_id, coalesced_into=leader_id, lease_expires_at=None, message=f"Waiting on job {leader_id}")
+
+def find_coalesce_target(job: Dict[str, Any], **match) -> Optional[Dict[str, Any]]:
+    """Another job for the same municipality and source (source_url= or content_hash=)
+    that is still running, or finished successfully within COALESCE_WINDOW_SECONDS.
+    Only lower ids are followed while in flight, so two concurrent duplicates never
+    wait on each other."""
+    since = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - COALESCE_WINDOW_SECONDS))
+    q = sb.table("ingestion_jobs").select("*") \
+        .neq("id", job["id"]).is_("coalesced_into", "null").is_("parent_id", "null") \
+        .eq("state_code", job["state_code"]).eq("municipality", job["municipality"]) \
+        .or_(f"and(status.in.(PROCESSING,WAITING),id.lt.{job['id']}),"
+             f"and(status.in.(DONE,PARTIAL_SUCCESS,NEEDS_REVIEW),updated_at.gte.{since})")
+    for k, v in match.items():
+        q = q.eq(k, v)
+    r = q.order("updated_at", desc=True).limit(1).execute()
+    return r.data[0] if r.data else None
+
+def split_job(job_id: int, ranges: List[List[int]], storage_path: Optional[str] = None) -> int:
+    """Queue page-range children and park the job until they finish; returns the child count."""
+    r = sb.rpc("split_job", {"p_job_id": job_id, "p_ranges": ranges, "p_storage_path": storage_path}).execute()
+    return r.data
+
+def finish_child_job(job_id: int, status: str, message: Optional[str] = None) -> bool:
+    """Final status for a page-range child; True if it was the last and the parent is requeued."""
+    r = sb.rpc("finish_child_job", {"p_job_id": job_id, "p_status": status, "p_message": message}).execute()
+    return bool(r.data)
+
+def child_results(parent_id: int) -> List[Dict[str, Any]]:
+    """A split job's children, each with the payloads of its latest raw extraction (or None)."""
+    children = sb.table("ingestion_jobs").select("id,status,message,page_start,page_end") \
+        .eq("parent_id", parent_id).order("page_start").execute().data or []
+    raws: Dict[int, Dict[str, Any]] = {}
+    if children:
+        r = sb.table("raw_extractions").select("job_id,content_hash,confidence") \
+            .in_("job_id", [c["id"] for c in children]).order("id").execute()
+        for row in r.data or []:
+            raws[row["job_id"]] = row  # ordered by id, so the latest run wins
+    for c in children:
+        raw = raws.get(c["id"])
+        c["payloads"] = load_raw_by_hash(raw["content_hash"])["payloads"] if raw else None
+        c["confidence"] = float(raw["confidence"] or 0) if raw else 0.0
+    return children
+
+def store_document(path: str, name: str) -> Optional[str]:
+    """Copy a document to JOB_STORAGE_BUCKET; returns "bucket/name", or None when disabled."""
+    if not JOB_STORAGE_BUCKET:
+        return None
+    with open(path, "rb") as f:
+        sb.storage.from_(JOB_STORAGE_BUCKET).upload(name, f.read(), {"upsert": "true"})
+    return f"{JOB_STORAGE_BUCKET}/{name}"
+
+def fetch_stored_document(storage_path: str) -> str:
+    bucket, _, name = storage_path.partition("/")
+    fp = tempfile.NamedTemporaryFile(delete=False).name
+    with open(fp, "wb") as f:
+        f.write(sb.storage.from_(bucket).download(name))
+    return fp
+
+def save_raw(job_id: int, payload: Dict[str, Any], confidence: float) -> str:
+    # Blobs are keyed by content hash: an identical re-run only adds a small reference row
+    row = rawstore.encode(payload)
+    exists = sb.table("raw_extraction_blobs").select("content_hash") \
+        .eq("content_hash", row["content_hash"]).limit(1).execute()
+    if not exists.data:
+        sb.table("raw_extraction_blobs").upsert(row, on_conflict="content_hash", ignore_duplicates=True).execute()
     sb.table("raw_extractions").insert({
         "job_id": job_id,
-        "payload": json.dumps(payload),
+        "content_hash": row["content_hash"],
         "confidence": confidence
     }).execute()
+    return row["content_hash"]
+
+@lru_cache(maxsize=32)
+def _load_blob(content_hash: str) -> str:
+    # content-addressed, so a cached decode can never go stale
+    r = sb.table("raw_extraction_blobs").select("codec,payload").eq("content_hash", content_hash).single().execute()
+    return json.dumps(rawstore.decode(r.data))
+
+def _raw_hashes(*raw_ids: int) -> Dict[int, str]:
+    r = sb.table("raw_extractions").select("id,content_hash").in_("id", list(raw_ids)).execute()
+    return {row["id"]: row["content_hash"] for row in r.data}
+
+def load_raw_by_hash(content_hash: str) -> Dict[str, Any]:
+    return json.loads(_load_blob(content_hash))
+
+def load_raw(raw_id: int) -> Dict[str, Any]:
+    return json.loads(_load_blob(_raw_hashes(raw_id)[raw_id]))
+
+def diff_raw(raw_id_a: int, raw_id_b: int) -> Dict[str, Any]:
+    hashes = _raw_hashes(raw_id_a, raw_id_b)
+    if hashes[raw_id_a] == hashes[raw_id_b]:
+        return {"added": [], "removed": [], "changed": {}}
+    return rawstore.diff_payloads(json.loads(_load_blob(hashes[raw_id_a])), json.loads(_load_blob(hashes[raw_id_b])))
+
+def fetch_header_aliases(scope_keys: List[str]) -> List[Dict[str, Any]]:
+    r = sb.table("header_aliases").select("scope,scope_key,header_norm,canonical_key,status") \
+        .in_("scope_key", scope_keys).execute()
+    return r.data
+
+def save_header_aliases(rows: List[Dict[str, Any]], overwrite: bool = False):
+    # Learned rows never replace an existing (possibly reviewed) resolution
+    sb.table("header_aliases").upsert(rows, on_conflict="scope,scope_key,header_norm",
+                                      ignore_duplicates=not overwrite).execute()
 
-def call_admin_ingest(payload: Dict[str, Any]):
+def list_header_aliases(status: Optional[str] = None) -> List[Dict[str, Any]]:
+    q = sb.table("header_aliases").select("*")
+    if status: q = q.eq("status", status)
+    return q.order("scope").order("scope_key").order("header_norm").execute().data
+
+def review_header_alias(alias_id: int, status: str, canonical_key: Optional[str] = None):
+    fields: Dict[str, Any] = {"status": status, "updated_at": "now()"}
+    if canonical_key: fields["canonical_key"] = canonical_key
+    sb.table("header_aliases").update(fields).eq("id", alias_id).execute()
+
+def make_zone_key(state: Optional[str], municipality: Optional[str], zone_code: str) -> str:
+    """zones.zone_key for a zone; district imports use it to link polygons to zones."""
+    clean_zone_code = ' '.join(zone_code.split()).strip()
+    # Create a safe database key by replacing problematic characters
+    safe_zone_key = clean_zone_code.replace('\n', '_').replace(' ', '_').replace('<', 'lt').replace('>', 'gt').replace('+', 'plus').replace(',', '').replace('(', '').replace(')', '')
+    return f"{state or 'NJ'}_{municipality or 'Unknown'}_{safe_zone_key}"
+
+def replace_districts(state: str, municipality: str, rows: List[Dict[str, Any]], chunk: int = 200):
+    sb.table("zone_districts").delete().eq("state_code", state).eq("municipality", municipality).execute()
+    for i in range(0, len(rows), chunk):
+        sb.table("zone_districts").insert(rows[i:i + chunk]).execute()
+
+def fetch_districts(page: int = 1000) -> List[Dict[str, Any]]:
+    # geometry columns come back as GeoJSON
+    out: List[Dict[str, Any]] = []
+    while True:
+        r = sb.table("zone_districts").select("zone_key,zone_code,municipality,state_code,geom") \
+            .order("id").range(len(out), len(out) + page - 1).execute()
+        out += r.data
+        if len(r.data) < page: return out
+
+def fetch_zones_by_key(zone_keys: List[str], columns: List[str], chunk: int = 200) -> List[Dict[str, Any]]:
+    """Current, published zones with the given standards columns embedded."""
+    out: List[Dict[str, Any]] = []
+    for i in range(0, len(zone_keys), chunk):
+        r = sb.table("zones").select(
+            "zone_key,zone_code,zone_name,municipality,county,state_code,ordinance_url,"
+            f"standards({','.join(columns)})"
+        ).in_("zone_key", zone_keys[i:i + chunk]).eq("is_current", True).eq("published", True).execute()
+        out += r.data
+    return out
+
+# zones and standards are hash-partitioned on municipality_id; ids never change,
+# so each worker resolves a municipality once and reuses it for every zone.
+@lru_cache(maxsize=4096)
+def _municipality_id(state: str, county: str, name: str) -> int:
+    return sb.rpc("resolve_municipality", {"p_state_code": state, "p_county": county, "p_name": name}).execute().data
+
+def municipality_id(state: Optional[str], county: Optional[str], name: Optional[str]) -> int:
+    """municipalities.id for a location, registering it on first sight."""
+    return _municipality_id((state or "NJ").upper(), county or "", name or "Unknown")
+
+def municipality_ids(state_code: Optional[str] = None, municipality: Optional[str] = None,
+                     county: Optional[str] = None, **_) -> Optional[List[int]]:
+    """Ids matching a zones filter, or None if it does not name a municipality.
+    Filtering zones on them lets Postgres scan only those partitions."""
+    if municipality is None: return None
+    q = sb.table("municipalities").select("id").eq("name", municipality)
+    if state_code is not None: q = q.eq("state_code", state_code.upper())
+    if county is not None: q = q.eq("county", county)
+    return [r["id"] for r in q.execute().data]
+
+def _match_zones(q, match: Dict[str, Any]):
+    ids = municipality_ids(**match)
+    if ids is not None: q = q.in_("municipality_id", ids)
+    for col, val in match.items():
+        if val is not None: q = q.eq(col, val)
+    return q
+
+def fetch_zone_standards(columns: List[str], page: int = 1000, **match) -> List[Dict[str, Any]]:
+    """Current, published zones (optionally filtered by state_code/county/municipality)
+    with the given standards columns embedded, paged by id."""
+    out: List[Dict[str, Any]] = []
+    while True:
+        q = sb.table("zones").select(
+            f"id,zone_key,zone_code,zone_name,municipality,county,state_code,standards({','.join(columns)})"
+        ).eq("is_current", True).eq("published", True)
+        r = _match_zones(q, match).order("id").range(len(out), len(out) + page - 1).execute()
+        out += r.data
+        if len(r.data) < page: return out
+
+def fetch_zone_names(page: int = 1000, **match) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    while True:
+        q = sb.table("zones").select("id,zone_code,zone_name,municipality,county,state_code") \
+            .eq("is_current", True).eq("published", True)
+        r = _match_zones(q, match).order("id").range(len(out), len(out) + page - 1).execute()
+        out += r.data
+        if len(r.data) < page: return out
+
+def replace_suggestions(state: str, municipality: str, rows: List[Dict[str, Any]], chunk: int = 500):
+    # county terms are shared by the county's municipalities, so they are only ever added
+    own = [r for r in rows if r["kind"] != "county"]
+    shared = [r for r in rows if r["kind"] == "county"]
+    sb.table("zone_suggestions").delete().eq("state_code", state).eq("municipality", municipality).execute()
+    for i in range(0, len(own), chunk):
+        sb.table("zone_suggestions").insert(own[i:i + chunk]).execute()
+    if shared:
+        sb.table("zone_suggestions").upsert(shared, on_conflict="kind,term,value", ignore_duplicates=True).execute()
+
+def fetch_suggestions(page: int = 5000) -> List[Dict[str, Any]]:
+    out: List[Dict[str, Any]] = []
+    while True:
+        r = sb.table("zone_suggestions").select("term,kind,label,value,state_code,county,municipality,weight") \
+            .order("id").range(len(out), len(out) + page - 1).execute()
+        out += r.data
+        if len(r.data) < page: return out
+
+def suggest_zones(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    return sb.rpc("suggest_zones", {"p_prefix": prefix, "p_limit": limit}).execute().data or []
+
+def zones_at_points(points: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sb.rpc("zones_at_points", {"p_points": points}).execute().data or []
+
+def save_job_profile(row: Dict[str, Any]) -> int:
+    return sb.table("job_profiles").insert(row).execute().data[0]["id"]
+
+def list_job_profiles(job_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    q = sb.table("job_profiles").select("id,job_id,attempt,wall_seconds,samples,error,created_at")
+    if job_id is not None: q = q.eq("job_id", job_id)
+    return q.order("created_at", desc=True).limit(limit).execute().data
+
+def load_job_profile(profile_id: int) -> Dict[str, Any]:
+    return sb.table("job_profiles").select("*").eq("id", profile_id).single().execute().data
+
+def call_admin_ingest(payload: Zone) -> int:
     # Direct insertion instead of using problematic database function
     try:
         # Clean zone code - preserve full zone identifier while creating safe database key
-        zone_code = payload.get('zone_code', '')
+        zone_code = payload.zone_code
         # Remove excessive whitespace but keep meaningful descriptors
         clean_zone_code = ' '.join(zone_code.split()).strip()
         
         if not clean_zone_code:
             raise Exception(f"Invalid zone_code: {zone_code}")
         
-        # Create a safe database key by replacing problematic characters
-        safe_zone_key = clean_zone_code.replace('\n', '_').replace(' ', '_').replace('<', 'lt').replace('>', 'gt').replace('+', 'plus').replace(',', '').replace('(', '').replace(')', '')
+        muni_id = municipality_id(payload.state, payload.county, payload.municipality)
         
         # Insert/update zone
         zone_data = {
-            'municipality_id': 1,
+            'municipality_id': muni_id,
             'zone_code': clean_zone_code,  # Full descriptive zone code
-            'zone_name': payload.get('zone_name', ''),
-            'ordinance_url': payload.get('ordinance_url', ''),
+            'zone_name': payload.zone_name or '',
+            'ordinance_url': payload.ordinance_url or '',
             'effective_date': 'now()',
             'last_verified_at': 'now()',
             'is_current': True,
             'published': True,
-            'zone_key': f"{payload.get('state', 'NJ')}_{payload.get('municipality', 'Unknown')}_{safe_zone_key}"
+            'zone_key': make_zone_key(payload.state, payload.municipality, clean_zone_code),
+            # location columns are what search, suggestions and feasibility filter on
+            'state_code': payload.state or 'NJ',
+            'county': payload.county,
+            'municipality': payload.municipality or 'Unknown'
         }
         
         # Upsert zone
@@ -58,102 +352,33 @@ def call_admin_ingest(payload: Dict[str, Any]):
         zone_id = zone_result.data[0]['id']
         
         # Delete existing standards
-        sb.table('standards').delete().eq('zone_id', zone_id).execute()
+        sb.table('standards').delete().eq('municipality_id', muni_id).eq('zone_id', zone_id).execute()
         
         # Map standards from JSONB to specific database columns
-        all_standards = payload.get('all_standards', [])
-        
-        # Import acres conversion function
-        from parsers import acres_to_sq_ft
-        
-        # Create mapping function to extract values from standards array with flexible key matching
-        def get_standard_value(standards, target_key):
-            # Define key mapping variations for better matching
-            key_variations = {
-                'area_interior_lots': ['area_interior_lots'],
-                'frontage_interior_lots': ['frontage_interior_lots'],
-                'area_corner_lots': ['area_corner_lots'],
-                'frontage_corner_lots': ['frontage_corner_lots'],
-                'buildable_lot_area': ['buildable_lot_area'],
-                'front_yard_principal': ['front_yard_principal'],
-                'side_yard_principal': ['side_yard_principal'],
-                'street_side_yard_principal': ['street_side_yard_principal'],
-                'rear_yard_principal': ['rear_yard_principal'],
-                'street_rear_yard_principal': ['street_rear_yard_principal'],
-                'front_yard_accessory': ['front_yard_accessory'],
-                'side_yard_accessory': ['side_yard_accessory'],
-                'street_side_yard_accessory': ['street_side_yard_accessory'],
-                'rear_yard_accessory': ['rear_yard_accessory'],
-                'street_rear_yard_accessory': ['street_rear_yard_accessory'],
-                'max_building_coverage': ['max_building_coverage'],
-                'max_lot_coverage': ['max_lot_coverage'],
-                'stories_max_height': ['stories_max_height'],
-                'feet_max_height': ['feet_max_height'],
-                'total_min_gross_floor_area': ['total_min_gross_floor_area'],
-                'first_floor_multistory_min_gross_floor_area': ['first_floor_multistory_min_gross_floor_area'],
-                'max_gross_floor_area': ['max_gross_floor_area'],
-                'maximum_far': ['maximum_far'],
-                'maximum_density': ['maximum_density'],
-                'depth_interior_lots': ['depth_interior_lots'],
-                'depth_corner_lots': ['depth_corner_lots']
-            }
-            
-            # Get all possible key variations for the target
-            possible_keys = key_variations.get(target_key, [target_key])
-            
+        all_standards = payload.standards
+        
+        # Index standards by key once so each column lookup is O(entries for that key)
+        by_key: Dict[str, List[StandardEntry]] = {}
+        for std in all_standards:
+            by_key.setdefault(std.key, []).append(std)
+        
+        def get_standard_value(target_key):
             # Collect all valid values for this field (since there may be multiple)
             valid_values = []
             
-            # Search for all matching key variations  
-            for std in standards:
-                std_key = std.get('key', '')
-                if std_key in possible_keys:
-                    value_numeric = std.get('value_numeric')
-                    value_text = std.get('value_text', '')
-                    unit = std.get('unit', '') or std.get('units', '')
-                    
-                    # Try numeric value first
-                    if value_numeric is not None and value_numeric != 0:
-                        # Convert acres to square feet for area fields
-                        if unit == 'ac' and 'area' in target_key.lower():
-                            value_numeric = acres_to_sq_ft(value_numeric)
-                        valid_values.append(value_numeric)
-                        continue
-                    
-                    # Try to convert text to float if it looks numeric
-                    if value_text:
-                        # Clean the text value
-                        clean_text = str(value_text).strip().replace('%', '').replace(',', '')
-                        
-                        # Skip clearly invalid values
-                        if clean_text.lower() in ['n/a', 'na', '—', '-', 'none', '', '(q)', '()', '0']:
-                            continue
-                            
-                        # Check if it's a simple number
-                        try:
-                            val = float(clean_text)
-                            if val > 0:  # Only accept positive values
-                                # Convert acres to square feet for area fields if unit indicates acres
-                                if unit == 'ac' and 'area' in target_key.lower():
-                                    val = acres_to_sq_ft(val)
-                                valid_values.append(val)
-                                continue
-                        except (ValueError, TypeError):
-                            pass
-                            
-                        # Try extracting numbers from complex strings like '60% (B)', '20(a)', etc.
-                        import re
-                        numbers = re.findall(r'[\d.]+', clean_text)
-                        if numbers:
-                            try:
-                                val = float(numbers[0])
-                                if val > 0:  # Only accept positive values
-                                    # Convert acres to square feet for area fields if unit indicates acres
-                                    if unit == 'ac' and 'area' in target_key.lower():
-                                        val = acres_to_sq_ft(val)
-                                    valid_values.append(val)
-                            except (ValueError, TypeError):
-                                continue
+            for std in by_key.get(target_key, ()):
+                # Values are lexed once in the pipeline; only payloads saved before
+                # that (checkpoints, old raw extractions) need their text lexed here.
+                val, unit = std.number, std.units or ''
+                if val is None and std.value_text:
+                    m = lex_cell(std.value_text)
+                    val, unit = m.value, m.units or unit
+                if val is None or val <= 0:  # Only accept positive values
+                    continue
+                # Convert acres to square feet for area fields
+                if unit == 'ac' and 'area' in target_key.lower():
+                    val = acres_to_sq_ft(val)
+                valid_values.append(val)
             
             # Return the first valid value (or handle multiple values intelligently)
             if valid_values:
@@ -175,14 +400,14 @@ def call_admin_ingest(payload: Dict[str, Any]):
         
         # Insert new standards with mapped fields
         # Get interior lot values first for potential fallback
-        interior_area = get_standard_value(all_standards, 'area_interior_lots')
-        interior_frontage = get_standard_value(all_standards, 'frontage_interior_lots')
-        corner_area = get_standard_value(all_standards, 'area_corner_lots')
-        corner_frontage = get_standard_value(all_standards, 'frontage_corner_lots')
+        interior_area = get_standard_value('area_interior_lots')
+        interior_frontage = get_standard_value('frontage_interior_lots')
+        corner_area = get_standard_value('area_corner_lots')
+        corner_frontage = get_standard_value('frontage_corner_lots')
         
         # Handle side yard extraction - check if we need to split street_side_yard values
-        side_yard_principal = get_standard_value(all_standards, 'side_yard_principal')
-        street_side_yard_principal = get_standard_value(all_standards, 'street_side_yard_principal')
+        side_yard_principal = get_standard_value('side_yard_principal')
+        street_side_yard_principal = get_standard_value('street_side_yard_principal')
         
         # Debug - confirm execution reaches this point for R-220
         if clean_zone_code == 'R-220':
@@ -192,9 +417,9 @@ def call_admin_ingest(payload: Dict[str, Any]):
         if side_yard_principal is None and street_side_yard_principal is not None:
             # Get all street_side_yard_principal values
             street_side_values = []
-            for std in all_standards:
-                if std.get('key') == 'street_side_yard_principal' and std.get('value_numeric') is not None:
-                    street_side_values.append(std.get('value_numeric'))
+            for std in by_key.get('street_side_yard_principal', ()):
+                if std.value_numeric is not None:
+                    street_side_values.append(std.value_numeric)
             
             # If we have exactly 2 values, assume smaller one is regular side yard, larger is street side
             if len(street_side_values) == 2:
@@ -211,14 +436,14 @@ def call_admin_ingest(payload: Dict[str, Any]):
         if clean_zone_code == 'R-220':
             print(f"🔍 R-220 FLOW DEBUG: Starting rear yard processing")
             
-        rear_yard_principal = get_standard_value(all_standards, 'rear_yard_principal')
-        street_rear_yard_principal = get_standard_value(all_standards, 'street_rear_yard_principal')
+        rear_yard_principal = get_standard_value('rear_yard_principal')
+        street_rear_yard_principal = get_standard_value('street_rear_yard_principal')
         
         # Check if we have multiple street_rear_yard_principal values that need splitting
         street_rear_values = []
-        for std in all_standards:
-            if std.get('key') == 'street_rear_yard_principal' and std.get('value_numeric') is not None:
-                street_rear_values.append(std.get('value_numeric'))
+        for std in by_key.get('street_rear_yard_principal', ()):
+            if std.value_numeric is not None:
+                street_rear_values.append(std.value_numeric)
         
         # Debug rear yard processing for R-220
         if clean_zone_code == 'R-220':
@@ -245,11 +470,11 @@ def call_admin_ingest(payload: Dict[str, Any]):
         
         # Handle accessory building values - use principal building values as default
         # First try to get specific accessory building values
-        front_yard_accessory = get_standard_value(all_standards, 'front_yard_accessory')
-        side_yard_accessory = get_standard_value(all_standards, 'side_yard_accessory')
-        street_side_yard_accessory = get_standard_value(all_standards, 'street_side_yard_accessory')
-        rear_yard_accessory = get_standard_value(all_standards, 'rear_yard_accessory')
-        street_rear_yard_accessory = get_standard_value(all_standards, 'street_rear_yard_accessory')
+        front_yard_accessory = get_standard_value('front_yard_accessory')
+        side_yard_accessory = get_standard_value('side_yard_accessory')
+        street_side_yard_accessory = get_standard_value('street_side_yard_accessory')
+        rear_yard_accessory = get_standard_value('rear_yard_accessory')
+        street_rear_yard_accessory = get_standard_value('street_rear_yard_accessory')
         
         # Apply same splitting logic to accessory building side yards
         # Debug for specific zones
@@ -260,9 +485,9 @@ def call_admin_ingest(payload: Dict[str, Any]):
         if side_yard_accessory is None and street_side_yard_accessory is not None:
             # Get all street_side_yard_accessory values
             accessory_street_side_values = []
-            for std in all_standards:
-                if std.get('key') == 'street_side_yard_accessory' and std.get('value_numeric') is not None:
-                    accessory_street_side_values.append(std.get('value_numeric'))
+            for std in by_key.get('street_side_yard_accessory', ()):
+                if std.value_numeric is not None:
+                    accessory_street_side_values.append(std.value_numeric)
             
             unique_accessory_street_side_values = sorted(set(accessory_street_side_values))
             
@@ -283,9 +508,9 @@ def call_admin_ingest(payload: Dict[str, Any]):
         if front_yard_accessory is None:
             # Get all front_yard_principal values and use minimum for accessory buildings
             front_principal_values = []
-            for std in all_standards:
-                if std.get('key') == 'front_yard_principal' and std.get('value_numeric') is not None:
-                    front_principal_values.append(std.get('value_numeric'))
+            for std in by_key.get('front_yard_principal', ()):
+                if std.value_numeric is not None:
+                    front_principal_values.append(std.value_numeric)
             
             if front_principal_values:
                 unique_front_values = sorted(set(front_principal_values))
@@ -298,7 +523,7 @@ def call_admin_ingest(payload: Dict[str, Any]):
                     front_yard_accessory = unique_front_values[0]
             else:
                 # Fallback to principal value if no front yard values found
-                front_yard_accessory = get_standard_value(all_standards, 'front_yard_principal')
+                front_yard_accessory = get_standard_value('front_yard_principal')
         if side_yard_accessory is None:
             side_yard_accessory = side_yard_principal
         if street_side_yard_accessory is None:
@@ -360,34 +585,33 @@ def call_admin_ingest(payload: Dict[str, Any]):
             print(f"🔄 Using interior lot frontage as fallback for corner lots: {corner_frontage}")
         
         # Extract depth measurements - first check for explicit depth standards
-        depth_interior_lots = get_standard_value(all_standards, 'depth_interior_lots')
-        depth_corner_lots = get_standard_value(all_standards, 'depth_corner_lots')
+        depth_interior_lots = get_standard_value('depth_interior_lots')
+        depth_corner_lots = get_standard_value('depth_corner_lots')
         
         print(f"📏 DEPTH DEBUG {clean_zone_code}: Found depth standards - interior: {depth_interior_lots}, corner: {depth_corner_lots}")
         print(f"📏 DEPTH DEBUG {clean_zone_code}: all_standards has {len(all_standards)} items:")
         for i, std in enumerate(all_standards):
-            key = std.get('key', '')
-            if 'depth' in key:
+            if 'depth' in std.key:
                 print(f"  📏 DEPTH STANDARD {i}: {std}")
         print(f"📏 DEPTH DEBUG {clean_zone_code}: Looking for depth keys in get_standard_value function")
         
         # Fallback: Extract depth measurements from lot size text (legacy method)
         if depth_interior_lots is None:
-            for std in all_standards:
-                if std.get('key') == 'area_interior_lots' and std.get('value_text'):
-                    extracted_depth = extract_depth_from_text(std.get('value_text'))
+            for std in by_key.get('area_interior_lots', ()):
+                if std.value_text:
+                    extracted_depth = lex_cell(std.value_text).depth
                     if extracted_depth:
                         depth_interior_lots = extracted_depth
-                        print(f"📏 Fallback: Extracted interior lot depth for {clean_zone_code}: {depth_interior_lots} ft from '{std.get('value_text')}'")
+                        print(f"📏 Fallback: Extracted interior lot depth for {clean_zone_code}: {depth_interior_lots} ft from '{std.value_text}'")
                         break
         
         if depth_corner_lots is None:
-            for std in all_standards:
-                if std.get('key') == 'area_corner_lots' and std.get('value_text'):
-                    extracted_depth = extract_depth_from_text(std.get('value_text'))
+            for std in by_key.get('area_corner_lots', ()):
+                if std.value_text:
+                    extracted_depth = lex_cell(std.value_text).depth
                     if extracted_depth:
                         depth_corner_lots = extracted_depth
-                        print(f"📏 Fallback: Extracted corner lot depth for {clean_zone_code}: {depth_corner_lots} ft from '{std.get('value_text')}'")
+                        print(f"📏 Fallback: Extracted corner lot depth for {clean_zone_code}: {depth_corner_lots} ft from '{std.value_text}'")
                         break
         
         # If no corner lot depth found, use interior lot depth as fallback
@@ -396,16 +620,17 @@ def call_admin_ingest(payload: Dict[str, Any]):
             print(f"🔄 Using interior lot depth as fallback for corner lots: {depth_corner_lots} ft")
         
         standards_data = {
+            'municipality_id': muni_id,
             'zone_id': zone_id,
             'zone_code': clean_zone_code,
-            'all_standards': all_standards,
+            'all_standards': [std.to_dict() for std in all_standards],
             # Map to specific database columns
             'area_sqft_interior_lots': interior_area,
             'frontage_interior_lots': interior_frontage,
             'area_sqft_corner_lots': corner_area,
             'frontage_feet_corner_lots': corner_frontage,
-            'buildable_lot_area': get_standard_value(all_standards, 'buildable_lot_area'),
-            'front_yard_principal_building': get_standard_value(all_standards, 'front_yard_principal'),
+            'buildable_lot_area': get_standard_value('buildable_lot_area'),
+            'front_yard_principal_building': get_standard_value('front_yard_principal'),
             'side_yard_principal_building': side_yard_principal,
             'street_side_yard_principal_building': street_side_yard_principal,
             'rear_yard_principal_building': rear_yard_principal,
@@ -415,15 +640,15 @@ def call_admin_ingest(payload: Dict[str, Any]):
             'street_side_yard_accessory_building': street_side_yard_accessory,
             'rear_yard_accessory_building': rear_yard_accessory,
             'street_rear_yard_accessory_building': street_rear_yard_accessory,
-            'max_building_coverage_percent': get_standard_value(all_standards, 'max_building_coverage'),
-            'max_lot_coverage_percent': get_standard_value(all_standards, 'max_lot_coverage'),
-            'stories_max_height_principal_building': get_standard_value(all_standards, 'stories_max_height'),
-            'feet_max_height_principal_building': get_standard_value(all_standards, 'feet_max_height'),
-            'total_minimum_gross_floor_area': get_standard_value(all_standards, 'total_min_gross_floor_area'),
-            'first_floor_multistory_min_gross_floor_area': get_standard_value(all_standards, 'first_floor_multistory_min_gross_floor_area'),
-            'max_gross_floor_area': get_standard_value(all_standards, 'max_gross_floor_area'),
-            'maximum_far': get_standard_value(all_standards, 'maximum_far'),
-            'maximum_density': get_standard_value(all_standards, 'maximum_density'),
+            'max_building_coverage_percent': get_standard_value('max_building_coverage'),
+            'max_lot_coverage_percent': get_standard_value('max_lot_coverage'),
+            'stories_max_height_principal_building': get_standard_value('stories_max_height'),
+            'feet_max_height_principal_building': get_standard_value('feet_max_height'),
+            'total_minimum_gross_floor_area': get_standard_value('total_min_gross_floor_area'),
+            'first_floor_multistory_min_gross_floor_area': get_standard_value('first_floor_multistory_min_gross_floor_area'),
+            'max_gross_floor_area': get_standard_value('max_gross_floor_area'),
+            'maximum_far': get_standard_value('maximum_far'),
+            'maximum_density': get_standard_value('maximum_density'),
             # Depth measurements
             'depth_interior_lots_ft': depth_interior_lots,
             'depth_corner_lots_ft': depth_corner_lots
@@ -432,8 +657,8 @@ def call_admin_ingest(payload: Dict[str, Any]):
         sb.table('standards').insert(standards_data).execute()
         
         print(f"✅ Successfully ingested zone: {clean_zone_code}")
-        return True
+        return zone_id
         
     except Exception as e:
-        print(f"❌ Direct ingestion failed for {payload.get('zone_code', 'unknown')}: {e}")
+        print(f"❌ Direct ingestion failed for {payload.zone_code}: {e}")
         raise e
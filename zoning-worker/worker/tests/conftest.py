@@ -0,0 +1,55 @@
+import os, sys
+from contextlib import contextmanager
+
+# The worker's modules import each other by bare name (they run from worker/),
+# so the tests put that directory on the path the same way.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def fake():
+    """supa's client swapped for an in-memory FakeClient for the test."""
+    import supa
+    from fakesupa import FakeClient
+    client = FakeClient()
+    supa.set_client(client)
+    yield client
+    supa.set_client(None)
+
+def queue(client, url="https://codes.example.com/brick.pdf", **fields):
+    """Insert one ingestion job and return its row."""
+    row = {"source_url": url, "state_code": "NJ", "county": "Ocean", "municipality": "Brick", **fields}
+    return client.table("ingestion_jobs").insert(row).execute().data[0]
+
+# SQL tests run the functions in database/*.sql on the scratch Postgres named by
+# TEST_DATABASE_URL, each test in a schema of its own that is dropped afterwards.
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "database")
+
+def sql_objects(filename, *patterns):
+    """The statements in database/<filename> matching each pattern (one per line-anchored match)."""
+    import re
+    with open(os.path.join(DATABASE_DIR, filename)) as f:
+        text = f.read()
+    return [m for p in patterns for m in re.findall(p, text, re.M | re.S)]
+
+def sql_table(name):
+    return rf"^CREATE TABLE {name} \(.*?^\)[^;]*;"
+
+def sql_function(name):
+    return rf"^CREATE OR REPLACE FUNCTION {name}\(.*?^\$\$;"
+
+@contextmanager
+def pg_schema(url, schema, statements):
+    import psycopg
+    from psycopg.rows import dict_row
+    with psycopg.connect(url, autocommit=True, row_factory=dict_row) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.execute(f"CREATE SCHEMA {schema}")
+        conn.execute(f"SET search_path TO {schema}")
+        for sql in statements:
+            conn.execute(sql)
+        try:
+            yield conn
+        finally:
+            conn.execute(f"DROP SCHEMA {schema} CASCADE")
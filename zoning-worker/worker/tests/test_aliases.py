@@ -0,0 +1,66 @@
+import pipeline
+from aliases import AliasStore
+
+def row(scope, scope_key, header, key, status):
+    return {"scope": scope, "scope_key": scope_key, "header_norm": header, "canonical_key": key, "status": status}
+
+def test_most_specific_scope_wins_among_learned():
+    store = AliasStore("NJ", "Brick", [
+        row("state", "NJ", "min lot", "area_corner_lots", "LEARNED"),
+        row("municipality", "NJ|Brick", "min lot", "area_interior_lots", "LEARNED"),
+    ])
+    assert store.lookup("min lot") == (True, "area_interior_lots")
+
+def test_reviewed_rows_outrank_learned_ones_in_narrower_scopes():
+    store = AliasStore("nj", "Brick", [
+        row("municipality", "NJ|Brick", "min lot", "frontage_interior_lots", "LEARNED"),
+        row("state", "NJ", "min lot", "area_interior_lots", "APPROVED"),
+        row("municipality", "NJ|Brick", "height", "feet_max_height", "LEARNED"),
+        row("global", "", "height", None, "REJECTED"),
+    ])
+    assert store.lookup("min lot") == (True, "area_interior_lots")
+    assert store.lookup("height") == (True, None)
+
+def test_rows_for_other_municipalities_are_ignored():
+    store = AliasStore("NJ", "Brick", [row("municipality", "NJ|Howell", "min lot", "area_interior_lots", "APPROVED")])
+    assert store.lookup("min lot") == (False, None)
+
+def test_learn_skips_weak_matches_and_reviewed_headers():
+    store = AliasStore("NJ", "Brick", [row("state", "NJ", "height", None, "REJECTED")])
+    store.learn("lot width", "frontage_interior_lots", 0.5)
+    store.learn("height", "feet_max_height", 0.99)
+    store.learn("lot area", "area_interior_lots", 0.95)
+    assert store.pending == {"lot area": ("area_interior_lots", 0.95)}
+    assert store.lookup("lot area") == (True, "area_interior_lots")
+    assert store.lookup("height") == (True, None)
+
+def test_store_without_learning_only_looks_up():
+    store = AliasStore("NJ", "Brick", learning=False)
+    store.learn("lot area", "area_interior_lots", 0.99)
+    assert store.pending == {}
+    assert store.lookup("lot area") == (False, None)
+
+def test_draft_learning_reaches_the_store_only_when_adopted():
+    store = AliasStore("NJ", "Brick")
+    kept, dropped = store.draft(), store.draft()
+    kept.learn("lot area", "area_interior_lots", 0.95)
+    dropped.learn("lot width", "frontage_interior_lots", 0.95)
+    assert kept.lookup("lot area") == (True, "area_interior_lots")
+    assert store.lookup("lot area") == (False, None)
+    store.adopt(kept)
+    assert store.pending == {"lot area": ("area_interior_lots", 0.95)}
+    assert store.lookup("lot width") == (False, None)
+
+def test_page_scorer_learns_only_from_the_kept_engine_output(monkeypatch):
+    def fake_map(df, ctx):
+        # stands in for header_map: every table teaches one alias
+        ctx["aliases"].learn(df, "area_interior_lots", 0.95)
+        return []
+    monkeypatch.setattr(pipeline, "dataframe_to_payloads", fake_map)
+    store = AliasStore("NJ", "Brick")
+    score = pipeline.page_scorer({"aliases": store})
+    _, _, keep_plumber = score(["pdfplumber header"])
+    _, _, keep_lattice = score(["lattice header"])
+    assert store.pending == {}
+    keep_lattice()
+    assert list(store.pending) == ["lattice header"]
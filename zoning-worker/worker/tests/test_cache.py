@@ -0,0 +1,82 @@
+import threading, time
+import pytest
+import cache
+from cache import ResultCache
+
+class Clock:
+    def __init__(self): self.now = 1000.0
+    def __call__(self): return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", c)
+    return c
+
+def test_hit_until_ttl_expires(clock):
+    c = ResultCache(ttl=10)
+    calls = []
+    load = lambda: calls.append(1) or len(calls)
+    assert c.get_or_load("k", load) == 1
+    clock.now += 9
+    assert c.get_or_load("k", load) == 1
+    clock.now += 2
+    assert c.get_or_load("k", load) == 2
+    assert c.stats() == {"size": 1, "hits": 1, "misses": 2, "coalesced": 0}
+
+def test_least_recently_used_entry_is_evicted(clock):
+    c = ResultCache(maxsize=2)
+    c.get_or_load("a", lambda: "a")
+    c.get_or_load("b", lambda: "b")
+    c.get_or_load("a", lambda: "stale")  # touches a, so b is now the oldest
+    c.get_or_load("c", lambda: "c")
+    assert c.get_or_load("a", lambda: "reloaded") == "a"
+    assert c.get_or_load("b", lambda: "reloaded") == "reloaded"
+
+def test_concurrent_misses_share_one_load(clock):
+    c = ResultCache()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "v"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(c.get_or_load("k", slow))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]: t.start()
+    deadline = time.perf_counter() + 5
+    while c.stats()["coalesced"] < 4 and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads: t.join(5)
+    assert results == ["v"] * 5
+    assert len(calls) == 1
+
+def test_errors_reach_waiters_and_are_not_cached(clock):
+    c = ResultCache()
+    with pytest.raises(RuntimeError):
+        c.get_or_load("k", lambda: (_ for _ in ()).throw(RuntimeError("rpc down")))
+    assert c.get_or_load("k", lambda: "ok") == "ok"
+
+def test_invalidate_drops_matching_tags_only(clock):
+    c = ResultCache()
+    c.get_or_load("brick", lambda: "b", lambda v: {("muni", "NJ", "brick")})
+    c.get_or_load("howell", lambda: "h", lambda v: {("muni", "NJ", "howell")})
+    assert c.invalidate(lambda key, tags: ("muni", "NJ", "brick") in tags) == 1
+    assert c.get_or_load("brick", lambda: "b2") == "b2"
+    assert c.get_or_load("howell", lambda: "h2") == "h"
+
+def test_load_overlapping_an_invalidation_is_returned_but_not_cached(clock):
+    c = ResultCache()
+
+    def load():
+        c.clear()  # an ingest lands while the RPC is running
+        return "old"
+
+    assert c.get_or_load("k", load) == "old"
+    assert c.get_or_load("k", lambda: "new") == "new"
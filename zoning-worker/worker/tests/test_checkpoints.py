@@ -0,0 +1,95 @@
+import os
+import pytest
+import checkpoints, supa
+from checkpoints import Checkpoint
+from conftest import queue
+from supa import MAX_JOB_ATTEMPTS
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoints, "CHECKPOINT_DIR", str(tmp_path))
+    return tmp_path
+
+def test_stages_are_recorded_on_the_row_and_resumed(fake):
+    job = queue(fake)
+    ckpt = Checkpoint(job)
+    assert not ckpt.reached("DOWNLOADED")
+    ckpt.mark("DOWNLOADED", doc_path=ckpt.file("source.pdf"), doc_kind="pdf")
+    ckpt.mark("EXTRACTED")
+    ckpt.record(ingested={"R-20": 7})
+
+    resumed = Checkpoint(supa.get_job(job["id"]))
+    assert resumed.stage == "EXTRACTED" and resumed.reached("DOWNLOADED") and not resumed.reached("MAPPED")
+    assert resumed.data["ingested"] == {"R-20": 7}
+    # the stage was reached but its file is gone, so the download reruns
+    assert resumed.downloaded() is None
+
+def test_clear_removes_files_and_resets_the_row(fake, checkpoint_dir):
+    job = queue(fake)
+    ckpt = Checkpoint(job)
+    with open(ckpt.file("source.pdf"), "w") as f:
+        f.write("%PDF")
+    ckpt.mark("DOWNLOADED", doc_path=ckpt.file("source.pdf"))
+    assert Checkpoint(supa.get_job(job["id"])).downloaded()
+
+    ckpt.clear()
+    row = supa.get_job(job["id"])
+    assert (row["stage"], row["checkpoint"]) == (None, None)
+    assert os.listdir(checkpoint_dir) == []
+
+def test_tables_round_trip_through_the_checkpoint_file(fake):
+    pd = pytest.importorskip("pandas")
+    ckpt = Checkpoint(queue(fake))
+    assert ckpt.load_tables() is None
+    tables = [(3, pd.DataFrame([["Zone", "Lot area"], ["R-20", None]]))]
+    assert list(ckpt.save_tables(iter(tables))) == tables
+    [(page, df)] = list(ckpt.load_tables())
+    assert page == 3 and df.values.tolist()[0] == ["Zone", "Lot area"]
+    assert df.iloc[1, 0] == "R-20" and pd.isna(df.iloc[1, 1])
+
+# process_job needs the worker's full environment
+@pytest.fixture
+def main(fake, monkeypatch, tmp_path):
+    pytest.importorskip("dotenv")
+    pytest.importorskip("pandas")
+    import main
+
+    def download(url):
+        path = tmp_path / "download.html"
+        path.write_text("<table></table>")
+        return str(path), "html"
+    monkeypatch.setattr(main, "download_document", download)
+    monkeypatch.setattr(main, "AUTO_INGEST", True)
+    return main
+
+def assert_failed_and_cleared(job_id, checkpoint_dir):
+    row = supa.get_job(job_id)
+    assert row["status"] == "FAILED"
+    assert (row["stage"], row["checkpoint"]) == (None, None)
+    assert os.listdir(checkpoint_dir) == []
+
+def test_job_without_tables_fails_and_clears_its_checkpoint(main, fake, checkpoint_dir, monkeypatch):
+    monkeypatch.setattr(main, "extract", lambda *a, **k: iter([]))
+    job = queue(fake)
+    main.process_job(job)
+    assert supa.get_job(job["id"])["message"] == "No tables found"
+    assert_failed_and_cleared(job["id"], checkpoint_dir)
+
+def test_job_without_payloads_fails_and_clears_its_checkpoint(main, fake, checkpoint_dir, monkeypatch):
+    import pandas as pd
+    monkeypatch.setattr(main, "extract", lambda *a, **k: iter([(1, pd.DataFrame([["Zone"]]), [])]))
+    job = queue(fake)
+    main.process_job(job)
+    assert supa.get_job(job["id"])["message"].startswith("Parsed 0 payloads")
+    assert_failed_and_cleared(job["id"], checkpoint_dir)
+
+def test_errored_job_is_requeued_then_failed_and_cleared(main, fake, checkpoint_dir):
+    job = queue(fake, stage="DOWNLOADED", attempts=0)
+    ckpt = Checkpoint(job)
+    ckpt.mark("DOWNLOADED", doc_path=ckpt.file("source.pdf"))
+    main.job_errored(supa.get_job(job["id"]), "RuntimeError: boom")
+    row = supa.get_job(job["id"])
+    assert (row["status"], row["stage"]) == ("PENDING", "DOWNLOADED") and os.listdir(checkpoint_dir)
+
+    main.job_errored({**row, "attempts": MAX_JOB_ATTEMPTS - 1}, "RuntimeError: boom")
+    assert_failed_and_cleared(job["id"], checkpoint_dir)
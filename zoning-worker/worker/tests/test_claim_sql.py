@@ -0,0 +1,107 @@
+import os
+import pytest
+
+# claim_jobs and extend_job_leases as written in the SQL files, run on a real
+# Postgres. test_jobs.py checks the same behaviour against fakesupa's copy.
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+pytest.importorskip("psycopg")
+from conftest import pg_schema, sql_function, sql_objects, sql_table
+
+SCHEMA = "claim_jobs_test"
+
+def statements(schema_file, functions_file):
+    """The ingestion_jobs table, its indexes and the claim/lease functions."""
+    return (sql_objects(schema_file, sql_table("ingestion_jobs"), r"^CREATE INDEX \w+ ON ingestion_jobs\b.*?;$")
+            + sql_objects(functions_file, sql_function("claim_jobs"), sql_function("extend_job_leases")))
+
+@pytest.fixture(params=[("01_schema.sql", "02_rpc_functions.sql"), ("setup.sql", "setup.sql")],
+                ids=["migrations", "setup"])
+def db(request):
+    with pg_schema(DATABASE_URL, SCHEMA, statements(*request.param)) as conn:
+        yield conn
+
+def queue(db, url="https://codes.example.com/brick.pdf", age=0, **fields):
+    """Insert one job created `age` seconds ago and return its id."""
+    row = {"source_url": url, "state_code": "NJ", "county": "Ocean", "municipality": "Brick", **fields}
+    cols = ", ".join(row)
+    return db.execute(
+        f"INSERT INTO ingestion_jobs ({cols}, created_at) VALUES ({', '.join(['%s'] * len(row))},"
+        " NOW() - make_interval(secs => %s)) RETURNING id", [*row.values(), age]).fetchone()["id"]
+
+def claim(db, limit=10, max_per_host=2, worker="w1"):
+    rows = db.execute("SELECT id FROM claim_jobs(%s, %s, 300, 600, %s, 3)", [worker, limit, max_per_host])
+    return {r["id"] for r in rows}
+
+def job(db, job_id):
+    return db.execute("SELECT * FROM ingestion_jobs WHERE id = %s", [job_id]).fetchone()
+
+def test_claim_leases_jobs_to_one_worker(db):
+    a = queue(db, url="https://a.example.com/1.pdf", priority=5)
+    b = queue(db, url="https://b.example.com/1.pdf")
+    assert claim(db, limit=1, worker="w1") == {a}
+    assert claim(db, limit=5, worker="w2") == {b}
+    assert claim(db, limit=5, worker="w3") == set()
+    row = job(db, a)
+    assert (row["status"], row["worker_id"]) == ("PROCESSING", "w1") and row["lease_expires_at"]
+
+def test_aging_promotes_jobs_beyond_the_first_rows_of_any_one_order(db):
+    # 9 + 9.9h / 10min = 68.4 outranks 10 + ~0 and 0 + 10h / 10min = 60, though
+    # the job is neither among the 100 highest priorities nor the 100 oldest
+    for i in range(100):
+        queue(db, url=f"https://new{i}.example.com/a.pdf", priority=10)
+        queue(db, url=f"https://old{i}.example.com/a.pdf", age=36000)
+    aged = queue(db, url="https://aged.example.com/a.pdf", priority=9, age=35640)
+    assert claim(db, limit=1, max_per_host=100) == {aged}
+
+def test_host_cap_skips_followers_and_stored_copies(db):
+    leader = queue(db)
+    db.execute("UPDATE ingestion_jobs SET status = 'PROCESSING' WHERE id = %s", [leader])
+    queue(db, status="PROCESSING", coalesced_into=leader)
+    first, second = queue(db, age=20), queue(db, age=10)
+    stored = queue(db, pdf_storage_path="ordinances/jobs/1.pdf", parent_id=leader, page_start=1, page_end=40)
+    # the follower doesn't count, so one more download from the host fits the cap
+    assert claim(db, max_per_host=2) == {first, stored}
+    assert job(db, second)["status"] == "PENDING"
+
+def test_expired_leases_are_requeued_or_failed_with_their_followers(db):
+    retry = queue(db, status="PROCESSING", attempts=1, worker_id="gone")
+    spent = queue(db, url="https://b.example.com/1.pdf", status="PROCESSING", attempts=3, worker_id="gone")
+    db.execute("UPDATE ingestion_jobs SET lease_expires_at = NOW() - interval '1 minute' WHERE id IN (%s, %s)",
+               [retry, spent])
+    follower = queue(db, url="https://b.example.com/1.pdf", status="PROCESSING", coalesced_into=spent)
+    unleased = queue(db, url="https://c.example.com/1.pdf", status="PROCESSING")
+    db.execute("UPDATE ingestion_jobs SET updated_at = NOW() - interval '1 hour' WHERE id = %s", [unleased])
+    live = queue(db, url="https://d.example.com/1.pdf", status="PROCESSING", worker_id="w9")
+    db.execute("UPDATE ingestion_jobs SET lease_expires_at = NOW() + interval '1 minute' WHERE id = %s", [live])
+
+    assert claim(db, limit=0) == set()
+    assert job(db, retry)["status"] == job(db, unleased)["status"] == "PENDING"
+    assert job(db, retry)["message"] == "Lease expired on worker gone (attempt 1)"
+    assert job(db, spent)["status"] == job(db, follower)["status"] == "FAILED"
+    assert job(db, follower)["message"].startswith(f"Coalesced with job {spent}: Lease expired")
+    assert (job(db, live)["status"], job(db, live)["worker_id"]) == ("PROCESSING", "w9")
+
+def test_waiting_parents_are_released_once_no_child_runs(db):
+    done = queue(db, status="WAITING", stage="SPLIT", attempts=2)
+    running = queue(db, status="WAITING", stage="SPLIT")
+    for parent, statuses in ((done, ("DONE", "FAILED")), (running, ("DONE", "PENDING"))):
+        for status in statuses:
+            queue(db, status=status, parent_id=parent, page_start=1, page_end=40)
+    claim(db, limit=0)
+    row = job(db, done)
+    assert (row["status"], row["attempts"], row["message"]) == ("PENDING", 0, "Merging page-range results")
+    assert job(db, running)["status"] == "WAITING"
+
+def test_only_the_holder_extends_a_lease(db):
+    a = queue(db)
+    assert claim(db, worker="w1") == {a}
+    extend = "SELECT * FROM extend_job_leases(%s, %s, 300)"
+    assert [r["extend_job_leases"] for r in db.execute(extend, ["w2", [a]])] == []
+    assert [r["extend_job_leases"] for r in db.execute(extend, ["w1", [a]])] == [a]
+
+def test_source_host_matches_the_worker_host(db):
+    from throttle import host_of
+    for url in ("https://Codes.Example.com:8443/brick.pdf?x=1", "http://library.example.org", "https://a.example.com#top"):
+        assert job(db, queue(db, url=url))["source_host"] == host_of(url)
@@ -0,0 +1,55 @@
+import zipfile
+from doctables import docx_tables, html_tables
+
+HTML = """
+<html><body>
+<table><tr><td><a href="/">Home</a></td></tr></table>
+<table>
+  <thead>
+    <tr><th rowspan="2">Zone</th><th colspan="2">Minimum Lot</th></tr>
+    <tr><th>Area (sf)</th><th>Frontage&nbsp;(ft)</th></tr>
+  </thead>
+  <tbody>
+    <tr><td>R-20</td><td>20,000</td><td>100<br>(A)</td></tr>
+    <tr><td>R-15</td><td>15,000</td><td>85</td></tr>
+  </tbody>
+</table>
+<script>var t = "<table>";</script>
+</body></html>
+"""
+
+def test_html_spans_are_laid_out_and_the_header_padded():
+    assert html_tables(HTML) == [[
+        ["Zone", "Minimum Lot", ""],
+        ["", "Area (sf)", "Frontage (ft)"],
+        ["", "", ""],
+        ["R-20", "20,000", "100\n(A)"],
+        ["R-15", "15,000", "85"],
+    ]]
+
+def test_leading_th_rows_count_as_header():
+    html = "<table><tr><th>Zone</th><th>Height</th></tr><tr><td>B-1</td><td>35</td></tr></table>"
+    assert html_tables(html) == [[["Zone", "Height"], ["", ""], ["", ""], ["B-1", "35"]]]
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+def cell(text, props=""):
+    return f"<w:tc><w:tcPr>{props}</w:tcPr><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>"
+
+def test_docx_grid_spans_and_vertical_merges(tmp_path):
+    header = "<w:trPr><w:tblHeader/></w:trPr>"
+    restart, merged, two = '<w:vMerge w:val="restart"/>', "<w:vMerge/>", '<w:gridSpan w:val="2"/>'
+    body = (
+        f"<w:tr>{header}{cell('Zone', restart)}{cell('Minimum Lot', two)}</w:tr>"
+        f"<w:tr>{cell('', merged)}{cell('Area')}{cell('Frontage')}</w:tr>"
+        f"<w:tr>{cell('R-20')}{cell('20,000')}{cell('100')}</w:tr>"
+    )
+    path = tmp_path / "code.docx"
+    with zipfile.ZipFile(path, "w") as z:
+        z.writestr("word/document.xml", f"<w:document {W}><w:body><w:tbl>{body}</w:tbl></w:body></w:document>")
+    assert docx_tables(str(path)) == [[
+        ["Zone", "Minimum Lot", ""],
+        ["", "Area", "Frontage"],
+        ["", "", ""],
+        ["R-20", "20,000", "100"],
+    ]]
@@ -0,0 +1,81 @@
+import random
+import pytest
+import loadtest, metrics
+from fakesupa import FakeClient
+
+@pytest.fixture
+def client():
+    c = FakeClient()
+    c.table("zones").insert([
+        {"zone_code": "R-20", "municipality": "Brick", "area": 20000, "zone_name": None},
+        {"zone_code": "R-40", "municipality": "Brick", "area": 40000, "zone_name": "Rural"},
+        {"zone_code": "B-1", "municipality": "Howell", "area": 5000, "zone_name": "Business"},
+    ]).execute()
+    return c
+
+def codes(q):
+    return [r["zone_code"] for r in q.execute().data]
+
+def test_filters_order_and_paging(client):
+    zones = lambda: client.table("zones").select("*")
+    assert codes(zones().eq("municipality", "Brick").gte("area", "20000").order("area", desc=True)) == ["R-40", "R-20"]
+    assert codes(zones().in_("zone_code", ["B-1", "R-40"]).order("zone_code")) == ["B-1", "R-40"]
+    assert codes(zones().is_("zone_name", "null")) == ["R-20"]
+    assert codes(zones().order("area").range(1, 2)) == ["R-20", "R-40"]
+    assert codes(zones().or_("zone_code.eq.B-1,and(municipality.eq.Brick,area.lt.30000)").order("area")) == ["B-1", "R-20"]
+    assert client.table("zones").select("zone_code").eq("area", 5000).single().execute().data == {"zone_code": "B-1"}
+    with pytest.raises(ValueError):
+        zones().eq("municipality", "Brick").single().execute()
+
+def test_writes_return_copies_and_fill_defaults(client):
+    job = client.table("ingestion_jobs").insert({"source_url": "https://Codes.Example.com/a.pdf"}).execute().data[0]
+    assert (job["status"], job["attempts"], job["source_host"]) == ("PENDING", 0, "codes.example.com")
+    job["status"] = "DONE"
+    assert client.rows("ingestion_jobs")[0]["status"] == "PENDING"
+    client.table("ingestion_jobs").update({"updated_at": "now()", "status": "DONE"}).eq("id", job["id"]).execute()
+    row = client.rows("ingestion_jobs")[0]
+    assert row["status"] == "DONE" and row["updated_at"] != "now()"
+    client.table("zones").delete().eq("municipality", "Howell").execute()
+    assert len(client.rows("zones")) == 2
+
+def test_upsert_updates_or_ignores_conflicts(client):
+    up = lambda values, **kw: client.table("zones").upsert(values, on_conflict="zone_code,municipality", **kw).execute()
+    up({"zone_code": "R-20", "municipality": "Brick", "area": 25000}, ignore_duplicates=True)
+    up({"zone_code": "R-40", "municipality": "Brick", "area": 43560})
+    up({"zone_code": "R-20", "municipality": "Howell", "area": 10000})
+    areas = {(r["zone_code"], r["municipality"]): r["area"] for r in client.rows("zones")}
+    assert areas == {("R-20", "Brick"): 20000, ("R-40", "Brick"): 43560, ("B-1", "Howell"): 5000, ("R-20", "Howell"): 10000}
+
+def test_unknown_rpcs_are_refused(client):
+    with pytest.raises(NotImplementedError):
+        client.rpc("no_such_rpc", {})
+
+def test_timed_reports_to_the_installed_collector():
+    seen = []
+    with metrics.timed("map"):
+        pass  # no collector: nothing recorded
+    metrics.set_collector(lambda stage, seconds: seen.append((stage, seconds)))
+    try:
+        with pytest.raises(RuntimeError):
+            with metrics.timed("download"):
+                raise RuntimeError("timed even when the stage fails")
+    finally:
+        metrics.set_collector(None)
+    assert [s for s, _ in seen] == ["download"] and seen[0][1] >= 0
+
+def test_percentile_interpolates():
+    assert loadtest.percentile([], 50) == 0.0
+    assert loadtest.percentile([4, 1, 3, 2], 50) == 2.5
+    assert loadtest.percentile([1, 2, 3, 4, 5], 99) == pytest.approx(4.96)
+
+def test_generated_pdfs_have_one_table_page_per_chunk(tmp_path):
+    rows = loadtest.zone_rows(65, random.Random(1))
+    assert len(rows) == 65 and rows[0][0] == "R-1"
+    path = tmp_path / "code.pdf"
+    loadtest.write_table_pdf(str(path), rows, rows_per_page=30)
+    data = path.read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.rstrip().endswith(b"%%EOF")
+    assert b"/Count 3 >>" in data
+    pdfplumber = pytest.importorskip("pdfplumber")
+    with pdfplumber.open(str(path)) as pdf:
+        assert len(pdf.pages) == 3
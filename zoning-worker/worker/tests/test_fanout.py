@@ -0,0 +1,62 @@
+import pytest
+import fanout, supa
+from conftest import queue
+from models import StandardEntry, Zone
+
+@pytest.fixture
+def pdf(monkeypatch):
+    """plan_ranges over a fake document of `pages` pages."""
+    def use(pages, tabular=()):
+        monkeypatch.setattr(fanout, "page_count", lambda path: pages)
+        monkeypatch.setattr(fanout, "tabular_pages", lambda path: set(tabular))
+    monkeypatch.setattr(fanout, "SPLIT_MIN_PAGES", 100)
+    monkeypatch.setattr(fanout, "SPLIT_PAGES", 40)
+    monkeypatch.setattr(fanout, "SPLIT_PRESCAN", False)
+    return use
+
+def test_short_documents_are_not_split(pdf):
+    pdf(99)
+    assert fanout.plan_ranges("x.pdf") == []
+
+def test_long_documents_split_into_fixed_ranges(pdf):
+    pdf(130)
+    assert fanout.plan_ranges("x.pdf") == [[1, 40], [41, 80], [81, 120], [121, 130]]
+
+def test_prescan_drops_prose_ranges_and_trims_the_rest(pdf, monkeypatch):
+    monkeypatch.setattr(fanout, "SPLIT_PRESCAN", True)
+    pdf(130, tabular={5, 12, 90, 95})
+    assert fanout.plan_ranges("x.pdf") == [[5, 12], [90, 95]]
+
+def zone(code, key, value, conf):
+    return Zone("NJ", "Ocean", "Brick", code, standards=[StandardEntry(key, value_numeric=value)], confidence=conf)
+
+def test_split_children_finish_and_requeue_the_parent_for_its_merge(fake):
+    parent = queue(fake, stage="DOWNLOADED", checkpoint={"doc_path": "/tmp/source.pdf"})
+    assert supa.split_job(parent["id"], [[1, 40], [41, 80], [81, 90]], "ordinances/jobs/1.pdf") == 3
+    row = supa.get_job(parent["id"])
+    assert (row["status"], row["stage"], row["checkpoint"]) == ("WAITING", "SPLIT", None)
+
+    children = [c["id"] for c in supa.child_results(parent["id"])]
+    supa.save_raw(children[0], {"payloads": [zone("R-20", "front_yard_principal", 30, 0.8).to_dict()]}, 0.8)
+    supa.save_raw(children[1], {"payloads": [zone("R-20", "rear_yard_principal", 25, 0.9).to_dict(),
+                                             zone("B-1", "max_lot_coverage", 60, 0.7).to_dict()]}, 0.9)
+    assert not supa.finish_child_job(children[0], "DONE")
+    assert not supa.finish_child_job(children[1], "DONE")
+    assert supa.get_job(parent["id"])["status"] == "WAITING"
+    assert supa.finish_child_job(children[2], "FAILED", "camelot crashed")
+    row = supa.get_job(parent["id"])
+    assert (row["status"], row["stage"], row["attempts"]) == ("PENDING", "SPLIT", 0)
+
+    groups, best, failed = fanout.merge_children(parent["id"])
+    assert sorted(groups) == ["B-1", "R-20"]
+    assert [s.key for s in groups["R-20"].standards] == ["front_yard_principal", "rear_yard_principal"]
+    assert best == 0.9
+    assert failed == ["pages 81-90: camelot crashed"]
+
+def test_split_is_idempotent_and_children_skip_the_host_cap(fake, monkeypatch):
+    monkeypatch.setattr(supa, "HOST_MAX_CONCURRENCY", 1)
+    parent = queue(fake)
+    supa.split_job(parent["id"], [[1, 40], [41, 80]], "ordinances/jobs/1.pdf")
+    assert supa.split_job(parent["id"], [[1, 40], [41, 80]], "ordinances/jobs/1.pdf") == 2
+    # stored children read the bucket, not the origin host, so all of them are claimable at once
+    assert len(supa.claim_jobs("w1", 10)) == 2
@@ -0,0 +1,68 @@
+import pytest
+np = pytest.importorskip("numpy")
+import feasibility, supa
+
+def zone(code, municipality="Brick Township", **standards):
+    return {"zone_key": f"nj-{code}", "zone_code": code, "zone_name": "", "municipality": municipality,
+            "county": "Ocean", "state_code": "NJ", "standards": [standards]}
+
+@pytest.fixture
+def zones(monkeypatch):
+    current = []
+    calls = []
+    def fetch(columns, **match):
+        calls.append(match)
+        return [z for z in current if all(z[k] == v for k, v in match.items())]
+    monkeypatch.setattr(supa, "fetch_zone_standards", fetch)
+    return current, calls
+
+def allowed(result):
+    return [z["zone_code"] for z in result["zones"] if z["allowed"]]
+
+def test_lot_matrix_derives_area_far_and_density():
+    m, corner = feasibility.lot_matrix([{"area_acres": 0.5, "floor_area_sqft": 10890, "units": 2, "corner": True}])
+    row = dict(zip(feasibility.LOT_FIELDS, m[0]))
+    assert row["area_sqft"] == pytest.approx(21780)
+    assert row["far"] == pytest.approx(0.5)
+    assert row["density_du_ac"] == pytest.approx(4)
+    assert corner.tolist() == [True]
+
+def test_evaluate_checks_minimums_maximums_and_unknowns(zones):
+    current, _ = zones
+    current += [
+        zone("R-20", area_sqft_interior_lots=20000, feet_max_height_principal_building=35),
+        zone("R-40", area_sqft_interior_lots=40000),
+        zone("B-1", feet_max_height_principal_building=30),
+        zone("OS"),
+    ]
+    engine = feasibility.FeasibilityEngine()
+    [result] = engine.evaluate([{"id": "a", "area_sqft": 25000, "height_ft": 32}])
+    assert result["lot_id"] == "a" and allowed(result) == ["R-20"]
+    [result] = engine.evaluate([{"area_sqft": 25000}], include_failing=True)
+    checks = {z["zone_code"]: z["checks"] for z in result["zones"]}
+    assert checks["R-40"]["lot_area"] is False and checks["B-1"]["lot_area"] is None
+    # a zone with nothing to compare never allows a lot
+    assert checks["OS"]["lot_area"] is None and "OS" not in allowed(result)
+
+def test_corner_lots_use_corner_columns_then_interior(zones):
+    current, _ = zones
+    current += [
+        zone("R-10", area_sqft_interior_lots=10000, area_sqft_corner_lots=12000),
+        zone("R-11", area_sqft_interior_lots=11000),
+    ]
+    engine = feasibility.FeasibilityEngine()
+    [interior, corner] = engine.evaluate([{"area_sqft": 11500}, {"area_sqft": 11500, "corner": True}])
+    assert allowed(interior) == ["R-10", "R-11"]
+    assert allowed(corner) == ["R-11"]
+
+def test_mark_stale_reloads_only_that_municipality(zones):
+    current, calls = zones
+    current += [zone("R-20", area_sqft_interior_lots=20000), zone("A", "Lakewood Township", area_sqft_interior_lots=5000)]
+    engine = feasibility.FeasibilityEngine()
+    lot = [{"area_sqft": 15000}]
+    assert allowed(engine.evaluate(lot)[0]) == ["A"]
+    current[0]["standards"] = [{"area_sqft_interior_lots": 10000}]
+    engine.mark_stale("NJ", "Brick Township")
+    assert sorted(allowed(engine.evaluate(lot, state="nj")[0])) == ["A", "R-20"]
+    assert calls[-1] == {"state_code": "NJ", "municipality": "Brick Township"}
+    assert allowed(engine.evaluate(lot, municipality="lakewood township")[0]) == ["A"]
@@ -0,0 +1,64 @@
+import pytest
+import supa
+from conftest import queue
+
+@pytest.fixture(autouse=True)
+def restore_host_cap(monkeypatch):
+    # claim() sets the cap per call; monkeypatch restores it afterwards
+    monkeypatch.setattr(supa, "HOST_MAX_CONCURRENCY", supa.HOST_MAX_CONCURRENCY)
+
+def claim(limit=10, max_per_host=2, worker="w1"):
+    supa.HOST_MAX_CONCURRENCY = max_per_host
+    return [j["id"] for j in supa.claim_jobs(worker, limit)]
+
+def test_coalesced_followers_do_not_count_against_the_host_cap(fake):
+    leader = queue(fake)
+    assert claim(max_per_host=1) == [leader["id"]]
+    for _ in range(3):
+        follower = queue(fake)
+        supa.update_job(follower["id"], status="PROCESSING")
+        supa.attach_job(follower["id"], leader["id"])
+    other = queue(fake, url="https://library.example.org/howell.pdf", municipality="Howell")
+    same_host = queue(fake, municipality="Lakewood")
+    assert claim(max_per_host=2) == [other["id"], same_host["id"]]
+    supa.finish_job(leader["id"], "DONE", "ok")
+    followers = fake.table("ingestion_jobs").select("*").eq("coalesced_into", leader["id"]).execute().data
+    assert {f["status"] for f in followers} == {"DONE"}
+
+PAST = "2000-01-01T00:00:00+00:00"
+
+def job(fake, job_id):
+    return fake.table("ingestion_jobs").select("*").eq("id", job_id).execute().data[0]
+
+def test_claim_leases_jobs_to_one_worker(fake):
+    a = queue(fake, url="https://a.example.com/1.pdf")
+    b = queue(fake, url="https://b.example.com/1.pdf")
+    assert claim(limit=1, worker="w1") == [a["id"]]
+    assert claim(limit=5, worker="w2") == [b["id"]]
+    assert claim(limit=5, worker="w3") == []
+    row = job(fake, a["id"])
+    assert (row["status"], row["worker_id"]) == ("PROCESSING", "w1")
+    assert row["lease_expires_at"]
+
+def test_higher_priority_is_claimed_first(fake):
+    low = queue(fake, url="https://a.example.com/1.pdf")
+    high = queue(fake, url="https://b.example.com/1.pdf", priority=10)
+    assert claim(limit=1) == [high["id"]]
+    assert claim(limit=1) == [low["id"]]
+
+def test_only_the_holder_extends_a_lease(fake):
+    a = queue(fake)
+    claim(worker="w1")
+    assert supa.extend_leases("w2", [a["id"]]) == []
+    assert supa.extend_leases("w1", [a["id"]]) == [a["id"]]
+
+def test_expired_lease_is_requeued_then_failed_after_max_attempts(fake, monkeypatch):
+    monkeypatch.setattr(supa, "MAX_JOB_ATTEMPTS", 2)
+    a = queue(fake)
+    claim(worker="w1")
+    supa.update_job(a["id"], attempts=1, lease_expires_at=PAST)
+    assert claim(worker="w2") == [a["id"]]  # requeued by the sweep, then claimed
+    assert job(fake, a["id"])["worker_id"] == "w2"
+    supa.update_job(a["id"], attempts=2, lease_expires_at=PAST)
+    assert claim(worker="w3") == []
+    assert job(fake, a["id"])["status"] == "FAILED"
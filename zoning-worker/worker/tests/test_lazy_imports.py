@@ -0,0 +1,42 @@
+import os, subprocess, sys, textwrap
+import pytest
+
+WORKER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each check runs in a fresh interpreter whose import system refuses the heavy
+# packages, so it holds whether or not they are installed here.
+BLOCK = textwrap.dedent("""
+    import sys
+    from importlib.abc import MetaPathFinder
+    HEAVY = {"pandas", "numpy", "camelot", "cv2", "pdfplumber", "rapidfuzz", "yaml", "supabase", "shapely"}
+    class Block(MetaPathFinder):
+        def find_spec(self, name, path=None, target=None):
+            if name.split(".")[0] in HEAVY:
+                raise ImportError(f"{name} imported eagerly")
+    sys.meta_path.insert(0, Block())
+""")
+
+def run(code):
+    env = {k: v for k, v in os.environ.items() if not k.startswith("SUPABASE_")}
+    return subprocess.run([sys.executable, "-c", BLOCK + textwrap.dedent(code)], cwd=WORKER_DIR, env=env,
+                          capture_output=True, text=True, timeout=60)
+
+@pytest.mark.parametrize("module", ["supa", "checkpoints", "extractors", "pipeline", "mapping", "fanout", "aliases"])
+def test_job_path_modules_import_without_heavy_packages(module):
+    r = run(f"import {module}")
+    assert r.returncode == 0, r.stderr
+
+def test_import_main_needs_neither_packages_nor_credentials():
+    pytest.importorskip("dotenv")
+    r = run("import main")
+    assert r.returncode == 0, r.stderr
+
+def test_supabase_client_is_created_on_first_use():
+    r = run("""
+        import supa
+        try:
+            supa.sb.table("ingestion_jobs")
+        except ImportError as e:
+            print(e)
+    """)
+    assert r.returncode == 0 and "supabase imported eagerly" in r.stdout, r.stderr
@@ -0,0 +1,35 @@
+import json
+from models import StandardEntry, Zone
+
+def test_standard_entry_emits_optional_keys_only_when_set():
+    bare = StandardEntry("front_yard_principal_building", value_numeric=30, units="ft")
+    assert bare.to_dict() == {"key": "front_yard_principal_building", "units": "ft", "section_ref": None,
+                              "value_numeric": 30}
+    full = StandardEntry("area_sqft_interior_lots", value_text="1-2 ac", units="ac", notes="B",
+                         section_ref="§ 245-12", range_low=1, range_high=2)
+    assert StandardEntry.from_dict(json.loads(json.dumps(full.to_dict()))) == full
+    assert full.number == 1 and bare.number == 30
+
+def test_standard_entry_reads_the_legacy_unit_key():
+    entry = StandardEntry.from_dict({"key": "max_height", "value_numeric": 35, "unit": "ft"})
+    assert entry.units == "ft"
+    assert StandardEntry.from_dict({"key": "k", "units": "%", "unit": "ft"}).units == "%"
+
+def test_zone_round_trips_through_stored_json():
+    zone = Zone("NJ", "Ocean", "Brick", "R-20", zone_name="Residential", ordinance_url="https://x/y.pdf",
+                standards=[StandardEntry("max_lot_coverage_percent", value_numeric=32.5, units="%")],
+                permitted_uses=["Single-family"], confidence=0.8)
+    assert Zone.from_dict(json.loads(json.dumps(zone.to_dict()))) == zone
+    bare = Zone("NJ", "Ocean", "Brick", "B-1").to_dict()
+    assert "permitted_uses" not in bare and bare["all_standards"] == [] and bare["_confidence"] == 0.0
+
+def test_zone_reads_payloads_keyed_standards():
+    zone = Zone.from_dict({"state": "NJ", "county": "Ocean", "municipality": "Brick", "zone_code": "R-20",
+                           "standards": [{"key": "depth_interior_lots_ft", "value_numeric": 100, "unit": "ft"}]})
+    assert zone.standards == [StandardEntry("depth_interior_lots_ft", value_numeric=100, units="ft")]
+    assert (zone.zone_name, zone.confidence) == (None, 0.0)
+
+def test_merge_keeps_every_standard_and_the_best_confidence():
+    a = Zone("NJ", "Ocean", "Brick", "R-20", standards=[StandardEntry("a", 1)], confidence=0.4)
+    a.merge(Zone("NJ", "Ocean", "Brick", "R-20", standards=[StandardEntry("b", 2)], confidence=0.9))
+    assert [s.key for s in a.standards] == ["a", "b"] and a.confidence == 0.9
@@ -0,0 +1,49 @@
+import pytest
+import supa
+from models import StandardEntry, Zone
+
+@pytest.fixture(autouse=True)
+def fresh_ids():
+    supa._municipality_id.cache_clear()
+    yield
+    supa._municipality_id.cache_clear()
+
+@pytest.fixture
+def resolves(fake, monkeypatch):
+    """Count the resolve_municipality RPCs the fake client answers."""
+    calls = []
+    real = fake.rpc_resolve_municipality
+    monkeypatch.setattr(fake, "rpc_resolve_municipality", lambda **kw: calls.append(kw) or real(**kw), raising=False)
+    return calls
+
+def test_municipality_ids_are_resolved_once_per_process(fake, resolves):
+    brick = supa.municipality_id("nj", "Ocean", "Brick")
+    assert supa.municipality_id("NJ", "Ocean", "Brick") == brick
+    assert len(resolves) == 1
+    assert supa.municipality_id("NJ", "Monmouth", "Brick") != brick
+    assert fake.rows("municipalities")[0] | {"created_at": None, "updated_at": None} == {
+        "id": brick, "state_code": "NJ", "county": "Ocean", "name": "Brick", "created_at": None, "updated_at": None}
+
+def test_zone_filters_add_the_municipality_ids(fake):
+    brick = supa.municipality_id("NJ", "Ocean", "Brick")
+    supa.municipality_id("PA", "Bucks", "Brick")
+    assert supa.municipality_ids(state_code="nj", municipality="Brick") == [brick]
+    assert len(supa.municipality_ids(municipality="Brick")) == 2
+    assert supa.municipality_ids(state_code="NJ") is None
+
+    for muni_id, state in ((brick, "NJ"), (99, "NJ")):
+        fake.table("zones").insert({"municipality_id": muni_id, "state_code": state, "municipality": "Brick"}).execute()
+    q = supa._match_zones(fake.table("zones").select("*"), {"state_code": "NJ", "municipality": "Brick", "county": None})
+    assert [z["municipality_id"] for z in q.execute().data] == [brick]
+
+def test_ingest_writes_zones_and_standards_under_the_municipality(fake, resolves):
+    zone = lambda code, front: Zone("NJ", "Ocean", "Brick", code, standards=[
+        StandardEntry("front_yard_principal", value_numeric=front, units="ft")])
+    first = supa.call_admin_ingest(zone("R-20", 30))
+    assert supa.call_admin_ingest(zone("R-20", 35)) == first
+    supa.call_admin_ingest(zone("R-40", 50))
+    brick = supa.municipality_id("NJ", "Ocean", "Brick")
+    assert len(resolves) == 1
+    assert {z["municipality_id"] for z in fake.rows("zones")} == {brick} and len(fake.rows("zones")) == 2
+    fronts = {(s["municipality_id"], s["zone_id"], s["front_yard_principal_building"]) for s in fake.rows("standards")}
+    assert fronts == {(brick, first, 35), (brick, first + 1, 50)}
@@ -0,0 +1,56 @@
+import pytest
+from parsers import lex_cell
+
+@pytest.mark.parametrize("cell, value, units", [
+    ("20,000 sf", 20000, "sf"),
+    ("20,000 sq. ft.", 20000, "sf"),
+    ("35%", 35, "%"),
+    ("1.5 acres", 1.5, "ac"),
+    ("12 du/ac", 12, "du/ac"),
+    ("35 ft", 35, "ft"),
+    ("35'", 35, "ft"),
+    ("2.5 stories", 2.5, None),
+    ("1/2 acre", 0.5, "ac"),
+    ("1 1/2 acres", 1.5, "ac"),
+    (30, 30, None),
+])
+def test_value_and_units(cell, value, units):
+    m = lex_cell(cell)
+    assert (m.value, m.units) == (value, units)
+    assert not m.is_range
+
+@pytest.mark.parametrize("cell, low, high, units", [
+    ("10-15%", 10, 15, "%"),
+    ("1-2 ac", 1, 2, "ac"),
+    ("10 to 15", 10, 15, None),
+])
+def test_ranges_take_the_lower_bound_and_the_trailing_unit(cell, low, high, units):
+    m = lex_cell(cell)
+    assert (m.value, m.low, m.high, m.units) == (low, low, high, units)
+
+def test_percentage_wins_over_earlier_numbers():
+    m = lex_cell("2 stories or 35%")
+    assert (m.value, m.units, m.values) == (35, "%", (2, 35))
+
+@pytest.mark.parametrize("cell, depth", [
+    ("20,000 sf x 150", 150),
+    ("Depth: 150 ft", 150),
+    ("150 ft deep", 150),
+    ("5,000 sf / 100 ft", 100),
+    ("20,000 sf", None),
+])
+def test_embedded_lot_depth(cell, depth):
+    assert lex_cell(cell).depth == depth
+
+@pytest.mark.parametrize("cell, note", [("25 (B)", "B"), ("25(1)", "1"), ("25 (1)", "1")])
+def test_footnote_markers_go_to_notes(cell, note):
+    m = lex_cell(cell)
+    assert (m.value, m.notes, m.values) == (25, note, (25,))
+
+def test_slashed_pairs_are_not_fractions():
+    assert lex_cell("10/25").values == (10, 25)
+
+@pytest.mark.parametrize("cell", ["", None, "n/a", "—", "--"])
+def test_empty_cells(cell):
+    m = lex_cell(cell)
+    assert m.value is None and m.is_empty
@@ -0,0 +1,74 @@
+import json, os, re
+import pytest
+
+# Municipality ids and the hash-partitioned zones/standards tables, from the SQL
+# files, on the Postgres named by TEST_DATABASE_URL.
+DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if not DATABASE_URL:
+    pytest.skip("TEST_DATABASE_URL is not set", allow_module_level=True)
+pytest.importorskip("psycopg")
+from conftest import pg_schema, sql_function, sql_objects, sql_table
+
+SCHEMA = "zone_partitions_test"
+
+def statements(schema_file, functions_file):
+    tables = sql_objects(schema_file, sql_table("municipalities"), sql_table("zones"), sql_table("standards"),
+                         r"^DO \$\$.*?PARTITION OF.*?^END \$\$;")
+    # the partitions go in the test's schema rather than the shared zone_partitions
+    return [t.replace("zone_partitions.", "") for t in tables] + sql_objects(
+        functions_file, sql_function("get_standard_value"), sql_function("resolve_municipality"),
+        sql_function("admin_ingest_zone"))
+
+@pytest.fixture(params=[("01_schema.sql", "02_rpc_functions.sql"), ("setup.sql", "setup.sql")],
+                ids=["migrations", "setup"])
+def db(request):
+    with pg_schema(DATABASE_URL, SCHEMA, statements(*request.param)) as conn:
+        yield conn
+
+def resolve(db, state, county, name):
+    return db.execute("SELECT resolve_municipality(%s, %s, %s) AS id", [state, county, name]).fetchone()["id"]
+
+def ingest(db, municipality, code, **standards):
+    std = json.dumps([{"key": k, "value_numeric": v} for k, v in standards.items()])
+    return db.execute("SELECT admin_ingest_zone('NJ', 'Ocean', %s, %s, NULL, NULL, %s::jsonb) AS id",
+                      [municipality, code, std]).fetchone()["id"]
+
+def test_municipalities_are_registered_once(db):
+    brick = resolve(db, "nj", "Ocean", "Brick")
+    assert resolve(db, "NJ", "Ocean", "Brick") == brick
+    # names repeat across counties
+    assert resolve(db, "NJ", "Morris", "Washington Township") != resolve(db, "NJ", "Warren", "Washington Township")
+    assert resolve(db, "NJ", None, "Unknown") == resolve(db, "NJ", "", "Unknown")
+
+def test_a_zone_and_its_standards_share_one_partition(db):
+    zone_id = ingest(db, "Brick", "R-20", front_yard_principal=30)
+    muni = resolve(db, "NJ", "Ocean", "Brick")
+    [zone] = db.execute("SELECT tableoid::regclass::text AS part FROM zones WHERE id = %s", [zone_id]).fetchall()
+    [std] = db.execute("SELECT tableoid::regclass::text AS part, front_yard_principal_building AS front FROM standards "
+                       "WHERE municipality_id = %s AND zone_id = %s", [muni, zone_id]).fetchall()
+    assert zone["part"].rsplit("_p", 1)[1] == std["part"].rsplit("_p", 1)[1]
+    assert std["front"] == 30
+
+def test_reingest_replaces_standards_per_municipality(db):
+    first = ingest(db, "Brick", "R-20", front_yard_principal=30)
+    assert ingest(db, "Brick", "R-20", front_yard_principal=35) == first
+    other = ingest(db, "Howell", "R-20", front_yard_principal=50)
+    rows = db.execute("SELECT z.municipality, s.front_yard_principal_building AS front FROM zones z "
+                      "JOIN standards s ON s.municipality_id = z.municipality_id AND s.zone_id = z.id "
+                      "ORDER BY z.municipality").fetchall()
+    assert [(r["municipality"], r["front"]) for r in rows] == [("Brick", 35), ("Howell", 50)]
+    assert other != first
+
+def test_the_worker_upsert_matches_a_unique_key(db):
+    muni = resolve(db, "NJ", "Ocean", "Brick")
+    upsert = ("INSERT INTO zones (municipality_id, zone_code, zone_name, state_code, municipality) "
+              "VALUES (%s, 'R-20', %s, 'NJ', 'Brick') ON CONFLICT (municipality_id, zone_code) "
+              "DO UPDATE SET zone_name = EXCLUDED.zone_name RETURNING id")
+    first = db.execute(upsert, [muni, "Residential"]).fetchone()["id"]
+    assert db.execute(upsert, [muni, "Residential 20"]).fetchone()["id"] == first
+
+def test_municipality_filters_scan_one_partition(db):
+    muni = resolve(db, "NJ", "Ocean", "Brick")
+    plan = "\n".join(r["QUERY PLAN"] for r in db.execute(
+        f"EXPLAIN SELECT * FROM zones WHERE municipality_id = {muni} AND zone_code = 'R-20'"))
+    assert len(set(re.findall(r"\bon zones_p\d+\b", plan))) == 1
@@ -0,0 +1,53 @@
+import time
+import pytest
+import profiling, supa
+from conftest import queue
+
+@pytest.mark.parametrize("selected, job, profiled", [
+    (set(), {"profile": True, "municipality": "Brick"}, True),
+    (set(), {"municipality": "Brick"}, False),
+    ({"all"}, {"municipality": "Howell"}, True),
+    ({"brick"}, {"municipality": "Brick", "state_code": "NJ"}, True),
+    ({"nj|middletown"}, {"municipality": "Middletown", "state_code": "NJ"}, True),
+    ({"nj|middletown"}, {"municipality": "Middletown", "state_code": "PA"}, False),
+])
+def test_should_profile(monkeypatch, selected, job, profiled):
+    monkeypatch.setattr(profiling, "PROFILE_JOBS", selected)
+    assert profiling.should_profile(job) is profiled
+
+def busy(job):
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+    return job["id"]
+
+def test_profiled_run_stores_pstats_and_collapsed_stacks(fake, monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_INTERVAL", 0.001)
+    job = queue(fake, attempts=1)
+    assert profiling.profile_job(job, busy) == job["id"]
+
+    [listed] = supa.list_job_profiles(job["id"])
+    assert (listed["attempt"], listed["error"]) == (2, None) and listed["samples"] > 0
+    row = supa.load_job_profile(listed["id"])
+    stats = profiling.load_stats(row)
+    assert any(func[2] == "busy" for func in stats.stats)
+    pstats_path, collapsed_path = profiling.export(row, str(tmp_path))
+    with open(collapsed_path) as f:
+        stack, count = f.readline().rsplit(" ", 1)
+    assert "busy (test_profiling.py:" in stack and int(count) > 0
+
+def test_failed_run_still_stores_its_profile(fake):
+    job = queue(fake)
+
+    def fail(job):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        profiling.profile_job(job, fail)
+    assert supa.list_job_profiles(job["id"])[0]["error"] == "RuntimeError: boom"
+
+def test_a_failed_save_does_not_fail_the_job(fake, monkeypatch):
+    def refuse(row):
+        raise ConnectionError("database down")
+    monkeypatch.setattr(supa, "save_job_profile", refuse)
+    assert profiling.profile_job(queue(fake), lambda job: "done") == "done"
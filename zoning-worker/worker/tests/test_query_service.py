@@ -0,0 +1,63 @@
+import json, threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+import pytest
+
+pytest.importorskip("dotenv")
+import query_service
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), query_service.Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv.server_address[1]
+    srv.shutdown()
+    srv.server_close()
+
+def post(port, path, body, headers=()):
+    conn = HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("POST", path, json.dumps(body), {"Content-Type": "application/json", **dict(headers)})
+    r = conn.getresponse()
+    return r.status, json.loads(r.read())
+
+INVALIDATE = {"state": "NJ", "municipality": "Brick"}
+
+def test_invalidate_is_refused_without_a_configured_token(server, monkeypatch):
+    monkeypatch.setattr(query_service, "QUERY_SERVICE_TOKEN", "")
+    assert post(server, "/invalidate", INVALIDATE)[0] == 403
+
+def test_invalidate_needs_the_matching_token(server, monkeypatch):
+    monkeypatch.setattr(query_service, "QUERY_SERVICE_TOKEN", "s3cret")
+    assert post(server, "/invalidate", INVALIDATE, {"X-Invalidate-Token": "guess"})[0] == 403
+    assert post(server, "/invalidate", INVALIDATE, {"X-Invalidate-Token": "s3cret"}) == (200, {"invalidated": 0})
+
+def test_oversized_bodies_are_refused_unread(server, monkeypatch):
+    monkeypatch.setattr(query_service, "QUERY_MAX_BODY_BYTES", 64)
+    status, _ = post(server, "/feasibility", {"lots": [{"id": "x" * 100}]})
+    assert status == 413
+
+def test_search_sends_the_query_it_caches_under(fake, monkeypatch):
+    monkeypatch.setattr(query_service, "cache", query_service.ResultCache(maxsize=10, ttl=60))
+    sent = []
+    fake.rpc_search_zones = lambda search_query: sent.append(search_query) or [{"zone_code": search_query}]
+    assert query_service.search("  Toms   River ") == [{"zone_code": "Toms River"}]
+    assert query_service.search("toms river") == [{"zone_code": "Toms River"}]
+    assert sent == ["Toms River"]
+
+def test_zones_at_merges_districts_with_their_zones(monkeypatch):
+    pytest.importorskip("shapely")
+    import supa
+    ring = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]
+    districts = [{"zone_key": k, "zone_code": k, "municipality": "Brick", "state_code": "NJ",
+                  "geom": {"type": "Polygon", "coordinates": [ring]}} for k in ("R-20", "OV-1")]
+    districts[1]["geom"]["coordinates"] = [[[x / 5, y / 5] for x, y in ring]]
+    monkeypatch.setattr(supa, "fetch_districts", lambda: districts)
+    monkeypatch.setattr(supa, "fetch_zones_by_key", lambda keys, columns: [
+        {"zone_key": "R-20", "zone_code": "R-20", "zone_name": "Residential", "municipality": "Brick",
+         "county": "Ocean", "state_code": "NJ", "standards": [{"max_lot_coverage_percent": 30}]}])
+    monkeypatch.setattr(query_service, "spatial_index", query_service._SpatialIndex())
+    out = query_service.zones_at([{"id": "a", "lon": 5, "lat": 5}, {"lon": 1, "lat": 1}, {"id": "c", "lon": 50, "lat": 50}])
+    assert [(r["point_id"], r["zone_code"]) for r in out] == [("a", "R-20"), ("1", "OV-1"), ("c", None)]
+    assert (out[0]["zone_name"], out[0]["state"], out[0]["max_lot_coverage_percent"]) == ("Residential", "NJ", 30)
+    # a district whose zone has not been ingested still reports its code
+    assert (out[1]["municipality"], out[1]["zone_name"], out[1]["max_lot_coverage_percent"]) == ("Brick", None, None)
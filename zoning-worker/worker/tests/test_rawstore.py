@@ -0,0 +1,54 @@
+import zlib
+import pytest
+import rawstore, supa
+
+PAYLOAD = {"payloads": [{"zone_code": "R-20", "all_standards": [{"key": "max_height", "value_numeric": 35, "units": "ft"}]}]}
+
+def test_encode_decode_round_trip():
+    row = rawstore.encode(PAYLOAD)
+    assert row["payload"].startswith("\\x")
+    assert row["raw_bytes"] == len(rawstore.canonical_json(PAYLOAD))
+    assert rawstore.decode(row) == PAYLOAD
+
+def test_content_hash_ignores_key_order():
+    reordered = {"payloads": [{"all_standards": [{"units": "ft", "value_numeric": 35, "key": "max_height"}],
+                               "zone_code": "R-20"}]}
+    assert rawstore.encode(reordered)["content_hash"] == rawstore.encode(PAYLOAD)["content_hash"]
+    assert rawstore.encode({"payloads": []})["content_hash"] != rawstore.encode(PAYLOAD)["content_hash"]
+
+def test_bytea_hex_conversion():
+    assert rawstore.to_bytea(b"\x00\xffab") == "\\x00ff6162"
+    assert rawstore.from_bytea("\\x00ff6162") == rawstore.from_bytea("00ff6162") == b"\x00\xffab"
+
+def test_zlib_is_used_and_read_without_zstandard(monkeypatch):
+    monkeypatch.setattr(rawstore, "zstandard", None)
+    row = rawstore.encode(PAYLOAD)
+    assert row["codec"] == "zlib"
+    assert zlib.decompress(rawstore.from_bytea(row["payload"])) == rawstore.canonical_json(PAYLOAD)
+    assert rawstore.decode(row) == PAYLOAD
+    with pytest.raises(RuntimeError):
+        rawstore.decompress("zstd", b"")
+    with pytest.raises(ValueError):
+        rawstore.decompress("lz4", b"")
+
+def zone(code, *standards):
+    return {"zone_code": code, "all_standards": [{"key": k, "value_numeric": v, "units": "ft"} for k, v in standards]}
+
+def test_diff_payloads_by_zone_and_standard():
+    a = {"payloads": [zone("R-20", ("front", 30), ("rear", 40)), zone("B-1", ("front", 10))]}
+    b = {"payloads": [zone("R-20", ("front", 30), ("rear", 35)), zone("R-40", ("front", 50))]}
+    assert rawstore.diff_payloads(a, b) == {
+        "added": ["R-40"],
+        "removed": ["B-1"],
+        "changed": {"R-20": {"removed": [("rear", 40, None, "ft")], "added": [("rear", 35, None, "ft")]}},
+    }
+    assert rawstore.diff_payloads(a, a) == {"added": [], "removed": [], "changed": {}}
+
+def test_identical_runs_share_one_blob(fake):
+    first = supa.save_raw(1, PAYLOAD, 0.8)
+    assert supa.save_raw(2, dict(PAYLOAD), 0.9) == first
+    assert len(fake.table("raw_extraction_blobs").select("*").execute().data) == 1
+    raws = fake.table("raw_extractions").select("*").execute().data
+    assert [(r["job_id"], r["content_hash"]) for r in raws] == [(1, first), (2, first)]
+    assert supa.load_raw(raws[1]["id"]) == supa.load_raw_by_hash(first) == PAYLOAD
+    assert supa.diff_raw(raws[0]["id"], raws[1]["id"]) == {"added": [], "removed": [], "changed": {}}
@@ -0,0 +1,54 @@
+import gzip, json, os
+import pytest
+import shards, supa
+
+def zone(code, **standards):
+    return {"zone_code": code, "zone_name": f"Zone {code}", "municipality": "Brick Township", "county": "Ocean",
+            "state_code": "NJ", "ordinance_url": "", "standards": [standards]}
+
+def test_shard_doc_is_columnar_sorted_and_normalizes_numbers():
+    doc = shards.shard_doc("NJ", "Brick Township", [
+        zone("R-20", area_sqft_interior_lots="20000.0", max_lot_coverage_percent=32.5),
+        {**zone("B-1"), "standards": []},
+    ])
+    assert doc["columns"][:6] == ["zone_code", "zone_name", "municipality", "county", "state", "ordinance_url"]
+    assert [r[0] for r in doc["rows"]] == ["B-1", "R-20"]
+    r20 = dict(zip(doc["columns"], doc["rows"][1]))
+    assert r20["area_sqft_interior_lots"] == 20000 and isinstance(r20["area_sqft_interior_lots"], int)
+    assert r20["max_lot_coverage_percent"] == 32.5
+    assert r20["ordinance_url"] is None and r20["maximum_far"] is None
+    assert doc["county"] == "Ocean"
+
+@pytest.fixture
+def zones(monkeypatch):
+    current = []
+    monkeypatch.setattr(supa, "fetch_zone_standards", lambda columns, **match: list(current))
+    return current
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+def test_export_writes_a_versioned_shard_and_updates_the_indexes(tmp_path, zones):
+    zones.append(zone("R-20", area_sqft_interior_lots=20000))
+    rel = shards.export_municipality("NJ", "Brick Township", str(tmp_path))
+    assert rel.startswith("muni/NJ/brick-township.") and rel.endswith(".json")
+    with gzip.open(tmp_path / (rel + ".gz")) as f:
+        assert json.load(f) == read(tmp_path / rel)
+    entry = read(tmp_path / "manifest.json")["municipalities"]["NJ|brick township"]
+    assert (entry["file"], entry["zones"]) == (rel, 1)
+    assert "NJ|brick township" in read(tmp_path / "county/NJ/ocean.json")["municipalities"]
+
+    # unchanged content keeps its version; new content gets a new one and the old file stays for stale clients
+    assert shards.export_municipality("NJ", "Brick Township", str(tmp_path)) == rel
+    zones.append(zone("R-15"))
+    newer = shards.export_municipality("NJ", "Brick Township", str(tmp_path))
+    assert newer != rel and os.path.exists(tmp_path / rel)
+
+def test_municipality_without_zones_leaves_the_manifest(tmp_path, zones):
+    zones.append(zone("R-20"))
+    shards.export_municipality("NJ", "Brick Township", str(tmp_path))
+    zones.clear()
+    assert shards.export_municipality("NJ", "Brick Township", str(tmp_path)) is None
+    assert read(tmp_path / "manifest.json")["municipalities"] == {}
+    assert read(tmp_path / "county/NJ/ocean.json")["municipalities"] == {}
@@ -0,0 +1,64 @@
+import json
+import pytest
+import spatial
+
+def square(x0, y0, size):
+    return [[[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]]
+
+def feature(code, x0, y0, size, field="ZONE"):
+    return {"type": "Feature", "properties": {field: code, "acres": 12},
+            "geometry": {"type": "Polygon", "coordinates": square(x0, y0, size)}}
+
+@pytest.fixture
+def geojson(tmp_path):
+    path = tmp_path / "districts.geojson"
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": [
+        feature("R-20", 0, 0, 10),
+        feature("  OV  1 ", 2, 2, 2),
+        feature("", 20, 20, 1),
+        {"type": "Feature", "properties": {"ZONE": "X"}, "geometry": None},
+    ]}))
+    return str(path)
+
+def test_read_features_takes_collections_and_single_features(geojson, tmp_path):
+    assert [p["ZONE"] for _, p in spatial.read_features(geojson)] == ["R-20", "  OV  1 ", ""]
+    single = tmp_path / "one.json"
+    single.write_text(json.dumps(feature("B-1", 0, 0, 1)))
+    assert [p["ZONE"] for _, p in spatial.read_features(str(single))] == ["B-1"]
+
+def test_polygons_become_multipolygon_ewkt():
+    poly = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 0]]]}
+    assert spatial.multipolygon_ewkt(poly) == "SRID=4326;MULTIPOLYGON(((0 0,1 0,1 1,0 0)))"
+    multi = {"type": "MultiPolygon", "coordinates": [poly["coordinates"], [[[5, 5, 9], [6, 5, 9], [5, 6, 9], [5, 5, 9]]]]}
+    assert spatial.multipolygon_ewkt(multi) == "SRID=4326;MULTIPOLYGON(((0 0,1 0,1 1,0 0)),((5 5,6 5,5 6,5 5)))"
+    with pytest.raises(ValueError):
+        spatial.multipolygon_ewkt({"type": "Point", "coordinates": [0, 0]})
+
+def test_zone_field_is_found_case_insensitively():
+    assert spatial.zone_field_of({"objectid": 1, "Zone_Code": "R-20"}) == "Zone_Code"
+    assert spatial.zone_field_of({"name": "Park"}) is None
+
+def test_district_rows_link_features_to_zone_keys(geojson):
+    rows = spatial.district_rows(geojson, "NJ", "Brick")
+    assert [(r["zone_code"], r["zone_key"]) for r in rows] == [("R-20", "NJ_Brick_R-20"), ("OV 1", "NJ_Brick_OV_1")]
+    assert rows[0]["source"] == "districts.geojson" and rows[0]["properties"]["acres"] == 12
+    assert rows[0]["geom"].startswith("SRID=4326;MULTIPOLYGON(((0 0,10 0,")
+
+@pytest.fixture
+def shapely():
+    return pytest.importorskip("shapely")
+
+def test_lookup_prefers_the_smallest_overlapping_district(shapely):
+    districts = [{"zone_key": k, "geom": {"type": "Polygon", "coordinates": square(x, y, s)}}
+                 for k, x, y, s in (("R-20", 0, 0, 10), ("OV-1", 2, 2, 2))]
+    index = spatial.DistrictIndex(districts + [{"zone_key": "none", "geom": None}])
+    found = index.lookup([(1, 1), (3, 3), (50, 50)])
+    assert [d and d["zone_key"] for d in found] == ["R-20", "OV-1", None]
+    assert index.lookup([]) == []
+
+def test_parcel_points_fall_inside_each_parcel(shapely):
+    # an L-shaped parcel, whose centroid lies outside it
+    ring = [[0, 0], [10, 0], [10, 1], [1, 1], [1, 10], [0, 10], [0, 0]]
+    [p] = spatial.parcel_points([{"id": 7, "geometry": {"type": "Polygon", "coordinates": [ring]}}])
+    assert p["id"] == "7"
+    assert shapely.geometry.Polygon(ring).contains(shapely.geometry.Point(p["lon"], p["lat"]))
@@ -0,0 +1,54 @@
+import sys, types
+import pytest
+import extractors
+from models import Zone
+from pipeline import consolidate
+
+class Table:
+    def __init__(self, page, flavor):
+        self.page, self.df = str(page), f"{flavor}-{page}"
+
+@pytest.fixture
+def camelot(monkeypatch):
+    """A camelot stand-in recording each read_pdf call; pages in `empty` have no tables."""
+    calls, empty, broken = [], set(), set()
+
+    def read_pdf(path, flavor, pages):
+        calls.append((flavor, pages))
+        if flavor in broken:
+            raise RuntimeError(f"{flavor} failed")
+        first, last = map(int, pages.split("-"))
+        return [Table(n, flavor) for n in range(first, last + 1) if n not in empty]
+
+    monkeypatch.setitem(sys.modules, "camelot", types.SimpleNamespace(read_pdf=read_pdf))
+    monkeypatch.setattr(extractors, "page_count", lambda path: 25)
+    monkeypatch.setattr(extractors, "EXTRACT_PAGE_WINDOW", 10)
+    return types.SimpleNamespace(calls=calls, empty=empty, broken=broken)
+
+def test_camelot_is_read_one_page_window_at_a_time(camelot):
+    tables = extractors.camelot_stream("x.pdf")
+    assert next(tables) == (1, "stream-1")
+    # only the first window has been read when its first table arrives
+    assert camelot.calls == [("stream", "1-10")]
+    assert [p for p, _ in tables][-1] == 25
+    assert camelot.calls == [("stream", "1-10"), ("stream", "11-20"), ("stream", "21-25")]
+
+def test_page_ranges_are_clamped_to_the_document(camelot):
+    assert [p for p, _ in extractors.camelot_lattice("x.pdf", (18, 40))] == list(range(18, 26))
+    assert camelot.calls == [("lattice", "18-25")]
+
+def test_auto_falls_back_over_the_whole_document(camelot, monkeypatch):
+    monkeypatch.setattr(extractors, "pdfplumber_tables", lambda path, pages=None: iter([(3, "plumber-3")]))
+    camelot.empty.update(range(1, 26))
+    assert list(extractors.iter_tables("x.pdf")) == [(3, "plumber-3")]
+    assert [f for f, _ in camelot.calls] == ["lattice"] * 3 + ["stream"] * 3
+
+    camelot.empty.clear()
+    camelot.broken.add("lattice")
+    assert next(extractors.iter_tables("x.pdf", (1, 5))) == (1, "stream-1")
+
+def test_consolidate_folds_zones_as_they_stream():
+    groups = {}
+    consolidate([Zone("NJ", "Ocean", "Brick", "R-20", confidence=0.4)], groups)
+    consolidate([Zone("NJ", "Ocean", "Brick", "R-20", confidence=0.9), Zone("NJ", "Ocean", "Brick", "B-1")], groups)
+    assert list(groups) == ["R-20", "B-1"] and groups["R-20"].confidence == 0.9
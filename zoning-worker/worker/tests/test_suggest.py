@@ -0,0 +1,29 @@
+import suggest
+
+def zone(code, name="", muni="Brick Township", county="Ocean"):
+    return {"zone_code": code, "zone_name": name, "municipality": muni, "county": county, "state_code": "NJ"}
+
+def test_terms_skip_filler_words():
+    assert suggest.normalize("R-20") == suggest.normalize("r 20") == "r20"
+    assert suggest.terms("Township of Brick") == ["townshipofbrick", "brick"]
+
+def test_rows_index_codes_names_municipalities_and_counties():
+    rows = suggest.suggestion_rows([zone("R-20", "Residential"), zone("B-1")])
+    values = {(r["kind"], r["term"]): r["value"] for r in rows}
+    assert values[("zone", "r20")] == "R-20 Brick Township NJ"
+    assert values[("zone", "residential")] == "R-20 Brick Township NJ"
+    assert values[("municipality", "bricktownship")] == "Brick Township NJ"
+    assert values[("county", "ocean")] == "Ocean County NJ"
+    muni = next(r for r in rows if r["kind"] == "municipality")
+    county = next(r for r in rows if r["kind"] == "county")
+    assert muni["weight"] == 2 and county["municipality"] == ""
+
+def test_index_prefers_exact_terms_then_weight_and_dedupes_values():
+    index = suggest.SuggestIndex(suggest.suggestion_rows([
+        zone("R-2"), zone("R-20", "Residential 20"), zone("R-20", muni="Lakewood Township"),
+    ]))
+    got = [s["value"] for s in index.query("r 2")]
+    assert got[0] == "R-2 Brick Township NJ"
+    assert set(got) == {"R-2 Brick Township NJ", "R-20 Brick Township NJ", "R-20 Lakewood Township NJ"}
+    assert [s["value"] for s in index.query("r2", limit=1)] == ["R-2 Brick Township NJ"]
+    assert index.query("--") == [] and index.query("zz") == []
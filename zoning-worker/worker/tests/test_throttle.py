@@ -0,0 +1,56 @@
+import threading, time
+import pytest
+import throttle
+
+@pytest.fixture(autouse=True)
+def fresh(monkeypatch):
+    monkeypatch.setattr(throttle, "_slots", {})
+    monkeypatch.setattr(throttle, "_next_start", {})
+
+@pytest.mark.parametrize("url, host", [
+    ("https://Codes.Example.com:8443/brick.pdf?x=1", "codes.example.com"),
+    ("http://library.example.org", "library.example.org"),
+    ("not a url", ""),
+])
+def test_host_of(url, host):
+    assert throttle.host_of(url) == host
+
+def test_slots_cap_concurrent_downloads_per_host(monkeypatch):
+    monkeypatch.setattr(throttle, "HOST_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(throttle, "HOST_MIN_INTERVAL", 0)
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def download(url):
+        with throttle.host_slot(url):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+
+    threads = [threading.Thread(target=download, args=(f"https://a.example.com/{i}.pdf",)) for i in range(6)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert peak[0] == 2
+
+class Clock:
+    def __init__(self):
+        self.now, self.slept = 100.0, []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+def test_starts_on_one_host_are_spaced_by_the_min_interval(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle, "time", clock)
+    monkeypatch.setattr(throttle, "HOST_MIN_INTERVAL", 1.0)
+    for url in ("https://a.example.com/1", "https://a.example.com/2", "https://b.example.com/1", "https://a.example.com/3"):
+        with throttle.host_slot(url):
+            clock.now += 0.25
+    # a/2 waits 0.75s after a/1's start; b is another host; a/3 is due 1s after a/2's delayed start
+    assert clock.slept == [0.75, 0.5]
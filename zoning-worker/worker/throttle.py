@@ -0,0 +1,31 @@
+import os, time, threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# Per-host download limits inside one worker process. Cluster-wide, the
+# claim_jobs RPC already refuses to hand out more than
+# HOST_MAX_CONCURRENCY jobs for a host that is being processed.
+HOST_MAX_CONCURRENCY = int(os.getenv("HOST_MAX_CONCURRENCY", "2"))
+HOST_MIN_INTERVAL = float(os.getenv("HOST_MIN_INTERVAL_SECONDS", "1.0"))
+
+_lock = threading.Lock()
+_slots: dict[str, threading.BoundedSemaphore] = {}
+_next_start: dict[str, float] = {}
+
+def host_of(url: str) -> str:
+    return (urlparse(url).hostname or "").lower()
+
+@contextmanager
+def host_slot(url: str):
+    """Hold one of the host's concurrency slots, spacing request starts by HOST_MIN_INTERVAL."""
+    host = host_of(url)
+    with _lock:
+        slot = _slots.setdefault(host, threading.BoundedSemaphore(HOST_MAX_CONCURRENCY))
+    with slot:
+        with _lock:
+            now = time.monotonic()
+            start = max(now, _next_start.get(host, now))
+            _next_start[host] = start + HOST_MIN_INTERVAL
+        if start > now:
+            time.sleep(start - now)
+        yield